@@ -0,0 +1,43 @@
+"""Índices compostos da tabela alerts
+
+Revision ID: 0001_alert_indexes
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_alert_indexes'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, colunas, colunas incluídas no Postgres)
+ALERT_INDEXES = [
+    ("ix_alerts_user_created", ["user_id", "created_at", "id"], None),
+    ("ix_alerts_user_status_created", ["user_id", "status", "created_at", "id"], None),
+    ("ix_alerts_user_type_created", ["user_id", "alert_type", "created_at"], ["stock_id", "strategy_id"]),
+    ("ix_alerts_type_created", ["alert_type", "created_at"], None),
+]
+
+
+def upgrade() -> None:
+    # Bancos criados por Base.metadata.create_all já podem ter os índices
+    if op.get_context().as_sql:
+        existing = set()
+    else:
+        existing = {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("alerts")}
+
+    for name, columns, include in ALERT_INDEXES:
+        if name not in existing:
+            op.create_index(name, "alerts", columns, postgresql_include=include or [])
+
+
+def downgrade() -> None:
+    for name, _, _ in reversed(ALERT_INDEXES):
+        op.drop_index(name, table_name="alerts")
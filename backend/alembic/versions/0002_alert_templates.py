@@ -0,0 +1,229 @@
+"""Alertas como template + parâmetros numéricos
+
+Revision ID: 0002_alert_templates
+Revises: 0001_alert_indexes
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.alert_templates import render_alert, format_price, format_score
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_alert_templates'
+down_revision: Union[str, None] = '0001_alert_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Linhas lidas/atualizadas por vez no backfill
+BATCH_SIZE = 5000
+
+# alert_type é gravado pelo nome do enum
+TEMPLATE_BY_TYPE = {
+    "STRATEGY_MATCH": "strategy_match",
+    "SCORE_ALERT": "score_alert",
+    "DIVIDEND_ALERT": "dividend_alert",
+}
+
+STRATEGY_NAME = re.compile(r"estratégia '(.*)'$")
+DIVIDEND_YIELD = re.compile(r"dividend yield de (-?[\d.]+)%")
+
+alerts = sa.table(
+    "alerts",
+    sa.column("id", sa.Integer),
+    sa.column("alert_type", sa.String),
+    sa.column("title", sa.String),
+    sa.column("message", sa.Text),
+    sa.column("stock_ticker", sa.String),
+    sa.column("stock_name", sa.String),
+    sa.column("current_price", sa.String),
+    sa.column("score", sa.String),
+    sa.column("template_id", sa.String),
+    sa.column("params", sa.JSON(none_as_null=True)),
+    sa.column("dividend_yield", sa.Float),
+    sa.column("price_value", sa.Float),
+    sa.column("score_value", sa.Float),
+)
+
+
+def _parse_float(value, prefix: str = ""):
+    if value is None:
+        return None
+    try:
+        return float(value.replace(prefix, "").strip())
+    except ValueError:
+        return None
+
+
+def _backfill_row(row) -> dict:
+    """
+    Extrai template e parâmetros de um alerta já renderizado.
+
+    O texto só é descartado quando o template reproduz exatamente o título e a
+    mensagem originais; caso contrário o alerta continua com o texto gravado.
+    """
+    price = _parse_float(row.current_price, "R$")
+    score = _parse_float(row.score)
+    values = {
+        "_id": row.id,
+        "template_id": None,
+        "params": None,
+        "dividend_yield": None,
+        "price_value": price,
+        "score_value": score,
+        "title": row.title,
+        "message": row.message,
+    }
+
+    template_id = TEMPLATE_BY_TYPE.get(row.alert_type)
+    if template_id is None:
+        return values
+
+    params = None
+    if template_id == "strategy_match":
+        match = STRATEGY_NAME.search(row.title or "")
+        if not match:
+            return values
+        params = {"strategy_name": match.group(1)}
+
+    match = DIVIDEND_YIELD.search(row.message or "")
+    dividend_yield = float(match.group(1)) if match else None
+
+    try:
+        title, message = render_alert(template_id, params, row.stock_ticker, row.stock_name, price, score, dividend_yield)
+    except (KeyError, ValueError):
+        return values
+
+    if (title, message) == (row.title, row.message):
+        values.update({
+            "template_id": template_id,
+            "params": params,
+            "dividend_yield": dividend_yield,
+            "title": None,
+            "message": None,
+        })
+
+    return values
+
+
+def upgrade() -> None:
+    # Bancos criados por Base.metadata.create_all já estão no formato novo
+    if not op.get_context().as_sql:
+        columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("alerts")}
+        if "template_id" in columns:
+            return
+
+    op.add_column("alerts", sa.Column("template_id", sa.String(32), nullable=True))
+    op.add_column("alerts", sa.Column("params", sa.JSON(none_as_null=True), nullable=True))
+    op.add_column("alerts", sa.Column("dividend_yield", sa.Float, nullable=True))
+    op.add_column("alerts", sa.Column("price_value", sa.Float, nullable=True))
+    op.add_column("alerts", sa.Column("score_value", sa.Float, nullable=True))
+
+    # Alertas com template deixam de guardar o texto renderizado
+    with op.batch_alter_table("alerts") as batch:
+        batch.alter_column("title", existing_type=sa.String(200), nullable=True)
+        batch.alter_column("message", existing_type=sa.Text, nullable=True)
+
+    if not op.get_context().as_sql:
+        connection = op.get_bind()
+        update = alerts.update().where(alerts.c.id == sa.bindparam("_id")).values(
+            template_id=sa.bindparam("template_id"),
+            params=sa.bindparam("params"),
+            dividend_yield=sa.bindparam("dividend_yield"),
+            price_value=sa.bindparam("price_value"),
+            score_value=sa.bindparam("score_value"),
+            title=sa.bindparam("title"),
+            message=sa.bindparam("message"),
+        )
+
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                sa.select(
+                    alerts.c.id, alerts.c.alert_type, alerts.c.title, alerts.c.message,
+                    alerts.c.stock_ticker, alerts.c.stock_name, alerts.c.current_price, alerts.c.score
+                ).where(alerts.c.id > last_id).order_by(alerts.c.id).limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+
+            connection.execute(update, [_backfill_row(row) for row in rows])
+            last_id = rows[-1].id
+
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("current_price")
+        batch.drop_column("score")
+        batch.alter_column("price_value", new_column_name="current_price", existing_type=sa.Float)
+        batch.alter_column("score_value", new_column_name="score", existing_type=sa.Float)
+
+
+def downgrade() -> None:
+    op.add_column("alerts", sa.Column("price_text", sa.String(20), nullable=True))
+    op.add_column("alerts", sa.Column("score_text", sa.String(10), nullable=True))
+
+    if not op.get_context().as_sql:
+        connection = op.get_bind()
+        current = sa.table(
+            "alerts",
+            sa.column("id", sa.Integer),
+            sa.column("template_id", sa.String),
+            sa.column("params", sa.JSON(none_as_null=True)),
+            sa.column("title", sa.String),
+            sa.column("message", sa.Text),
+            sa.column("stock_ticker", sa.String),
+            sa.column("stock_name", sa.String),
+            sa.column("current_price", sa.Float),
+            sa.column("score", sa.Float),
+            sa.column("dividend_yield", sa.Float),
+            sa.column("price_text", sa.String),
+            sa.column("score_text", sa.String),
+        )
+        update = current.update().where(current.c.id == sa.bindparam("_id")).values(
+            title=sa.bindparam("title"),
+            message=sa.bindparam("message"),
+            price_text=sa.bindparam("price_text"),
+            score_text=sa.bindparam("score_text"),
+        )
+
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                sa.select(current).where(current.c.id > last_id).order_by(current.c.id).limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+
+            values = []
+            for row in rows:
+                title, message = row.title, row.message
+                if row.template_id:
+                    title, message = render_alert(
+                        row.template_id, row.params, row.stock_ticker, row.stock_name,
+                        row.current_price, row.score, row.dividend_yield
+                    )
+                values.append({
+                    "_id": row.id,
+                    "title": title,
+                    "message": message,
+                    "price_text": format_price(row.current_price),
+                    "score_text": format_score(row.score),
+                })
+
+            connection.execute(update, values)
+            last_id = rows[-1].id
+
+    with op.batch_alter_table("alerts") as batch:
+        batch.drop_column("current_price")
+        batch.drop_column("score")
+        batch.drop_column("dividend_yield")
+        batch.drop_column("params")
+        batch.drop_column("template_id")
+        batch.alter_column("price_text", new_column_name="current_price", existing_type=sa.String(20))
+        batch.alter_column("score_text", new_column_name="score", existing_type=sa.String(10))
+        batch.alter_column("title", existing_type=sa.String(200), nullable=False)
+        batch.alter_column("message", existing_type=sa.Text, nullable=False)
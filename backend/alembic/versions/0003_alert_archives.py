@@ -0,0 +1,51 @@
+"""Arquivo de alertas antigos (separação quente/fria)
+
+Revision ID: 0003_alert_archives
+Revises: 0002_alert_templates
+Create Date: 2026-10-17 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_alert_archives'
+down_revision: Union[str, None] = '0002_alert_templates'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bancos criados por Base.metadata.create_all já podem ter a tabela e o índice
+    if op.get_context().as_sql:
+        tables, indexes = set(), set()
+    else:
+        inspector = sa.inspect(op.get_bind())
+        tables = set(inspector.get_table_names())
+        indexes = {index["name"] for index in inspector.get_indexes("alerts")}
+
+    if "ix_alerts_status_created" not in indexes:
+        op.create_index("ix_alerts_status_created", "alerts", ["status", "created_at"])
+
+    if "alert_archives" not in tables:
+        op.create_table(
+            "alert_archives",
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("period", sa.String(7), nullable=False),
+            sa.Column("alert_count", sa.Integer, nullable=False),
+            sa.Column("payload", sa.LargeBinary, nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_alert_archives_id", "alert_archives", ["id"])
+        op.create_index("ix_alert_archives_user_period", "alert_archives", ["user_id", "period"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_archives_user_period", table_name="alert_archives")
+    op.drop_index("ix_alert_archives_id", table_name="alert_archives")
+    op.drop_table("alert_archives")
+    op.drop_index("ix_alerts_status_created", table_name="alerts")
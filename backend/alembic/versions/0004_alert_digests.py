@@ -0,0 +1,43 @@
+"""Resumo de alertas por coleta (DAILY_DIGEST)
+
+Revision ID: 0004_alert_digests
+Revises: 0003_alert_archives
+Create Date: 2026-10-17 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_alert_digests'
+down_revision: Union[str, None] = '0003_alert_archives'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # alert_type é gravado pelo nome do enum; no Postgres o tipo nativo precisa do valor novo
+    if op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE alerttype ADD VALUE IF NOT EXISTS 'DAILY_DIGEST'")
+
+    # Bancos criados por Base.metadata.create_all já podem ter a coluna
+    if not op.get_context().as_sql:
+        columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+        if "alert_digest_enabled" in columns:
+            return
+
+    op.add_column(
+        "users",
+        sa.Column("alert_digest_enabled", sa.Boolean, nullable=True, server_default=sa.false())
+    )
+
+
+def downgrade() -> None:
+    # Versões anteriores não conhecem o tipo (o valor do enum no Postgres é mantido)
+    op.execute("DELETE FROM alerts WHERE alert_type = 'DAILY_DIGEST'")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("alert_digest_enabled")
@@ -0,0 +1,69 @@
+"""Execuções da coleta em shards e checkpoints por ação
+
+Revision ID: 0005_etl_checkpoints
+Revises: 0004_alert_digests
+Create Date: 2026-10-17 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_etl_checkpoints'
+down_revision: Union[str, None] = '0004_alert_digests'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enums gravados pelo nome, como nos modelos
+run_status = sa.Enum("RUNNING", "FINISHED", name="etlrunstatus")
+checkpoint_status = sa.Enum("PENDING", "IN_PROGRESS", "DONE", "FAILED", name="etlcheckpointstatus")
+
+
+def upgrade() -> None:
+    # Bancos criados por Base.metadata.create_all já podem ter as tabelas
+    if not op.get_context().as_sql and "etl_runs" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "etl_runs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("status", run_status, nullable=False),
+        sa.Column("total_tickers", sa.Integer, nullable=False),
+        sa.Column("shard_count", sa.Integer, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_etl_runs_id", "etl_runs", ["id"])
+    op.create_index(
+        "ix_etl_runs_single_running", "etl_runs", ["status"], unique=True,
+        postgresql_where=sa.text("status = 'RUNNING'"),
+        sqlite_where=sa.text("status = 'RUNNING'")
+    )
+
+    op.create_table(
+        "etl_checkpoints",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("run_id", sa.Integer, sa.ForeignKey("etl_runs.id"), nullable=False),
+        sa.Column("shard", sa.Integer, nullable=False),
+        sa.Column("ticker", sa.String(20), nullable=False),
+        sa.Column("status", checkpoint_status, nullable=False),
+        sa.Column("attempts", sa.Integer, nullable=False),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("lease_id", sa.String(32), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_etl_checkpoints_id", "etl_checkpoints", ["id"])
+    op.create_index("ix_etl_checkpoints_run_shard_status", "etl_checkpoints", ["run_id", "shard", "status"])
+    op.create_index("ix_etl_checkpoints_run_ticker", "etl_checkpoints", ["run_id", "ticker"], unique=True)
+    op.create_index("ix_etl_checkpoints_lease", "etl_checkpoints", ["lease_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("etl_checkpoints")
+    op.drop_table("etl_runs")
+    checkpoint_status.drop(op.get_bind(), checkfirst=True)
+    run_status.drop(op.get_bind(), checkfirst=True)
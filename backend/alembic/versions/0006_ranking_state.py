@@ -0,0 +1,36 @@
+"""Versão do universo pontuado usada pelos rankings
+
+Revision ID: 0006_ranking_state
+Revises: 0005_etl_checkpoints
+Create Date: 2026-10-18 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_ranking_state'
+down_revision: Union[str, None] = '0005_etl_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bancos criados por Base.metadata.create_all já podem ter a tabela
+    if not op.get_context().as_sql and "ranking_state" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    ranking_state = op.create_table(
+        "ranking_state",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("universe_version", sa.Integer, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.bulk_insert(ranking_state, [{"id": 1, "universe_version": 0}])
+
+
+def downgrade() -> None:
+    op.drop_table("ranking_state")
@@ -0,0 +1,48 @@
+"""Ranking materializado por arquétipo
+
+Revision ID: 0007_archetype_rankings
+Revises: 0006_ranking_state
+Create Date: 2026-10-18 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_archetype_rankings'
+down_revision: Union[str, None] = '0006_ranking_state'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Gravado pelo nome, como no modelo; no Postgres o tipo já existe (users.investor_archetype)
+investor_archetype = postgresql.ENUM(
+    "CONSTRUTOR_RENDA", "CACADOR_VALOR", "SOCIO_PACIENTE", name="investorarchetype", create_type=False
+)
+
+
+def upgrade() -> None:
+    # Bancos criados por Base.metadata.create_all já podem ter a tabela
+    if not op.get_context().as_sql and "archetype_rankings" in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table(
+        "archetype_rankings",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("archetype", investor_archetype, nullable=False),
+        sa.Column("rank", sa.Integer, nullable=False),
+        sa.Column("stock_id", sa.Integer, sa.ForeignKey("stocks.id"), nullable=False),
+        sa.Column("final_score", sa.Float, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_archetype_rankings_id", "archetype_rankings", ["id"])
+    op.create_index("ix_archetype_rankings_archetype_rank", "archetype_rankings", ["archetype", "rank"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_archetype_rankings_archetype_rank", table_name="archetype_rankings")
+    op.drop_index("ix_archetype_rankings_id", table_name="archetype_rankings")
+    op.drop_table("archetype_rankings")
@@ -1,33 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
-from app.core.database import get_db
+import asyncio
+import json
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
 from app.models.user import User
 from app.models.alert import Alert, AlertType, AlertStatus
 from app.schemas.alert import AlertResponse, AlertUpdate, AlertSummary
 from app.api.auth import get_current_user
+from app.core.pagination import encode_cursor, decode_cursor
 from app.services.alert_service import AlertService
+from app.services.alert_counters import alert_counters, summarize_counts, UNREAD_STATUSES
+from app.services.alert_stream import alert_broker
+from app.services.alert_retention import AlertRetentionService
 
 router = APIRouter()
 
+def alert_list_query(
+    db: Session,
+    user_id: int,
+    status: Optional[AlertStatus] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    after: Optional[Tuple[datetime, int]] = None
+):
+    """
+    Consulta da listagem de alertas na ordem dos índices (user_id[, status], created_at, id).
+
+    after é a posição (created_at, id) do último alerta da página anterior.
+    """
+    query = db.query(Alert).filter(Alert.user_id == user_id)
+    
+    if status:
+        query = query.filter(Alert.status == status)
+    
+    if min_score is not None:
+        query = query.filter(Alert.score >= min_score)
+    if max_score is not None:
+        query = query.filter(Alert.score <= max_score)
+    
+    if after:
+        query = query.filter(tuple_(Alert.created_at, Alert.id) < tuple_(*after))
+    
+    return query.order_by(Alert.created_at.desc(), Alert.id.desc())
+
 @router.get("/alerts", response_model=List[AlertResponse])
 async def get_user_alerts(
+    response: Response,
     status: Optional[AlertStatus] = Query(None),
     limit: int = Query(50, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Valor do header X-Next-Cursor da página anterior"),
+    min_score: Optional[float] = Query(None, ge=0, le=10),
+    max_score: Optional[float] = Query(None, ge=0, le=10),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Lista os alertas do usuário
+    Lista os alertas do usuário.
+
+    A próxima página é indicada no header X-Next-Cursor; com cursor a consulta
+    continua pelo índice (user_id, created_at, id) em vez de pular linhas com offset.
     """
-    query = db.query(Alert).filter(Alert.user_id == current_user.id)
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail="Cursor inválido"
+            )
     
-    if status:
-        query = query.filter(Alert.status == status)
+    query = alert_list_query(db, current_user.id, status, min_score, max_score, after)
+    
+    if not after and offset:
+        # Mantido por compatibilidade; páginas profundas devem usar o cursor
+        query = query.offset(offset)
     
-    alerts = query.order_by(Alert.created_at.desc()).offset(offset).limit(limit).all()
+    # Uma linha a mais indica se existe próxima página
+    alerts = query.limit(limit + 1).all()
+    
+    if len(alerts) > limit:
+        alerts = alerts[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(alerts[-1].created_at, alerts[-1].id)
     
     return alerts
 
@@ -39,27 +99,46 @@ async def get_alerts_summary(
     """
     Obtém resumo dos alertas do usuário
     """
-    total_alerts = db.query(Alert).filter(Alert.user_id == current_user.id).count()
-    unread_alerts = db.query(Alert).filter(
-        Alert.user_id == current_user.id,
-        Alert.status.in_([AlertStatus.PENDING, AlertStatus.SENT])
-    ).count()
-    pending_alerts = db.query(Alert).filter(
-        Alert.user_id == current_user.id,
-        Alert.status == AlertStatus.PENDING
-    ).count()
+    # Contagem por status em uma única consulta agrupada (também renova o cache)
+    counts = summarize_counts(alert_counters.load_counts(db, current_user.id))
     
     recent_alerts = db.query(Alert).filter(
         Alert.user_id == current_user.id
     ).order_by(Alert.created_at.desc()).limit(5).all()
     
     return AlertSummary(
-        total_alerts=total_alerts,
-        unread_alerts=unread_alerts,
-        pending_alerts=pending_alerts,
+        total_alerts=counts["total_alerts"],
+        unread_alerts=counts["unread_alerts"],
+        pending_alerts=counts["pending_alerts"],
         recent_alerts=recent_alerts
     )
 
+@router.get("/alerts/unread-count")
+async def get_unread_count(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtém o número de alertas não lidos
+    """
+    # Servido pelo cache de contadores (o banco só é consultado quando o cache expira)
+    counts = summarize_counts(alert_counters.get_counts(db, current_user.id))
+    
+    return {"unread_count": counts["unread_alerts"]}
+
+@router.get("/alerts/archive", response_model=List[AlertResponse])
+async def get_archived_alerts(
+    period: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="Mês de criação dos alertas (AAAA-MM)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Lista os alertas arquivados do usuário em um mês (lidos ou descartados fora do prazo de retenção)
+    """
+    alerts = AlertRetentionService(db).get_archived_alerts(current_user.id, period)
+    
+    return [{**alert, "user_id": current_user.id} for alert in alerts]
+
 @router.get("/alerts/{alert_id}", response_model=AlertResponse)
 async def get_alert(
     alert_id: int,
@@ -103,6 +182,8 @@ async def update_alert(
             detail="Alerta não encontrado"
         )
     
+    old_status = alert.status
+    
     if alert_data.status:
         alert.status = alert_data.status
         
@@ -114,6 +195,8 @@ async def update_alert(
     db.commit()
     db.refresh(alert)
     
+    alert_counters.record_transition(current_user.id, old_status, alert.status)
+    
     return alert
 
 @router.delete("/alerts/{alert_id}")
@@ -136,9 +219,13 @@ async def delete_alert(
             detail="Alerta não encontrado"
         )
     
+    status = alert.status
+    
     db.delete(alert)
     db.commit()
     
+    alert_counters.record_deleted(current_user.id, status)
+    
     return {"message": "Alerta excluído com sucesso"}
 
 @router.post("/alerts/mark-all-read")
@@ -149,9 +236,9 @@ async def mark_all_alerts_read(
     """
     Marca todos os alertas como lidos
     """
-    db.query(Alert).filter(
+    updated = db.query(Alert).filter(
         Alert.user_id == current_user.id,
-        Alert.status.in_([AlertStatus.PENDING, AlertStatus.SENT])
+        Alert.status.in_(UNREAD_STATUSES)
     ).update({
         "status": AlertStatus.READ,
         "read_at": datetime.now()
@@ -159,22 +246,9 @@ async def mark_all_alerts_read(
     
     db.commit()
     
-    return {"message": "Todos os alertas foram marcados como lidos"}
-
-@router.get("/alerts/unread-count")
-async def get_unread_count(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Obtém o número de alertas não lidos
-    """
-    count = db.query(Alert).filter(
-        Alert.user_id == current_user.id,
-        Alert.status.in_([AlertStatus.PENDING, AlertStatus.SENT])
-    ).count()
+    alert_counters.record_all_read(current_user.id, updated)
     
-    return {"unread_count": count}
+    return {"message": "Todos os alertas foram marcados como lidos"}
 
 @router.post("/alerts/generate")
 async def generate_alerts(
@@ -190,5 +264,46 @@ async def generate_alerts(
     return {
         "message": f"{len(new_alerts)} novos alertas gerados",
         "alerts_created": len(new_alerts),
-        "alerts": new_alerts
+        "alerts": [AlertResponse.model_validate(alert) for alert in new_alerts]
     }
+
+@router.get("/stream")
+async def stream_alerts(
+    request: Request,
+    token: str = Query(..., description="Token JWT (EventSource não envia headers de autorização)")
+):
+    """
+    Stream (Server-Sent Events) com os novos alertas do usuário em tempo real
+    """
+    # Sessão curta só para autenticar: a conexão fica aberta sem prender o pool do banco
+    db = SessionLocal()
+    try:
+        current_user = await get_current_user(token, db)
+        counts = summarize_counts(alert_counters.get_counts(db, current_user.id))
+    finally:
+        db.close()
+    
+    user_id = current_user.id
+    
+    async def event_stream():
+        async with alert_broker.subscribe(user_id) as queue:
+            yield format_sse("unread_count", {"unread_count": counts["unread_alerts"]})
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.alert_stream_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    # Comentário SSE mantém proxies e o navegador com a conexão viva
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                yield format_sse(event["event"], event["data"])
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
 from app.models.user import User
 from app.models.stock import Stock
 from app.api.auth import get_current_user
 from app.etl.data_collector import DataCollector
 from app.etl.data_processor import DataProcessor
+from app.etl.pipeline import collect_and_store, finish_collection
+from app.etl.universe import discover_tickers
+from app.etl.tasks import start_collection_run
+from app.core.config import settings
+from app.models.etl_checkpoint import EtlRun, EtlCheckpoint
 
 router = APIRouter()
 
@@ -32,9 +38,24 @@ async def collect_stock_data(
                 detail="Dados não encontrados para esta ação"
             )
         
+        # Páginas idênticas às da última coleta: dados no banco já estão atualizados
+        if stock_data.get('is_unchanged') and db.query(Stock.id).filter(Stock.ticker == ticker.upper()).first():
+            await collector.close()
+            return {"message": f"Dados de {ticker.upper()} sem alterações desde a última coleta"}
+        
         # Processar e salvar dados
         processor = DataProcessor(db)
-        await processor.process_stock_data(stock_data)
+        try:
+            stock = await processor.process_stock_data(stock_data)
+        except Exception:
+            collector.forget(ticker.upper())
+            raise
+        
+        # Atualizar apenas os percentis afetados por esta ação
+        await processor.update_scores_incrementally(stock)
+        
+        # Alertas apenas se a ação cruzou algum limiar
+        processor.dispatch_alert_events()
         
         await collector.close()
         
@@ -54,16 +75,19 @@ async def collect_all_stocks(
     db: Session = Depends(get_db)
 ):
     """
-    Inicia coleta de dados para todas as ações (tarefa em background)
+    Inicia coleta de dados para todas as ações (workers Celery ou tarefa em background)
     """
-    # Lista de ações para coletar (implementar lista completa)
-    tickers = [
-        "PETR4", "VALE3", "ITUB4", "BBDC4", "ABEV3", "WEGE3", "MGLU3", "SUZB3", "RENT3", "LREN3"
-    ]
+    if settings.etl_use_celery:
+        # Retoma a execução interrompida, se houver, ou descobre o universo e divide em shards
+        task = start_collection_run.delay()
+        return {"message": "Coleta de dados iniciada nos workers", "task_id": task.id}
+    
+    # Universo completo de ações (CSV configurado ou listagem do Fundamentus)
+    tickers = await discover_tickers(db)
     
     background_tasks.add_task(collect_all_stocks_task, tickers, db)
     
-    return {"message": "Coleta de dados iniciada em background"}
+    return {"message": f"Coleta de dados iniciada em background ({len(tickers)} ações)"}
 
 @router.get("/etl-status")
 async def get_etl_status(
@@ -85,7 +109,8 @@ async def get_etl_status(
         "total_stocks": total_stocks,
         "qualified_stocks": qualified_stocks,
         "last_update": last_update_time,
-        "data_quality": calculate_data_quality(db)
+        "data_quality": calculate_data_quality(db),
+        "collection_run": get_collection_run_status(db)
     }
 
 async def collect_all_stocks_task(tickers: List[str], db: Session):
@@ -96,14 +121,8 @@ async def collect_all_stocks_task(tickers: List[str], db: Session):
     processor = DataProcessor(db)
     
     try:
-        for ticker in tickers:
-            try:
-                stock_data = await collector.collect_stock_data(ticker)
-                if stock_data:
-                    await processor.process_stock_data(stock_data)
-            except Exception as e:
-                print(f"Erro ao coletar {ticker}: {str(e)}")
-                continue
+        await collect_and_store(db, collector, processor, tickers)
+        await finish_collection(db, processor)
         
         await collector.close()
         
@@ -111,6 +130,28 @@ async def collect_all_stocks_task(tickers: List[str], db: Session):
         print(f"Erro na coleta em background: {str(e)}")
         await collector.close()
 
+def get_collection_run_status(db: Session) -> Optional[dict]:
+    """
+    Progresso da última coleta em shards (contagem de ações por status do checkpoint)
+    """
+    run = db.query(EtlRun).order_by(EtlRun.id.desc()).first()
+    if run is None:
+        return None
+    
+    counts = db.query(EtlCheckpoint.status, func.count(EtlCheckpoint.id)).filter(
+        EtlCheckpoint.run_id == run.id
+    ).group_by(EtlCheckpoint.status)
+    
+    return {
+        "id": run.id,
+        "status": run.status.value,
+        "total_tickers": run.total_tickers,
+        "shard_count": run.shard_count,
+        "progress": {status.value: count for status, count in counts},
+        "created_at": run.created_at,
+        "finished_at": run.finished_at
+    }
+
 def calculate_data_quality(db: Session) -> dict:
     """
     Calcula métricas de qualidade dos dados
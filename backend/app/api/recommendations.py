@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 from datetime import datetime
 from app.core.database import get_db
-from app.models.user import User
+from app.models.user import User, InvestorArchetype
 from app.models.stock import Stock
+from app.models.ranking import ArchetypeRanking
 from app.schemas.stock import RecommendationRequest, RecommendationResponse, StockAnalysis
 from app.api.auth import get_current_user
 from app.services.scoring_engine import ScoringEngine
@@ -27,32 +28,12 @@ async def generate_recommendations(
             detail="Perfil de investidor não configurado. Complete o DNA Financeiro primeiro."
         )
     
-    # Buscar todas as ações qualificadas
-    stocks = db.query(Stock).filter(Stock.is_qualified == True).all()
-    
-    if not stocks:
-        raise HTTPException(
-            status_code=404,
-            detail="Nenhuma ação qualificada encontrada no sistema"
-        )
+    # Consultar o ranking materializado ao final do ETL
+    top_recommendations = get_ranked_recommendations(db, current_user.investor_archetype, request.limit)
     
-    # Aplicar motor de scoring
-    scoring_engine = ScoringEngine(db)
-    
-    # Aplicar filtros de qualidade
-    qualified_stocks = scoring_engine.apply_gross_filter(stocks)
-    
-    # Calcular notas
-    scored_stocks = scoring_engine.calculate_scores(qualified_stocks)
-    
-    # Aplicar ponderação dinâmica
-    final_stocks = scoring_engine.calculate_final_scores(scored_stocks, current_user.investor_archetype)
-    
-    # Aplicar bônus de diversificação (implementar lógica de portfólio)
-    # final_stocks = scoring_engine.apply_diversification_bonus(final_stocks, user_portfolio)
-    
-    # Obter top recomendações
-    top_recommendations = scoring_engine.get_top_recommendations(final_stocks, request.limit)
+    if not top_recommendations:
+        # Ranking ainda não materializado: calcular na hora
+        top_recommendations = calculate_recommendations(db, current_user.investor_archetype, request.limit)
     
     # Criar análises detalhadas
     analyses = []
@@ -99,6 +80,55 @@ async def get_stock_analysis(
     
     return analysis
 
+def get_ranked_recommendations(db: Session, archetype: InvestorArchetype, limit: int) -> List[Stock]:
+    """
+    Top N do ranking pré-calculado para o arquétipo (consulta indexada por arquétipo e posição)
+    """
+    rankings = db.query(ArchetypeRanking).options(
+        joinedload(ArchetypeRanking.stock)
+    ).filter(
+        ArchetypeRanking.archetype == archetype
+    ).order_by(ArchetypeRanking.rank).limit(limit).all()
+    
+    top_recommendations = []
+    for ranking in rankings:
+        stock = ranking.stock
+        stock.final_score = ranking.final_score
+        top_recommendations.append(stock)
+    
+    return top_recommendations
+
+def calculate_recommendations(db: Session, archetype: InvestorArchetype, limit: int) -> List[Stock]:
+    """
+    Calcula as recomendações sobre todas as ações qualificadas (sem ranking materializado)
+    """
+    # Buscar todas as ações qualificadas
+    stocks = db.query(Stock).filter(Stock.is_qualified == True).all()
+    
+    if not stocks:
+        raise HTTPException(
+            status_code=404,
+            detail="Nenhuma ação qualificada encontrada no sistema"
+        )
+    
+    # Aplicar motor de scoring
+    scoring_engine = ScoringEngine(db)
+    
+    # Aplicar filtros de qualidade
+    qualified_stocks = scoring_engine.apply_gross_filter(stocks)
+    
+    # Calcular notas
+    scored_stocks = scoring_engine.calculate_scores(qualified_stocks)
+    
+    # Aplicar ponderação dinâmica
+    final_stocks = scoring_engine.calculate_final_scores(scored_stocks, archetype)
+    
+    # Aplicar bônus de diversificação (implementar lógica de portfólio)
+    # final_stocks = scoring_engine.apply_diversification_bonus(final_stocks, user_portfolio)
+    
+    # Obter top recomendações
+    return scoring_engine.get_top_recommendations(final_stocks, limit)
+
 def create_masters_checklist(stock: Stock) -> dict:
     """
     Cria o Checklist dos Mestres para uma ação
@@ -11,10 +11,15 @@ from app.schemas.strategy import (
     UserStrategyResponse,
     StrategyFilterCreate,
     StrategyRecommendationRequest,
-    StrategyRecommendationResponse
+    StrategyRecommendationResponse,
+    StrategyPreviewRequest,
+    StrategyPreviewResponse
 )
 from app.api.auth import get_current_user
 from app.services.scoring_engine import ScoringEngine
+from app.services.stock_universe import get_stock_universe
+from app.services.strategy_compiler import strategy_compiler
+from app.services.screener_index import get_screener_index
 from app.models.stock import Stock
 
 router = APIRouter()
@@ -68,6 +73,20 @@ async def create_strategy(
     
     return strategy
 
+@router.post("/strategies/preview", response_model=StrategyPreviewResponse)
+async def preview_strategy(
+    preview_data: StrategyPreviewRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Conta quantas ações passam nos filtros (no total e em cada filtro isolado) sem salvar a estratégia
+    """
+    universe = get_stock_universe(db)
+    index = get_screener_index(universe)
+    
+    return index.preview(preview_data.filters)
+
 @router.get("/strategies", response_model=List[UserStrategyResponse])
 async def get_user_strategies(
     current_user: User = Depends(get_current_user),
@@ -157,6 +176,9 @@ async def update_strategy(
     db.commit()
     db.refresh(strategy)
     
+    # Descartar a versão compilada anterior dos filtros
+    strategy_compiler.invalidate(strategy.id)
+    
     return strategy
 
 @router.delete("/strategies/{strategy_id}")
@@ -209,18 +231,26 @@ async def get_strategy_recommendations(
             detail="Estratégia não encontrada"
         )
     
-    # Buscar todas as ações
-    stocks = db.query(Stock).all()
+    scoring_engine = ScoringEngine(db)
     
-    if not stocks:
-        raise HTTPException(
-            status_code=404,
-            detail="Nenhuma ação encontrada no sistema"
-        )
+    # Aplicar a estratégia direto no banco (SELECT só com as ações aprovadas)
+    query = scoring_engine.query_custom_strategy(strategy)
     
-    # Aplicar a estratégia personalizada
-    scoring_engine = ScoringEngine(db)
-    qualified_stocks = scoring_engine.apply_custom_strategy(stocks, strategy)
+    if query is not None:
+        qualified_stocks = query.all()
+    else:
+        # Filtros sem tradução para SQL: avaliar no snapshot colunar
+        universe = get_stock_universe(db)
+        
+        if len(universe) == 0:
+            raise HTTPException(
+                status_code=404,
+                detail="Nenhuma ação encontrada no sistema"
+            )
+        
+        mask = scoring_engine.match_custom_strategy(universe, strategy)
+        matched_ids = universe.ids[mask].tolist()
+        qualified_stocks = db.query(Stock).filter(Stock.id.in_(matched_ids)).order_by(Stock.id).all() if matched_ids else []
     
     if not qualified_stocks:
         raise HTTPException(
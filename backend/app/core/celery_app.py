@@ -0,0 +1,40 @@
+from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init
+from app.core.config import settings
+
+celery_app = Celery(
+    "copiloto_financeiro",
+    broker=settings.redis_url,
+    backend=settings.redis_url,
+    include=["app.etl.tasks"]
+)
+
+celery_app.conf.update(
+    timezone="America/Sao_Paulo",
+    # Shard só sai da fila depois de concluído: worker que cai devolve o shard
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    result_expires=86400,
+    beat_schedule={
+        "coleta-diaria": {
+            "task": "etl.start_collection_run",
+            "schedule": crontab(hour=settings.etl_schedule_hour, minute=0),
+        }
+    }
+)
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Ajustes de cada processo do worker (prefork)
+    """
+    from app.core.database import engine
+
+    # Conexões herdadas do processo pai não podem ser compartilhadas
+    engine.dispose(close=False)
+
+    # Processos do prefork são daemon e não podem criar o pool de parsing em processos
+    if settings.etl_parse_executor == "process":
+        settings.etl_parse_executor = "thread"
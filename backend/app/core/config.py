@@ -15,10 +15,53 @@ class Settings(BaseSettings):
     
     # ETL
     etl_schedule_hour: int = 18  # 18:00 para atualização diária
+    etl_max_concurrency: int = 32  # ações coletadas ao mesmo tempo
+    etl_per_host_concurrency: int = 8  # requisições simultâneas por fonte de dados
+    etl_http_timeout_seconds: float = 30.0
+    etl_request_deadline_seconds: float = 10.0  # prazo de cada tentativa (inclui espera do limitador de taxa)
+    etl_fetch_deadline_seconds: float = 30.0  # prazo total de uma página somando as tentativas
+    etl_retry_attempts: int = 3  # tentativas por página em falhas transitórias (timeout, 429, 5xx)
+    etl_retry_backoff_seconds: float = 0.5  # base do backoff exponencial com jitter
+    etl_retry_backoff_max_seconds: float = 8.0
+    etl_circuit_failure_threshold: int = 5  # falhas seguidas que abrem o circuito da fonte
+    etl_circuit_reset_seconds: float = 60.0  # tempo com o circuito aberto antes da requisição de teste
+    etl_http_max_connections: int = 32  # pool do cliente HTTP compartilhado
+    etl_http_max_keepalive: int = 16
+    etl_http_keepalive_seconds: float = 30.0
+    etl_http2: bool = True  # usado apenas se o pacote h2 estiver instalado
+    etl_cache_enabled: bool = True  # GET condicional e hash das páginas coletadas
+    etl_cache_dir: str = ".cache/etl"
+    etl_parse_executor: str = "process"  # "process", "thread" ou "inline" (no event loop)
+    etl_parse_workers: int = 0  # 0 = um por núcleo
+    etl_use_celery: bool = False  # coleta completa em shards nos workers Celery
+    etl_shard_size: int = 50  # ações por tarefa de coleta
+    etl_max_attempts: int = 3  # tentativas por ação antes de desistir na execução
+    etl_shard_lease_seconds: int = 1800  # prazo de um shard enfileirado/em coleta antes de ser retomado por outro
+    etl_tickers_csv: Optional[str] = None  # CSV local com o universo de ações (coluna "ticker")
+    etl_universe_url: str = "https://www.fundamentus.com.br/resultado.php"  # listagem usada sem CSV
+    etl_snapshots_enabled: bool = True  # histórico só de acréscimo dos dados consolidados de cada coleta
+    etl_snapshot_dir: str = "data/snapshots"
+    
+    # Snapshot em memória do universo de ações
+    stock_universe_check_seconds: int = 60  # intervalo para detectar mudanças feitas por outros workers
+    
+    # Alertas
+    alert_insert_chunk_size: int = 1000  # linhas por INSERT na gravação em lote
+    alert_counter_backend: str = "memory"  # "memory" (só um processo grava alertas) ou "redis" (API + workers Celery)
+    alert_counter_ttl_seconds: int = 300  # validade dos contadores de não lidos em cache
+    alert_stream_backend: str = "memory"  # "memory" (um worker) ou "redis" (vários workers)
+    alert_stream_queue_size: int = 100  # eventos pendentes por conexão antes de descartar
+    alert_stream_heartbeat_seconds: int = 15  # keep-alive das conexões SSE ociosas
+    alert_retention_days: int = 90  # alertas lidos/descartados mais antigos vão para alert_archives
+    alert_archive_batch_size: int = 5000  # alertas arquivados por transação
     
     # Fontes de dados
     status_invest_url: str = "https://statusinvest.com.br"
     fundamentus_url: str = "https://www.fundamentus.com.br"
+    status_invest_rate_per_second: float = 4.0  # token bucket por fonte (com ETL_USE_CELERY, total de todos os workers via Redis)
+    status_invest_burst: int = 8
+    fundamentus_rate_per_second: float = 4.0
+    fundamentus_burst: int = 8
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    Cursor opaco para paginação por chave (created_at, id)
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Inverso de encode_cursor; levanta ValueError para cursores inválidos
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Cursor inválido") from e
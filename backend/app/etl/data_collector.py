@@ -1,10 +1,15 @@
 import httpx
 import asyncio
-from typing import List, Dict, Any, Optional
-from bs4 import BeautifulSoup
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, Callable
 import pandas as pd
 from datetime import datetime
 import logging
+from app.core.config import settings
+from app.etl.http_client import get_http_client, rate_limiters
+from app.etl.response_cache import ResponseCache, content_hash
+from app.etl.parsers import parse_status_invest, parse_fundamentus
+from app.etl.parse_executor import run_parser
+from app.etl.resilience import call_with_resilience, CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
@@ -14,101 +19,140 @@ class DataCollector:
     """
     
     def __init__(self):
-        self.session = httpx.AsyncClient(timeout=30.0)
         self.sources = {
-            "status_invest": "https://statusinvest.com.br",
-            "fundamentus": "https://www.fundamentus.com.br"
+            "status_invest": settings.status_invest_url,
+            "fundamentus": settings.fundamentus_url
         }
+        # Limite de requisições simultâneas por fonte (não sobrecarregar os sites)
+        self.host_limits = {
+            source: asyncio.Semaphore(settings.etl_per_host_concurrency) for source in self.sources
+        }
+        # Páginas já baixadas (GET condicional e hash do conteúdo)
+        self.cache = ResponseCache(settings.etl_cache_dir) if settings.etl_cache_enabled else None
+    
+    @property
+    def session(self) -> httpx.AsyncClient:
+        """
+        Cliente HTTP compartilhado pelo processo (conexões reaproveitadas entre coletas)
+        """
+        return get_http_client()
     
     async def collect_stock_data(self, ticker: str) -> Dict[str, Any]:
         """
         Coleta dados de uma ação de múltiplas fontes
         """
         try:
-            # Coletar dados de ambas as fontes
-            status_data = await self._collect_from_status_invest(ticker)
-            fundamentus_data = await self._collect_from_fundamentus(ticker)
+            # Coletar dados de ambas as fontes em paralelo
+            status_data, fundamentus_data = await asyncio.gather(
+                self._collect_from_status_invest(ticker),
+                self._collect_from_fundamentus(ticker)
+            )
             
             # Validar e consolidar dados
             consolidated_data = self._consolidate_data(ticker, status_data, fundamentus_data)
             
+            # Nenhuma das páginas mudou desde a última coleta: nada a gravar
+            consolidated_data['is_unchanged'] = bool(
+                status_data.get('unchanged') and fundamentus_data.get('unchanged')
+            )
+            
             return consolidated_data
             
         except Exception as e:
             logger.error(f"Erro ao coletar dados para {ticker}: {str(e)}")
             return {}
     
+    async def collect_many(self, tickers: List[str], concurrency: Optional[int] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Coleta várias ações ao mesmo tempo e entrega (ticker, dados) na ordem em
+        que cada coleta termina.
+
+        No máximo concurrency ações ficam em andamento (etl_max_concurrency por
+        padrão) e cada fonte respeita o limite de etl_per_host_concurrency.
+        Encerrar o iterador antes do fim cancela as coletas pendentes.
+        """
+        limit = asyncio.Semaphore(concurrency or settings.etl_max_concurrency)
+        
+        async def collect(ticker: str) -> Tuple[str, Dict[str, Any]]:
+            async with limit:
+                return ticker, await self.collect_stock_data(ticker)
+        
+        tasks = [asyncio.create_task(collect(ticker)) for ticker in tickers]
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _get(self, source: str, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        GET respeitando a taxa (token bucket) e o limite de requisições simultâneas da fonte,
+        com novas tentativas, prazo e disjuntor por fonte
+        """
+        async def request() -> httpx.Response:
+            await rate_limiters[source].acquire()
+            async with self.host_limits[source]:
+                response = await self.session.get(url, headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
+        
+        return await call_with_resilience(source, request)
+    
+    async def _fetch(self, source: str, url: str, parse: Callable[[bytes], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Baixa e extrai uma página passando pelo cache em disco (a extração roda no pool de parsing).
+
+        O GET é condicional (ETag/Last-Modified da coleta anterior). Uma resposta
+        304, ou um corpo com o mesmo hash SHA-256, reaproveita os dados já
+        extraídos sem parsing e é marcada com 'unchanged'.
+        """
+        cached = self.cache.get(url) if self.cache else None
+        response = await self._get(source, url, cached.conditional_headers() if cached else None)
+        
+        if cached and response.status_code == 304:
+            self.cache.touch(cached, response.headers)
+            return {**cached.data, 'unchanged': True}
+        
+        digest = content_hash(response.content)
+        if cached and cached.content_hash == digest:
+            self.cache.touch(cached, response.headers)
+            return {**cached.data, 'unchanged': True}
+        
+        # Parsing é CPU-bound: roda no pool e não bloqueia as requisições da API
+        data = await run_parser(parse, response.content)
+        if self.cache:
+            self.cache.set(url, response.headers, response.content, data, digest)
+        return {**data, 'unchanged': False}
+    
+    def forget(self, ticker: str):
+        """
+        Descarta as páginas da ação no cache (a próxima coleta reprocessa tudo)
+        """
+        if self.cache:
+            self.cache.delete(self._status_invest_url(ticker))
+            self.cache.delete(self._fundamentus_url(ticker))
+    
+    def _status_invest_url(self, ticker: str) -> str:
+        return f"{self.sources['status_invest']}/acoes/{ticker.lower()}"
+    
+    def _fundamentus_url(self, ticker: str) -> str:
+        return f"{self.sources['fundamentus']}/detalhes.php?papel={ticker.upper()}"
+    
     async def _collect_from_status_invest(self, ticker: str) -> Dict[str, Any]:
         """
         Coleta dados do StatusInvest
         """
         try:
-            url = f"{self.sources['status_invest']}/acoes/{ticker.lower()}"
-            response = await self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extrair dados fundamentais
-            data = {}
-            
-            # Preço atual
-            price_element = soup.find('h3', class_='value')
-            if price_element:
-                data['current_price'] = self._parse_float(price_element.get_text())
-            
-            # P/L
-            pe_element = soup.find('div', string='P/L')
-            if pe_element and pe_element.parent:
-                pe_value = pe_element.parent.find('strong')
-                if pe_value:
-                    data['pe_ratio'] = self._parse_float(pe_value.get_text())
-            
-            # P/VPA
-            pb_element = soup.find('div', string='P/VPA')
-            if pb_element and pb_element.parent:
-                pb_value = pb_element.parent.find('strong')
-                if pb_value:
-                    data['pb_ratio'] = self._parse_float(pb_value.get_text())
-            
-            # Dividend Yield
-            dy_element = soup.find('div', string='Div. Yield')
-            if dy_element and dy_element.parent:
-                dy_value = dy_element.parent.find('strong')
-                if dy_value:
-                    data['dividend_yield'] = self._parse_float(dy_value.get_text())
-            
-            # ROE
-            roe_element = soup.find('div', string='ROE')
-            if roe_element and roe_element.parent:
-                roe_value = roe_element.parent.find('strong')
-                if roe_value:
-                    data['roe'] = self._parse_float(roe_value.get_text())
-            
-            # Margem Líquida
-            margin_element = soup.find('div', string='Marg. Líquida')
-            if margin_element and margin_element.parent:
-                margin_value = margin_element.parent.find('strong')
-                if margin_value:
-                    data['net_margin'] = self._parse_float(margin_value.get_text())
-            
-            # Dívida/EBITDA
-            debt_element = soup.find('div', string='Dív. Líq. / EBIT')
-            if debt_element and debt_element.parent:
-                debt_value = debt_element.parent.find('strong')
-                if debt_value:
-                    data['debt_to_ebitda'] = self._parse_float(debt_value.get_text())
-            
-            # Payout
-            payout_element = soup.find('div', string='Payout')
-            if payout_element and payout_element.parent:
-                payout_value = payout_element.parent.find('strong')
-                if payout_value:
-                    data['payout_ratio'] = self._parse_float(payout_value.get_text())
-            
-            data['source'] = 'status_invest'
-            return data
+            url = self._status_invest_url(ticker)
+            return await self._fetch("status_invest", url, parse_status_invest)
             
+        except CircuitOpenError:
+            # Fonte fora do ar: a ação segue só com a outra fonte
+            logger.debug(f"StatusInvest indisponível; {ticker} coletada sem esta fonte")
+            return {}
         except Exception as e:
             logger.error(f"Erro ao coletar dados do StatusInvest para {ticker}: {str(e)}")
             return {}
@@ -118,44 +162,13 @@ class DataCollector:
         Coleta dados do Fundamentus
         """
         try:
-            url = f"{self.sources['fundamentus']}/detalhes.php?papel={ticker.upper()}"
-            response = await self.session.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            data = {}
-            
-            # Procurar por tabelas com dados fundamentais
-            tables = soup.find_all('table')
-            
-            for table in tables:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        label = cells[0].get_text().strip()
-                        value = cells[1].get_text().strip()
-                        
-                        # Mapear labels para campos
-                        if 'P/L' in label:
-                            data['pe_ratio'] = self._parse_float(value)
-                        elif 'P/VP' in label:
-                            data['pb_ratio'] = self._parse_float(value)
-                        elif 'Div. Yield' in label:
-                            data['dividend_yield'] = self._parse_float(value)
-                        elif 'ROE' in label:
-                            data['roe'] = self._parse_float(value)
-                        elif 'Marg. Líquida' in label:
-                            data['net_margin'] = self._parse_float(value)
-                        elif 'Dív. Líq. / EBIT' in label:
-                            data['debt_to_ebitda'] = self._parse_float(value)
-                        elif 'Payout' in label:
-                            data['payout_ratio'] = self._parse_float(value)
-            
-            data['source'] = 'fundamentus'
-            return data
+            url = self._fundamentus_url(ticker)
+            return await self._fetch("fundamentus", url, parse_fundamentus)
             
+        except CircuitOpenError:
+            # Fonte fora do ar: a ação segue só com a outra fonte
+            logger.debug(f"Fundamentus indisponível; {ticker} coletada sem esta fonte")
+            return {}
         except Exception as e:
             logger.error(f"Erro ao coletar dados do Fundamentus para {ticker}: {str(e)}")
             return {}
@@ -218,24 +231,6 @@ class DataCollector:
         
         return consolidated
     
-    def _parse_float(self, value: str) -> Optional[float]:
-        """
-        Converte string para float, lidando com formatação brasileira
-        """
-        if not value or value == '-':
-            return None
-        
-        try:
-            # Remover caracteres não numéricos exceto vírgula e ponto
-            cleaned = value.replace('%', '').replace('R$', '').strip()
-            
-            # Substituir vírgula por ponto para conversão
-            cleaned = cleaned.replace(',', '.')
-            
-            return float(cleaned)
-        except (ValueError, TypeError):
-            return None
-    
     async def collect_dividend_history(self, ticker: str) -> List[Dict[str, Any]]:
         """
         Coleta histórico de dividendos
@@ -250,6 +245,6 @@ class DataCollector:
     
     async def close(self):
         """
-        Fecha a sessão HTTP
+        Mantido por compatibilidade: o cliente HTTP é do processo e fecha no desligamento da aplicação
         """
-        await self.session.aclose()
+        pass
@@ -1,8 +1,15 @@
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
 from datetime import datetime
 from app.models.stock import Stock
+from app.models.ranking import ArchetypeRanking, RankingState
+from app.models.user import InvestorArchetype
 from app.services.scoring_engine import ScoringEngine
+from app.services.incremental_scoring import get_incremental_scorer
+from app.services.stock_universe import invalidate_stock_universe, refresh_stock_universe
+from app.services.alert_events import AlertDispatcher, ThresholdCrossing, threshold_state, detect_threshold_crossings
 
 class DataProcessor:
     """
@@ -11,6 +18,8 @@ class DataProcessor:
     
     def __init__(self, db: Session):
         self.db = db
+        # Cruzamentos de limiar de alerta ainda não despachados
+        self.alert_events: List[ThresholdCrossing] = []
     
     async def process_stock_data(self, stock_data: Dict[str, Any]) -> Stock:
         """
@@ -25,8 +34,12 @@ class DataProcessor:
             stock = Stock(ticker=ticker)
             self.db.add(stock)
         
+        # Estado dos limiares de alerta antes da atualização
+        thresholds_before = threshold_state(stock)
+        
         # Atualizar dados básicos
-        stock.name = stock_data.get('name', stock.name)
+        # Ações novas do universo descoberto ainda sem nome: o ticker ocupa o campo obrigatório
+        stock.name = stock_data.get('name') or stock.name or ticker
         stock.sector = stock_data.get('sector', stock.sector)
         stock.subsector = stock_data.get('subsector', stock.subsector)
         stock.current_price = stock_data.get('current_price')
@@ -51,8 +64,21 @@ class DataProcessor:
         self.db.commit()
         self.db.refresh(stock)
         
+        # Snapshot em memória será reconstruído na próxima leitura
+        invalidate_stock_universe()
+        
+        # Emitir eventos para os limiares de alerta cruzados nesta gravação
+        self.alert_events.extend(detect_threshold_crossings(stock, thresholds_before))
+        
         return stock
     
+    def dispatch_alert_events(self) -> List[Dict[str, Any]]:
+        """
+        Gera os alertas dos cruzamentos de limiar acumulados desde o último despacho
+        """
+        events, self.alert_events = self.alert_events, []
+        return AlertDispatcher(self.db).dispatch(events)
+    
     def _calculate_derived_metrics(self, stock: Stock):
         """
         Calcula métricas derivadas que não são diretamente extraídas
@@ -121,10 +147,11 @@ class DataProcessor:
         """
         Recalcula scores para todas as ações qualificadas
         """
-        qualified_stocks = self.db.query(Stock).filter(Stock.is_qualified == True).all()
+        # Mesma ordem de bloqueio da atualização incremental: versão antes das notas
+        state = self._lock_ranking_state()
         
-        if not qualified_stocks:
-            return
+        # Universo vazio segue o mesmo caminho: rankings apagados, versão nova e commit (libera o bloqueio)
+        qualified_stocks = self.db.query(Stock).filter(Stock.is_qualified == True).order_by(Stock.id).all()
         
         # Aplicar motor de scoring
         scoring_engine = ScoringEngine(self.db)
@@ -136,7 +163,160 @@ class DataProcessor:
         for stock in scored_stocks:
             self.db.add(stock)
         
+        # Materializar o ranking dos três arquétipos na mesma transação
+        sub_scores = {
+            "value": [stock.value_score for stock in scored_stocks],
+            "income": [stock.income_score for stock in scored_stocks],
+            "quality": [stock.quality_score for stock in scored_stocks],
+        }
+        self._refresh_archetype_rankings(scoring_engine, [stock.id for stock in scored_stocks], sub_scores)
+        version = self._bump_ranking_version(state)
+        
+        # Reconstruir os índices ordenados usados nas atualizações incrementais
+        # (sem versão até o commit: ninguém usa índices de notas ainda não gravadas)
+        scorer = get_incremental_scorer()
+        with scorer.lock:
+            scorer.build(scored_stocks)
+        
         self.db.commit()
+        
+        with scorer.lock:
+            scorer.version = version
+        
+        # Publicar o novo snapshot colunar para as requisições deste processo
+        refresh_stock_universe(self.db)
+    
+    async def update_scores_incrementally(self, stock: Stock):
+        """
+        Atualiza as notas apenas das ações cujo percentil mudou com a alteração de uma única ação.
+
+        Cai para recalculate_all_scores quando os índices ainda não existem neste processo,
+        quando foram montados numa versão do universo diferente da gravada no banco
+        (outro processo recalculou as notas) ou quando a mudança altera o tamanho do
+        universo qualificado.
+        """
+        # A linha de versão fica bloqueada até o commit: atualizações de outros processos esperam
+        state = self._lock_ranking_state()
+        scorer = get_incremental_scorer()
+        
+        with scorer.lock:
+            if not scorer.is_ready or scorer.version != state.universe_version:
+                changed = None
+            elif stock.id not in scorer.values and not stock.is_qualified:
+                # Fora dos índices antes e depois: nada muda
+                self.db.commit()
+                return
+            else:
+                changed = scorer.update(stock)
+            
+            if changed is not None:
+                try:
+                    self._write_incremental_scores(scorer, changed)
+                    version = self._bump_ranking_version(state)
+                    self.db.commit()
+                except Exception:
+                    # Índices já alterados sem o commit correspondente: descartados até o próximo recálculo
+                    scorer.version = None
+                    self.db.rollback()
+                    raise
+                scorer.version = version
+        
+        if changed is None:
+            await self.recalculate_all_scores()
+            return
+        
+        if changed:
+            invalidate_stock_universe()
+    
+    def _write_incremental_scores(self, scorer, changed: Dict[int, Dict[str, Optional[float]]]):
+        """
+        Grava as notas que mudaram (UPDATE em lote por chave primária) e as posições afetadas do ranking
+        """
+        if not changed:
+            return
+        
+        self.db.execute(update(Stock), [
+            {
+                "id": stock_id,
+                "value_score": scores["value"],
+                "income_score": scores["income"],
+                "quality_score": scores["quality"]
+            }
+            for stock_id, scores in changed.items()
+        ])
+        
+        # Só o trecho de cada ranking entre as posições antigas e novas das ações alteradas
+        for archetype, (first_rank, last_rank, ranking) in scorer.rerank(changed).items():
+            self._write_ranking_positions(archetype, ranking, first_rank, last_rank)
+    
+    def _lock_ranking_state(self) -> RankingState:
+        """
+        Linha de versão dos rankings, bloqueada para escrita na transação atual (criada se faltar)
+        """
+        state = self.db.query(RankingState).filter(RankingState.id == 1).with_for_update().first()
+        if state is None:
+            state = RankingState(id=1, universe_version=0)
+            self.db.add(state)
+            self.db.flush()
+        return state
+    
+    def _bump_ranking_version(self, state: RankingState) -> int:
+        state.universe_version += 1
+        return state.universe_version
+    
+    def _refresh_archetype_rankings(self, scoring_engine: ScoringEngine, stock_ids: List[int], sub_scores: Dict[str, List[Optional[float]]]):
+        """
+        Atualiza archetype_rankings para o ranking recém-calculado (todas as posições de cada arquétipo)
+        """
+        columns = {
+            name: np.array([np.nan if score is None else score for score in scores], dtype=np.float64)
+            for name, scores in sub_scores.items()
+        }
+        rankings = scoring_engine.calculate_archetype_rankings(stock_ids, columns)
+        
+        for archetype, ranking in rankings.items():
+            self._write_ranking_positions(archetype, ranking)
+    
+    def _write_ranking_positions(self, archetype: InvestorArchetype, ranking: List[Tuple[int, float]], first_rank: int = 1, last_rank: Optional[int] = None):
+        """
+        Grava as posições first_rank..last_rank de um arquétipo lendo e alterando só as linhas desse trecho.
+
+        ranking traz (stock_id, nota final) a partir de first_rank; posições do trecho
+        sem ação correspondente são removidas (last_rank None = até o fim da tabela).
+        """
+        query = self.db.query(
+            ArchetypeRanking.id,
+            ArchetypeRanking.rank,
+            ArchetypeRanking.stock_id,
+            ArchetypeRanking.final_score
+        ).filter(ArchetypeRanking.archetype == archetype, ArchetypeRanking.rank >= first_rank)
+        if last_rank is not None:
+            query = query.filter(ArchetypeRanking.rank <= last_rank)
+        
+        # Posições atuais do trecho: rank -> (id da linha, ação, nota final)
+        current = {rank: (row_id, stock_id, final_score) for row_id, rank, stock_id, final_score in query}
+        
+        inserts = []
+        updates = []
+        for position, (stock_id, final_score) in enumerate(ranking, start=first_rank):
+            row = current.pop(position, None)
+            if row is None:
+                inserts.append({
+                    "archetype": archetype,
+                    "rank": position,
+                    "stock_id": stock_id,
+                    "final_score": final_score
+                })
+            elif (row[1], row[2]) != (stock_id, final_score):
+                updates.append({"id": row[0], "stock_id": stock_id, "final_score": final_score})
+        
+        # Posições que sobraram (ranking encolheu) saem da tabela
+        if current:
+            self.db.execute(delete(ArchetypeRanking).where(ArchetypeRanking.id.in_([row[0] for row in current.values()])))
+        if updates:
+            self.db.execute(update(ArchetypeRanking), updates)
+        if inserts:
+            self.db.execute(insert(ArchetypeRanking), inserts)
     
     async def update_stock_prices(self):
         """
@@ -151,3 +331,4 @@ class DataProcessor:
             self.db.add(stock)
         
         self.db.commit()
+        invalidate_stock_universe()
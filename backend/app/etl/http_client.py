@@ -0,0 +1,152 @@
+from typing import Dict
+import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+import logging
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Limitador de taxa token bucket: rate requisições por segundo com rajadas de até capacity.
+
+    Cada acquire reserva um token na hora (o saldo pode ficar negativo) e
+    espera o tempo até esse token existir, então as requisições saem
+    espaçadas na ordem de chegada. A reserva não depende do event loop e
+    o mesmo limitador serve a todo o processo.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Consome um token e retorna quantos segundos esperar até ele estar disponível
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+_redis_client = None
+
+def get_redis_client():
+    """
+    Cliente Redis síncrono do processo para o estado compartilhado do ETL (limitadores e disjuntores)
+    """
+    global _redis_client
+
+    if _redis_client is None:
+        import redis
+
+        _redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True, socket_timeout=1.0)
+    return _redis_client
+
+class RedisTokenBucket(TokenBucket):
+    """
+    Token bucket guardado no Redis: a taxa configurada vale para todos os
+    processos somados (API e cada processo dos workers Celery), não por processo.
+
+    A reserva é um script Lua atômico com a mesma regra de TokenBucket.reserve
+    (saldo pode ficar negativo, o relógio é o do Redis). Se o Redis falhar, o
+    processo segue com o balde local.
+    """
+
+    RESERVE_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local clock = redis.call('time')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('hmget', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate) - 1
+    redis.call('hset', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('expire', KEYS[1], 3600)
+    if tokens >= 0 then
+        return '0'
+    end
+    return tostring(-tokens / rate)
+    """
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        super().__init__(rate, capacity)
+        self.key = f"etl:rate:{name}"
+        self._reserve = None
+
+    def reserve(self) -> float:
+        try:
+            if self._reserve is None:
+                self._reserve = get_redis_client().register_script(self.RESERVE_SCRIPT)
+            return float(self._reserve(keys=[self.key], args=[self.rate, self.capacity]))
+        except Exception as e:
+            logger.warning(f"Limitador de taxa no Redis indisponível ({self.key}): {str(e)}")
+            return super().reserve()
+
+    async def acquire(self):
+        # Chamada ao Redis fora do event loop
+        delay = await asyncio.to_thread(self.reserve)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+def create_rate_limiter(name: str, rate: float, capacity: int) -> TokenBucket:
+    # Com a coleta nos workers Celery, vários processos dividem a mesma cota da fonte
+    if settings.etl_use_celery:
+        return RedisTokenBucket(name, rate, capacity)
+    return TokenBucket(rate, capacity)
+
+# Um limitador por fonte de dados (do processo, ou compartilhado via Redis com ETL_USE_CELERY)
+rate_limiters: Dict[str, TokenBucket] = {
+    "status_invest": create_rate_limiter("status_invest", settings.status_invest_rate_per_second, settings.status_invest_burst),
+    "fundamentus": create_rate_limiter("fundamentus", settings.fundamentus_rate_per_second, settings.fundamentus_burst),
+}
+
+# Conexões ficam presas ao event loop que as abriu: um cliente por loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def http2_available() -> bool:
+    return settings.etl_http2 and importlib.util.find_spec("h2") is not None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Cliente HTTP do processo com pool de conexões e keep-alive (HTTP/2 se o pacote h2 estiver instalado)
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=settings.etl_http_timeout_seconds,
+            http2=http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.etl_http_max_connections,
+                max_keepalive_connections=settings.etl_http_max_keepalive,
+                keepalive_expiry=settings.etl_http_keepalive_seconds
+            )
+        )
+        _clients[loop] = client
+
+    return client
+
+async def close_http_client():
+    """
+    Fecha o cliente do event loop atual (desligamento da aplicação)
+    """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,62 @@
+from typing import Dict, Any, Callable, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import os
+import threading
+import logging
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+def get_parse_executor() -> Optional[Executor]:
+    """
+    Pool do processo para extrair dados das páginas (None no modo "inline").
+
+    "process" usa todos os núcleos e não disputa o GIL com o event loop;
+    "thread" evita o custo de serializar páginas entre processos.
+    """
+    global _executor
+
+    if settings.etl_parse_executor == "inline":
+        return None
+
+    with _lock:
+        if _executor is None:
+            workers = settings.etl_parse_workers or os.cpu_count() or 1
+            if settings.etl_parse_executor == "thread":
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="etl-parse")
+            else:
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            logger.info(f"Parsing do ETL em pool '{settings.etl_parse_executor}' com {workers} workers")
+        return _executor
+
+async def run_parser(parse: Callable[[bytes], Dict[str, Any]], content: bytes) -> Dict[str, Any]:
+    """
+    Executa o parser fora do event loop (parse precisa ser uma função de módulo no modo "process")
+    """
+    executor = get_parse_executor()
+    if executor is None:
+        return parse(content)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(executor, parse, content)
+    except BrokenProcessPool:
+        # Um worker morreu: o pool é recriado na próxima chamada
+        logger.warning("Pool de parsing do ETL quebrado; recriando")
+        shutdown_parse_executor()
+        return parse(content)
+
+def shutdown_parse_executor():
+    """
+    Encerra o pool (desligamento da aplicação)
+    """
+    global _executor
+
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,144 @@
+from typing import Dict, Any, Optional, List
+import lxml.html
+
+# Rótulo do indicador na página -> campo de Stock
+STATUS_INVEST_FIELDS = {
+    "P/L": "pe_ratio",
+    "P/VPA": "pb_ratio",
+    "Div. Yield": "dividend_yield",
+    "ROE": "roe",
+    "Marg. Líquida": "net_margin",
+    "Dív. Líq. / EBIT": "debt_to_ebitda",
+    "Payout": "payout_ratio",
+}
+
+# Na ordem de prioridade da busca por substring (rótulos com variações)
+FUNDAMENTUS_FIELDS = {
+    "P/L": "pe_ratio",
+    "P/VP": "pb_ratio",
+    "Div. Yield": "dividend_yield",
+    "ROE": "roe",
+    "Marg. Líquida": "net_margin",
+    "Dív. Líq. / EBIT": "debt_to_ebitda",
+    "Payout": "payout_ratio",
+}
+
+def parse_float(value: Optional[str]) -> Optional[float]:
+    """
+    Converte string para float, lidando com formatação brasileira
+    """
+    if not value or value == '-':
+        return None
+
+    try:
+        # Remover caracteres não numéricos exceto vírgula e ponto
+        cleaned = value.replace('%', '').replace('R$', '').strip()
+
+        # Substituir vírgula por ponto para conversão
+        cleaned = cleaned.replace(',', '.')
+
+        return float(cleaned)
+    except (ValueError, TypeError):
+        return None
+
+def _document(content: bytes):
+    """
+    Árvore lxml da página (UTF-8, ou cp1252 para páginas antigas como as do Fundamentus)
+    """
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        text = content.decode("cp1252", errors="replace")
+    return lxml.html.fromstring(text)
+
+def _single_string(element) -> Optional[str]:
+    """
+    Texto do elemento quando ele tem um único filho, descendo por filhos únicos (o .string do BeautifulSoup)
+    """
+    while True:
+        if len(element) == 0:
+            return element.text or None
+        if len(element) > 1 or element.text or element[0].tail:
+            return None
+        element = element[0]
+
+def parse_status_invest(content: bytes) -> Dict[str, Any]:
+    """
+    Extrai os indicadores da página de uma ação do StatusInvest.
+
+    Uma única passada pelos <div>/<h3> localiza o primeiro <div> de cada
+    rótulo (texto exato, como o find(string=...) do parser anterior); o
+    valor é o primeiro <strong> dentro do pai desse <div>.
+    """
+    root = _document(content)
+    data = {}
+    values: Dict[str, Optional[str]] = {}
+
+    for element in root.iter("div", "h3"):
+        if element.tag == "h3":
+            # Preço atual: primeiro <h3 class="value">
+            if "current_price" not in data and "value" in (element.get("class") or "").split():
+                data["current_price"] = parse_float(element.text_content())
+            continue
+
+        label = _single_string(element)
+        if label in STATUS_INVEST_FIELDS and label not in values:
+            parent = element.getparent()
+            strong = parent.find(".//strong") if parent is not None else None
+            values[label] = strong.text_content() if strong is not None else None
+
+    for label, value in values.items():
+        if value is not None:
+            data[STATUS_INVEST_FIELDS[label]] = parse_float(value)
+
+    data['source'] = 'status_invest'
+    return data
+
+def _fundamentus_field(label: str) -> Optional[str]:
+    field = FUNDAMENTUS_FIELDS.get(label)
+    if field is None:
+        # Rótulos com prefixos/sufixos (ex.: "?P/L"): mesma busca por substring de antes
+        for key, candidate in FUNDAMENTUS_FIELDS.items():
+            if key in label:
+                return candidate
+    return field
+
+def parse_fundamentus(content: bytes) -> Dict[str, Any]:
+    """
+    Extrai os indicadores das tabelas da página de detalhes do Fundamentus.
+
+    Mesma leitura do parser anterior: em cada linha de cada tabela, a
+    primeira célula (<td>/<th>, em qualquer nível) é o rótulo e a segunda o
+    valor; a última linha de um mesmo campo prevalece.
+    """
+    root = _document(content)
+    data = {}
+
+    for table in root.iter("table"):
+        for row in table.iter("tr"):
+            cells = row.iter("td", "th")
+            label_cell = next(cells, None)
+            value_cell = next(cells, None)
+            if value_cell is None:
+                continue
+
+            field = _fundamentus_field(label_cell.text_content().strip())
+            if field is not None:
+                data[field] = parse_float(value_cell.text_content().strip())
+
+    data['source'] = 'fundamentus'
+    return data
+
+def parse_fundamentus_listing(content: bytes) -> List[str]:
+    """
+    Tickers da listagem de ações do Fundamentus (links detalhes.php?papel=XXXX), na ordem da página
+    """
+    root = _document(content)
+    tickers = []
+
+    for link in root.iter("a"):
+        href = link.get("href") or ""
+        if "papel=" in href:
+            tickers.append(href.split("papel=", 1)[1].split("&", 1)[0].strip().upper())
+
+    return list(dict.fromkeys(tickers))
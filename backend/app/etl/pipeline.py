@@ -0,0 +1,81 @@
+from typing import List, Dict, Callable, Optional
+import logging
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.stock import Stock
+from app.etl.data_collector import DataCollector
+from app.etl.data_processor import DataProcessor
+from app.etl.snapshot_store import SnapshotStore
+from app.services.alert_service import AlertService
+from app.services.alert_retention import AlertRetentionService
+
+logger = logging.getLogger(__name__)
+
+async def collect_and_store(
+    db: Session,
+    collector: DataCollector,
+    processor: DataProcessor,
+    tickers: List[str],
+    on_result: Optional[Callable[[str, Optional[str]], None]] = None
+) -> Dict[str, int]:
+    """
+    Coleta as ações concorrentemente e grava uma por vez na sessão informada.
+
+    on_result(ticker, erro) é chamado após cada ação (erro None em caso de sucesso).
+    Os dados consolidados de todas as ações coletadas, inclusive as
+    inalteradas, vão para o histórico de snapshots ao final.
+    """
+    stats = {"stored": 0, "unchanged": 0, "failed": 0}
+    known_tickers = {ticker for (ticker,) in db.query(Stock.ticker)}
+    snapshots = []
+    
+    # Coleta concorrente; a gravação segue uma ação por vez na mesma sessão
+    async for ticker, stock_data in collector.collect_many(tickers):
+        error = None
+        if stock_data:
+            snapshots.append(stock_data)
+        try:
+            if not stock_data:
+                error = "Dados não encontrados"
+            # Páginas inalteradas de ações já gravadas não geram gravação nem recálculo
+            elif stock_data.get('is_unchanged') and ticker.upper() in known_tickers:
+                stats["unchanged"] += 1
+            else:
+                await processor.process_stock_data(stock_data)
+                stats["stored"] += 1
+        except Exception as e:
+            logger.error(f"Erro ao coletar {ticker}: {str(e)}")
+            # Sem gravação, o cache não pode marcar a ação como inalterada
+            db.rollback()
+            collector.forget(ticker)
+            error = str(e)
+        
+        if error:
+            stats["failed"] += 1
+        if on_result:
+            on_result(ticker, error)
+    
+    if snapshots and settings.etl_snapshots_enabled:
+        try:
+            SnapshotStore(settings.etl_snapshot_dir).append(snapshots)
+        except Exception as e:
+            # O histórico não pode derrubar a coleta: os dados já estão no banco
+            logger.error(f"Erro ao gravar snapshots da coleta: {str(e)}")
+    
+    return stats
+
+async def finish_collection(db: Session, processor: DataProcessor):
+    """
+    Etapas após a coleta de todo o universo: notas, rankings, alertas e retenção
+    """
+    # Recalcular notas e rankings por arquétipo com os dados novos
+    await processor.recalculate_all_scores()
+    
+    # Alertas de limiar só para as ações que cruzaram score/dividend yield
+    processor.dispatch_alert_events()
+    
+    # Alertas de estratégia de todos os usuários em uma única passada
+    AlertService(db).check_all_strategy_alerts()
+    
+    # Alertas antigos já tratados saem da tabela quente
+    AlertRetentionService(db).archive_old_alerts()
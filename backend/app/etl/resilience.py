@@ -0,0 +1,232 @@
+from typing import Dict, Optional, Callable, Awaitable
+import asyncio
+import random
+import threading
+import time
+import logging
+import httpx
+from app.core.config import settings
+from app.etl.http_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """
+    Fonte com o circuito aberto: a requisição nem é enviada
+    """
+
+class CircuitBreaker:
+    """
+    Disjuntor por fonte de dados.
+
+    Depois de failure_threshold falhas seguidas o circuito abre e as
+    requisições falham na hora por reset_timeout segundos. Passado esse
+    tempo, uma única requisição de teste é liberada (meio aberto): sucesso
+    fecha o circuito, falha reabre. O estado é do processo e protegido por
+    lock, como os limitadores de taxa.
+
+    Com shared=True (workers Celery) a abertura também é publicada no Redis
+    com validade de reset_timeout: os demais processos abrem o circuito ao
+    ver a chave, sem gastar as próprias falhas contra a fonte fora do ar.
+    """
+
+    # Intervalo mínimo entre consultas do estado compartilhado
+    SHARED_CHECK_SECONDS = 1.0
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float, shared: bool = False):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.shared = shared
+        self.key = f"etl:circuit:{name}"
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """
+        Se a requisição pode ser enviada (no meio aberto, apenas a de teste)
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self) -> bool:
+        """
+        Registra uma resposta da fonte; retorna True se o circuito estava aberto e fechou agora
+        """
+        with self._lock:
+            closed = self.opened_at is not None
+            if closed:
+                logger.info(f"Circuito da fonte {self.name} fechado")
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+            return closed
+
+    def record_failure(self) -> bool:
+        """
+        Registra uma falha transitória; retorna True se o circuito abriu (ou reabriu) agora
+        """
+        with self._lock:
+            self.failures += 1
+            opened = self.probing or (self.opened_at is None and self.failures >= self.failure_threshold)
+            if opened:
+                if self.opened_at is None:
+                    logger.warning(
+                        f"Circuito da fonte {self.name} aberto após {self.failures} falhas seguidas; "
+                        f"nova tentativa em {self.reset_timeout:.0f}s"
+                    )
+                self.opened_at = time.monotonic()
+            self.probing = False
+            return opened
+
+    def adopt_shared_open(self, remaining: float):
+        """
+        Abre o circuito local a partir do estado publicado por outro processo
+        """
+        with self._lock:
+            if self.opened_at is None:
+                logger.warning(f"Circuito da fonte {self.name} aberto por outro worker")
+                self.opened_at = time.monotonic() - max(0.0, self.reset_timeout - remaining)
+
+    async def sync_shared(self):
+        """
+        Consulta o estado compartilhado (no máximo a cada SHARED_CHECK_SECONDS, fora do event loop)
+        """
+        now = time.monotonic()
+        if not self.shared or self.opened_at is not None or now - self._checked_at < self.SHARED_CHECK_SECONDS:
+            return
+        self._checked_at = now
+
+        try:
+            remaining_ms = await asyncio.to_thread(get_redis_client().pttl, self.key)
+        except Exception as e:
+            logger.warning(f"Estado compartilhado do disjuntor indisponível ({self.key}): {str(e)}")
+            return
+        if remaining_ms and remaining_ms > 0:
+            self.adopt_shared_open(remaining_ms / 1000)
+
+    async def publish(self, is_open: bool):
+        """
+        Publica a abertura (com validade de reset_timeout) ou o fechamento do circuito
+        """
+        if not self.shared:
+            return
+        try:
+            client = get_redis_client()
+            if is_open:
+                await asyncio.to_thread(client.set, self.key, "1", px=int(self.reset_timeout * 1000))
+            else:
+                await asyncio.to_thread(client.delete, self.key)
+        except Exception as e:
+            logger.warning(f"Estado compartilhado do disjuntor indisponível ({self.key}): {str(e)}")
+
+    def release_probe(self):
+        """
+        Requisição cancelada ou erro alheio à fonte: libera a vaga de teste sem contar sucesso ou falha
+        """
+        with self._lock:
+            self.probing = False
+
+# Um disjuntor por fonte de dados, do processo (aberturas publicadas no Redis com ETL_USE_CELERY)
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    source: CircuitBreaker(
+        source,
+        settings.etl_circuit_failure_threshold,
+        settings.etl_circuit_reset_seconds,
+        shared=settings.etl_use_celery
+    )
+    for source in ("status_invest", "fundamentus")
+}
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Falhas transitórias: timeout, erro de conexão, 429 e 5xx (404 e afins não mudam numa nova tentativa)
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Backoff exponencial com jitter completo: aleatório entre 0 e min(cap, base * 2^attempt)
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def _retry_after(error: BaseException) -> float:
+    """
+    Espera pedida pelo servidor no cabeçalho Retry-After (em segundos), se houver
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        try:
+            return float(error.response.headers.get("retry-after", 0))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+async def call_with_resilience(source: str, request: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+    """
+    Executa a requisição da fonte com disjuntor, novas tentativas e prazos.
+
+    Cada tentativa tem até etl_request_deadline_seconds (incluindo a espera
+    pelo limitador de taxa) e o conjunto das tentativas até
+    etl_fetch_deadline_seconds. Falhas transitórias são repetidas até
+    etl_retry_attempts vezes com backoff exponencial e jitter; cada falha
+    conta para o disjuntor da fonte e só respostas (inclusive 4xx) contam
+    como sucesso. Com o circuito aberto levanta CircuitOpenError sem enviar
+    nada.
+    """
+    breaker = circuit_breakers[source]
+    deadline = time.monotonic() + settings.etl_fetch_deadline_seconds
+    attempt = 0
+
+    while True:
+        await breaker.sync_shared()
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuito da fonte {source} aberto")
+
+        remaining = deadline - time.monotonic()
+        try:
+            response = await asyncio.wait_for(request(), timeout=min(settings.etl_request_deadline_seconds, remaining))
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                if isinstance(e, httpx.HTTPStatusError) and 400 <= e.response.status_code < 500:
+                    # 4xx: a fonte respondeu, o erro é da página e não da disponibilidade da fonte
+                    if breaker.record_success():
+                        await breaker.publish(is_open=False)
+                else:
+                    # Demais erros não dizem nada sobre a fonte: nem sucesso nem falha, só libera o teste
+                    breaker.release_probe()
+                raise
+            if breaker.record_failure():
+                await breaker.publish(is_open=True)
+
+            attempt += 1
+            delay = max(backoff_delay(attempt, settings.etl_retry_backoff_seconds, settings.etl_retry_backoff_max_seconds), _retry_after(e))
+            if attempt >= settings.etl_retry_attempts or time.monotonic() + delay >= deadline:
+                raise
+            await asyncio.sleep(delay)
+            continue
+
+        if breaker.record_success():
+            await breaker.publish(is_open=False)
+        return response
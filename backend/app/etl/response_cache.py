@@ -0,0 +1,123 @@
+from typing import Dict, Any, Optional
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+class CachedResponse:
+    """
+    Resposta guardada de uma URL: validadores HTTP, hash do corpo e dados já extraídos
+    """
+
+    def __init__(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str, data: Dict[str, Any]):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.data = data
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """
+        Cabeçalhos do GET condicional (If-None-Match / If-Modified-Since)
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """
+    Cache em disco das páginas coletadas, uma entrada por URL.
+
+    Cada entrada tem um JSON com ETag, Last-Modified, hash SHA-256 do corpo e
+    os dados extraídos da página, e o HTML bruto comprimido ao lado (para
+    extrair de novo sem baixar, se o parser mudar). Gravações são atômicas
+    (arquivo temporário + rename), então workers concorrentes nunca leem
+    uma entrada pela metade.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str, extension: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + extension)
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Entrada de cache ilegível para {url}: {str(e)}")
+            return None
+
+        if entry.get("url") != url:
+            return None
+        return CachedResponse(url, entry.get("etag"), entry.get("last_modified"), entry["content_hash"], entry["data"])
+
+    def get_body(self, url: str) -> Optional[bytes]:
+        try:
+            with gzip.open(self._path(url, ".html.gz"), "rb") as file:
+                return file.read()
+        except (OSError, EOFError):
+            return None
+
+    def set(self, url: str, headers, content: bytes, data: Dict[str, Any], digest: Optional[str] = None) -> CachedResponse:
+        """
+        Grava (ou substitui) a entrada da URL a partir de uma resposta 200
+        """
+        entry = CachedResponse(
+            url, headers.get("etag"), headers.get("last-modified"), digest or content_hash(content), data
+        )
+        self._write(self._path(url, ".html.gz"), gzip.compress(content))
+        self._write_entry(entry)
+        return entry
+
+    def touch(self, entry: CachedResponse, headers):
+        """
+        Atualiza os validadores de uma entrada cujo conteúdo não mudou
+        """
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        if (etag or entry.etag, last_modified or entry.last_modified) != (entry.etag, entry.last_modified):
+            entry.etag = etag or entry.etag
+            entry.last_modified = last_modified or entry.last_modified
+            self._write_entry(entry)
+
+    def delete(self, url: str):
+        for extension in (".json", ".html.gz"):
+            try:
+                os.remove(self._path(url, extension))
+            except FileNotFoundError:
+                pass
+
+    def _write_entry(self, entry: CachedResponse):
+        payload = {
+            "url": entry.url,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "content_hash": entry.content_hash,
+            "data": entry.data,
+        }
+        self._write(self._path(entry.url, ".json"), json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def _write(self, path: str, content: bytes):
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+            os.replace(temporary, path)
+        except Exception:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
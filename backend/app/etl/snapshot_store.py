@@ -0,0 +1,157 @@
+from typing import Dict, Any, List, Optional, Iterable
+from datetime import date, datetime
+import os
+import re
+import tempfile
+import uuid
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Indicadores consolidados guardados em cada snapshot (float64, NaN quando ausentes)
+SNAPSHOT_FIELDS = [
+    "current_price",
+    "pe_ratio",
+    "pb_ratio",
+    "dividend_yield",
+    "roe",
+    "net_margin",
+    "debt_to_ebitda",
+    "payout_ratio",
+    "data_quality_score",
+]
+
+PARTITION_PATTERN = re.compile(r"^date=(\d{4}-\d{2}-\d{2})$")
+
+def _empty_columns(fields: List[str]) -> Dict[str, np.ndarray]:
+    columns = {
+        "ticker": np.array([], dtype=str),
+        "collected_at": np.array([], dtype="datetime64[us]"),
+        "source": np.array([], dtype=str),
+        "unchanged": np.array([], dtype=bool),
+    }
+    columns.update({field: np.array([], dtype=np.float64) for field in fields})
+    return columns
+
+class SnapshotStore:
+    """
+    Histórico dos dados consolidados de cada coleta, em disco e só de acréscimo.
+
+    Cada gravação cria um arquivo NPZ comprimido (uma coluna NumPy por campo)
+    na partição do dia da coleta, date=AAAA-MM-DD/. Arquivos existentes nunca
+    são reescritos: shards concorrentes gravam arquivos próprios e a gravação
+    é atômica (arquivo temporário + rename), como no ResponseCache.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Grava os registros de _consolidate_data (um arquivo por dia de coleta) e retorna os caminhos
+        """
+        by_day: Dict[date, List[Dict[str, Any]]] = {}
+        for record in records:
+            if not record.get("ticker"):
+                continue
+            collected_at = record.get("last_updated") or datetime.now()
+            by_day.setdefault(collected_at.date(), []).append(record)
+
+        paths = []
+        for day, day_records in sorted(by_day.items()):
+            paths.append(self._write_partition(day, day_records))
+        return paths
+
+    def _write_partition(self, day: date, records: List[Dict[str, Any]]) -> str:
+        columns = {
+            "ticker": np.array([record["ticker"].upper() for record in records], dtype=str),
+            "collected_at": np.array(
+                [record.get("last_updated") or datetime.now() for record in records], dtype="datetime64[us]"
+            ),
+            "source": np.array([record.get("source") or "" for record in records], dtype=str),
+            "unchanged": np.array([bool(record.get("is_unchanged")) for record in records], dtype=bool),
+        }
+        for field in SNAPSHOT_FIELDS:
+            columns[field] = np.array(
+                [np.nan if record.get(field) is None else record[field] for record in records], dtype=np.float64
+            )
+
+        partition = os.path.join(self.directory, f"date={day.isoformat()}")
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f"{datetime.now():%H%M%S}-{uuid.uuid4().hex[:12]}.npz")
+
+        descriptor, temporary = tempfile.mkstemp(dir=partition, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                np.savez_compressed(file, **columns)
+            os.replace(temporary, path)
+        except Exception:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return path
+
+    def partitions(self, start: date, end: date) -> List[str]:
+        """
+        Arquivos das partições entre start e end (inclusive), em ordem cronológica
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        paths = []
+        for name in sorted(names):
+            match = PARTITION_PATTERN.match(name)
+            if not match or not start.isoformat() <= match.group(1) <= end.isoformat():
+                continue
+            partition = os.path.join(self.directory, name)
+            paths.extend(
+                os.path.join(partition, file_name)
+                for file_name in sorted(os.listdir(partition)) if file_name.endswith(".npz")
+            )
+        return paths
+
+    def read(
+        self,
+        start: date,
+        end: date,
+        fields: Optional[List[str]] = None,
+        tickers: Optional[List[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Colunas dos snapshots entre start e end como arrays NumPy alinhados.
+
+        Sempre inclui ticker, collected_at, source e unchanged; dos
+        indicadores, apenas os de fields (todos por padrão). Os membros do NPZ
+        são descomprimidos sob demanda, então colunas não pedidas nem são lidas.
+        """
+        fields = list(fields or SNAPSHOT_FIELDS)
+        unknown = set(fields) - set(SNAPSHOT_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos sem snapshot: {', '.join(sorted(unknown))}")
+
+        wanted = np.array([ticker.upper() for ticker in tickers], dtype=str) if tickers else None
+        names = ["ticker", "collected_at", "source", "unchanged"] + fields
+        chunks: Dict[str, List[np.ndarray]] = {name: [] for name in names}
+
+        for path in self.partitions(start, end):
+            try:
+                with np.load(path, allow_pickle=False) as snapshot:
+                    ticker_column = snapshot["ticker"]
+                    mask = np.isin(ticker_column, wanted) if wanted is not None else None
+                    if mask is not None and not mask.any():
+                        continue
+                    columns = {name: ticker_column if name == "ticker" else snapshot[name] for name in names}
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Snapshot ilegível ignorado ({path}): {str(e)}")
+                continue
+
+            for name, column in columns.items():
+                chunks[name].append(column[mask] if mask is not None else column)
+
+        if not chunks["ticker"]:
+            return _empty_columns(fields)
+        return {name: np.concatenate(columns) for name, columns in chunks.items()}
@@ -0,0 +1,285 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+import asyncio
+import uuid
+import logging
+from celery import chord, group
+from sqlalchemy import insert, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.etl_checkpoint import EtlRun, EtlRunStatus, EtlCheckpoint, EtlCheckpointStatus
+from app.etl.data_collector import DataCollector
+from app.etl.data_processor import DataProcessor
+from app.etl.pipeline import collect_and_store, finish_collection
+from app.etl.universe import discover_tickers
+from app.etl.http_client import close_http_client
+
+logger = logging.getLogger(__name__)
+
+def run_async(coroutine):
+    """
+    Executa a corrotina num event loop novo (um por tarefa) e fecha o cliente HTTP criado nele
+    """
+    async def runner():
+        try:
+            return await coroutine
+        finally:
+            await close_http_client()
+
+    return asyncio.run(runner())
+
+def retryable_filter():
+    """
+    Checkpoints ainda a coletar: pendentes, com falha abaixo do limite de tentativas
+    ou arrendados a uma tarefa cujo prazo venceu (worker perdido)
+    """
+    lease_expired_at = datetime.now() - timedelta(seconds=settings.etl_shard_lease_seconds)
+    return or_(
+        EtlCheckpoint.status == EtlCheckpointStatus.PENDING,
+        and_(
+            EtlCheckpoint.status == EtlCheckpointStatus.FAILED,
+            EtlCheckpoint.attempts < settings.etl_max_attempts
+        ),
+        and_(
+            EtlCheckpoint.status == EtlCheckpointStatus.IN_PROGRESS,
+            EtlCheckpoint.claimed_at < lease_expired_at
+        )
+    )
+
+def create_run(db: Session, tickers: List[str], shard_size: Optional[int] = None) -> Optional[EtlRun]:
+    """
+    Registra uma execução com um checkpoint PENDING por ação, já atribuída ao seu shard.
+
+    Retorna None se outra execução já está em andamento (disparo concorrente).
+    """
+    shard_size = shard_size or settings.etl_shard_size
+    run = EtlRun(
+        status=EtlRunStatus.RUNNING,
+        total_tickers=len(tickers),
+        shard_count=(len(tickers) + shard_size - 1) // shard_size
+    )
+    db.add(run)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Índice único parcial: só uma execução RUNNING por vez
+        db.rollback()
+        return None
+
+    if tickers:
+        db.execute(insert(EtlCheckpoint), [
+            {
+                "run_id": run.id,
+                "shard": position // shard_size,
+                "ticker": ticker,
+                "status": EtlCheckpointStatus.PENDING,
+                "attempts": 0
+            }
+            for position, ticker in enumerate(tickers)
+        ])
+
+    db.commit()
+    return run
+
+def claim_shards(db: Session, run_id: int) -> Dict[int, str]:
+    """
+    Arrenda os checkpoints coletáveis de cada shard e retorna {shard: lease_id}.
+
+    O UPDATE ... WHERE status coletável é atômico: dois disparos concorrentes
+    nunca arrendam a mesma ação, e ações já arrendadas (enfileiradas ou em
+    coleta) só voltam a ser distribuídas depois de etl_shard_lease_seconds.
+    """
+    shards = [
+        shard for (shard,) in db.query(EtlCheckpoint.shard).filter(
+            EtlCheckpoint.run_id == run_id,
+            retryable_filter()
+        ).distinct().order_by(EtlCheckpoint.shard)
+    ]
+
+    leases = {}
+    for shard in shards:
+        lease_id = uuid.uuid4().hex
+        claimed = db.execute(
+            update(EtlCheckpoint).where(
+                EtlCheckpoint.run_id == run_id,
+                EtlCheckpoint.shard == shard,
+                retryable_filter()
+            ).values(
+                status=EtlCheckpointStatus.IN_PROGRESS,
+                lease_id=lease_id,
+                claimed_at=datetime.now()
+            )
+        ).rowcount
+        if claimed:
+            leases[shard] = lease_id
+
+    db.commit()
+    return leases
+
+def dispatch_shards(run_id: int, leases: Dict[int, str]):
+    """
+    Enfileira os shards arrendados em paralelo; finish_run roda quando todos terminarem
+    """
+    if leases:
+        chord(group(collect_shard.s(run_id, shard, lease_id) for shard, lease_id in leases.items()))(finish_run.si(run_id))
+    else:
+        finish_run.delay(run_id)
+
+@celery_app.task(name="etl.start_collection_run")
+def start_collection_run(resume: bool = True) -> Dict[str, Any]:
+    """
+    Inicia a coleta completa do universo, ou retoma a execução em andamento
+    (apenas as ações sem arrendamento válido: shards ainda em coleta não são duplicados)
+    """
+    db = SessionLocal()
+    try:
+        run = None
+        if resume:
+            run = db.query(EtlRun).filter(EtlRun.status == EtlRunStatus.RUNNING).first()
+
+        if run is None:
+            tickers = run_async(discover_tickers(db))
+            run = create_run(db, tickers)
+            if run is None:
+                run = db.query(EtlRun).filter(EtlRun.status == EtlRunStatus.RUNNING).first()
+                logger.info(f"Coleta {run.id} já em andamento")
+            else:
+                logger.info(f"Coleta {run.id}: {run.total_tickers} ações em {run.shard_count} shards")
+        else:
+            logger.info(f"Retomando a coleta {run.id}")
+
+        leases = claim_shards(db, run.id)
+        dispatch_shards(run.id, leases)
+
+        return {"run_id": run.id, "shards": len(leases)}
+    finally:
+        db.close()
+
+async def _collect_shard(db: Session, run_id: int, shard: int, lease_id: str) -> Dict[str, int]:
+    tickers = [
+        ticker for (ticker,) in db.query(EtlCheckpoint.ticker).filter(
+            EtlCheckpoint.run_id == run_id,
+            EtlCheckpoint.shard == shard,
+            EtlCheckpoint.lease_id == lease_id,
+            EtlCheckpoint.status == EtlCheckpointStatus.IN_PROGRESS
+        )
+    ]
+
+    if not tickers:
+        return {"stored": 0, "unchanged": 0, "failed": 0}
+
+    collector = DataCollector()
+    processor = DataProcessor(db)
+
+    def record(ticker: str, error: Optional[str]):
+        # Cada ação concluída fica registrada: uma retomada não a coleta de novo.
+        # Só grava se o arrendamento ainda é desta tarefa (não venceu e foi retomado)
+        db.execute(
+            update(EtlCheckpoint).where(
+                EtlCheckpoint.run_id == run_id,
+                EtlCheckpoint.ticker == ticker,
+                EtlCheckpoint.lease_id == lease_id,
+                EtlCheckpoint.status == EtlCheckpointStatus.IN_PROGRESS
+            ).values(
+                status=EtlCheckpointStatus.FAILED if error else EtlCheckpointStatus.DONE,
+                attempts=EtlCheckpoint.attempts + 1,
+                error=error
+            )
+        )
+        db.commit()
+
+    stats = await collect_and_store(db, collector, processor, tickers, record)
+
+    # Cruzamentos de limiar das ações deste shard
+    processor.dispatch_alert_events()
+
+    return stats
+
+def release_lease(db: Session, run_id: int, lease_id: str, error: str) -> int:
+    """
+    Devolve as ações ainda arrendadas como falha (retentável até etl_max_attempts)
+    """
+    db.rollback()
+    released = db.execute(
+        update(EtlCheckpoint).where(
+            EtlCheckpoint.run_id == run_id,
+            EtlCheckpoint.lease_id == lease_id,
+            EtlCheckpoint.status == EtlCheckpointStatus.IN_PROGRESS
+        ).values(
+            status=EtlCheckpointStatus.FAILED,
+            attempts=EtlCheckpoint.attempts + 1,
+            error=error
+        )
+    ).rowcount
+    db.commit()
+    return released
+
+@celery_app.task(name="etl.collect_shard")
+def collect_shard(run_id: int, shard: int, lease_id: str) -> Dict[str, int]:
+    """
+    Coleta as ações arrendadas de um shard.
+
+    Erros não escapam da tarefa: o callback do chord (finish_run) precisa rodar
+    mesmo quando um shard falha, senão a execução ficaria RUNNING para sempre.
+    """
+    db = SessionLocal()
+    try:
+        stats = run_async(_collect_shard(db, run_id, shard, lease_id))
+        logger.info(f"Coleta {run_id}, shard {shard}: {stats}")
+        return stats
+    except Exception as e:
+        logger.exception(f"Coleta {run_id}, shard {shard} falhou")
+        released = release_lease(db, run_id, lease_id, f"Falha no shard: {str(e)}")
+        return {"stored": 0, "unchanged": 0, "failed": released}
+    finally:
+        db.close()
+
+@celery_app.task(name="etl.finish_run")
+def finish_run(run_id: int) -> Dict[str, Any]:
+    """
+    Reenfileira ações com falhas ainda retentáveis; senão conclui a execução
+    (notas, rankings, alertas e retenção uma única vez para todo o universo)
+    """
+    db = SessionLocal()
+    try:
+        run = db.get(EtlRun, run_id)
+        if run is None or run.status == EtlRunStatus.FINISHED:
+            return {"run_id": run_id, "status": "finished"}
+
+        leases = claim_shards(db, run_id)
+        if leases:
+            logger.info(f"Coleta {run_id}: repetindo {len(leases)} shards com falhas")
+            dispatch_shards(run_id, leases)
+            return {"run_id": run_id, "status": "retrying", "shards": len(leases)}
+
+        # Shards de outro disparo ainda em coleta: o chord deles conclui a execução
+        in_progress = db.query(EtlCheckpoint.id).filter(
+            EtlCheckpoint.run_id == run_id,
+            EtlCheckpoint.status == EtlCheckpointStatus.IN_PROGRESS
+        ).first()
+        if in_progress:
+            return {"run_id": run_id, "status": "running"}
+
+        # Apenas um finish_run conclui a execução (UPDATE condicional)
+        claimed = db.query(EtlRun).filter(
+            EtlRun.id == run_id,
+            EtlRun.status == EtlRunStatus.RUNNING
+        ).update({EtlRun.status: EtlRunStatus.FINISHED, EtlRun.finished_at: datetime.now()})
+        db.commit()
+        if not claimed:
+            return {"run_id": run_id, "status": "finished"}
+
+        try:
+            run_async(finish_collection(db, DataProcessor(db)))
+        except Exception:
+            db.rollback()
+            db.query(EtlRun).filter(EtlRun.id == run_id).update({EtlRun.status: EtlRunStatus.RUNNING, EtlRun.finished_at: None})
+            db.commit()
+            raise
+
+        return {"run_id": run_id, "status": "finished"}
+    finally:
+        db.close()
@@ -0,0 +1,83 @@
+from typing import List, Optional
+import csv
+import re
+import logging
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.etl.http_client import get_http_client, rate_limiters
+from app.etl.parsers import parse_fundamentus_listing
+from app.etl.resilience import call_with_resilience
+from app.models.stock import Stock
+
+logger = logging.getLogger(__name__)
+
+# Ações e units negociadas na B3 (ex.: PETR4, TAEE11, B3SA3: a raiz pode ter dígitos);
+# ignora fracionário e BDRs fora do padrão
+TICKER_PATTERN = re.compile(r"^[A-Z][A-Z0-9]{3}(3|4|5|6|7|8|11)$")
+
+# Usada apenas se a descoberta falhar e o banco ainda estiver vazio
+DEFAULT_TICKERS = [
+    "PETR4", "VALE3", "ITUB4", "BBDC4", "ABEV3", "WEGE3", "MGLU3", "SUZB3", "RENT3", "LREN3"
+]
+
+def normalize_tickers(tickers) -> List[str]:
+    """
+    Tickers válidos em maiúsculas, sem repetição e na ordem recebida
+    """
+    normalized = (ticker.strip().upper() for ticker in tickers if ticker)
+    return list(dict.fromkeys(ticker for ticker in normalized if TICKER_PATTERN.match(ticker)))
+
+def load_tickers_csv(path: str) -> List[str]:
+    """
+    Tickers de um CSV local: coluna "ticker" se houver cabeçalho, senão a primeira coluna
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+
+    if not rows:
+        return []
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    if "ticker" in header:
+        column = header.index("ticker")
+        rows = rows[1:]
+    else:
+        column = 0
+
+    return normalize_tickers(row[column] for row in rows if len(row) > column)
+
+async def fetch_fundamentus_tickers() -> List[str]:
+    """
+    Tickers da página de resultados do Fundamentus (todas as ações listadas)
+    """
+    async def request():
+        await rate_limiters["fundamentus"].acquire()
+        response = await get_http_client().get(settings.etl_universe_url)
+        response.raise_for_status()
+        return response
+
+    # Mesmo disjuntor e novas tentativas das páginas de detalhes
+    response = await call_with_resilience("fundamentus", request)
+    return normalize_tickers(parse_fundamentus_listing(response.content))
+
+async def discover_tickers(db: Optional[Session] = None) -> List[str]:
+    """
+    Universo de ações a coletar.
+
+    Usa o CSV de ETL_TICKERS_CSV, se configurado, ou a listagem do Fundamentus.
+    Se a descoberta falhar, coleta as ações já cadastradas (ou a lista padrão).
+    """
+    try:
+        if settings.etl_tickers_csv:
+            tickers = load_tickers_csv(settings.etl_tickers_csv)
+        else:
+            tickers = await fetch_fundamentus_tickers()
+        if tickers:
+            logger.info(f"Universo de ações: {len(tickers)} tickers descobertos")
+            return tickers
+        logger.warning("Descoberta do universo de ações não retornou tickers")
+    except Exception as e:
+        logger.error(f"Erro ao descobrir o universo de ações: {str(e)}")
+
+    known = [ticker for (ticker,) in db.query(Stock.ticker).order_by(Stock.ticker)] if db is not None else []
+    return normalize_tickers(known) or list(DEFAULT_TICKERS)
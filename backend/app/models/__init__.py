@@ -3,6 +3,9 @@ from .stock import Stock
 from .portfolio import Portfolio, Transaction, Dividend
 from .strategy import UserStrategy, StrategyFilter, FilterIndicator, FilterOperator
 from .alert import Alert, AlertType, AlertStatus
+from .ranking import ArchetypeRanking, RankingState
+from .alert_archive import AlertArchive
+from .etl_checkpoint import EtlRun, EtlRunStatus, EtlCheckpoint, EtlCheckpointStatus
 from app.core.database import Base
 
-__all__ = ["Base", "User", "InvestorArchetype", "Stock", "Portfolio", "Transaction", "Dividend", "UserStrategy", "StrategyFilter", "FilterIndicator", "FilterOperator", "Alert", "AlertType", "AlertStatus"]
\ No newline at end of file
+__all__ = ["Base", "User", "InvestorArchetype", "Stock", "Portfolio", "Transaction", "Dividend", "UserStrategy", "StrategyFilter", "FilterIndicator", "FilterOperator", "Alert", "AlertType", "AlertStatus", "ArchetypeRanking", "RankingState", "AlertArchive", "EtlRun", "EtlRunStatus", "EtlCheckpoint", "EtlCheckpointStatus"]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, Enum, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -9,6 +9,7 @@ class AlertType(str, enum.Enum):
     PRICE_ALERT = "price_alert"
     DIVIDEND_ALERT = "dividend_alert"
     SCORE_ALERT = "score_alert"
+    DAILY_DIGEST = "daily_digest"
 
 class AlertStatus(str, enum.Enum):
     PENDING = "pending"
@@ -26,15 +27,22 @@ class Alert(Base):
     
     # Dados do alerta
     alert_type = Column(Enum(AlertType), nullable=False)
-    title = Column(String(200), nullable=False)
-    message = Column(Text, nullable=False)
     status = Column(Enum(AlertStatus), default=AlertStatus.PENDING)
     
+    # Texto renderizado na leitura a partir do template (ver app/services/alert_templates.py)
+    template_id = Column(String(32), nullable=True)
+    params = Column(JSON(none_as_null=True), nullable=True)  # parâmetros de texto do template (ex.: nome da estratégia)
+    
+    # Texto já renderizado: apenas alertas antigos sem template
+    title = Column(String(200), nullable=True)
+    message = Column(Text, nullable=True)
+    
     # Dados específicos do alerta
     stock_ticker = Column(String(20), nullable=True)
     stock_name = Column(String(200), nullable=True)
-    current_price = Column(String(20), nullable=True)
-    score = Column(String(10), nullable=True)
+    current_price = Column(Float, nullable=True)
+    score = Column(Float, nullable=True)  # 0-10
+    dividend_yield = Column(Float, nullable=True)  # %
     
     # Controle
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -45,3 +53,19 @@ class Alert(Base):
     user = relationship("User")
     strategy = relationship("UserStrategy")
     stock = relationship("Stock")
+    
+    # Índices dos padrões de acesso de alerts.py e alert_service.py
+    __table_args__ = (
+        # Listagem paginada por cursor (created_at, id) e resumo por status
+        Index("ix_alerts_user_created", "user_id", "created_at", "id"),
+        Index("ix_alerts_user_status_created", "user_id", "status", "created_at", "id"),
+        # Janela anti-spam por usuário (cobre stock_id e strategy_id no Postgres)
+        Index(
+            "ix_alerts_user_type_created", "user_id", "alert_type", "created_at",
+            postgresql_include=["stock_id", "strategy_id"]
+        ),
+        # Janela anti-spam da frota inteira (job após o ETL)
+        Index("ix_alerts_type_created", "alert_type", "created_at"),
+        # Seleção dos alertas antigos para arquivamento
+        Index("ix_alerts_status_created", "status", "created_at"),
+    )
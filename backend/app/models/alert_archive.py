@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class AlertArchive(Base):
+    """
+    Alertas antigos já lidos/descartados, agrupados por usuário e mês de criação.
+
+    payload guarda a lista de alertas em JSON comprimido com zlib
+    (ver app/services/alert_retention.py).
+    """
+    __tablename__ = "alert_archives"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String(7), nullable=False)  # mês de criação dos alertas: AAAA-MM
+    alert_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    
+    # Controle
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relacionamentos
+    user = relationship("User")
+    
+    __table_args__ = (
+        Index("ix_alert_archives_user_period", "user_id", "period"),
+    )
@@ -0,0 +1,74 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+class EtlRunStatus(str, enum.Enum):
+    RUNNING = "running"
+    FINISHED = "finished"
+
+class EtlCheckpointStatus(str, enum.Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"  # arrendada a um shard enfileirado ou em coleta
+    DONE = "done"
+    FAILED = "failed"
+
+class EtlRun(Base):
+    """
+    Execução da coleta completa do universo de ações, dividida em shards
+    """
+    __tablename__ = "etl_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(Enum(EtlRunStatus), nullable=False, default=EtlRunStatus.RUNNING)
+    total_tickers = Column(Integer, nullable=False)
+    shard_count = Column(Integer, nullable=False)
+    
+    # Controle
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Relacionamentos
+    checkpoints = relationship("EtlCheckpoint", back_populates="run")
+    
+    __table_args__ = (
+        # No máximo uma execução em andamento: disparos simultâneos retomam a mesma
+        Index(
+            "ix_etl_runs_single_running", "status", unique=True,
+            postgresql_where=text("status = 'RUNNING'"),
+            sqlite_where=text("status = 'RUNNING'")
+        ),
+    )
+
+class EtlCheckpoint(Base):
+    """
+    Progresso de cada ação em uma execução: a retomada coleta só o que não está DONE
+    nem arrendado a outra tarefa
+    """
+    __tablename__ = "etl_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("etl_runs.id"), nullable=False)
+    shard = Column(Integer, nullable=False)
+    ticker = Column(String(20), nullable=False)
+    status = Column(Enum(EtlCheckpointStatus), nullable=False, default=EtlCheckpointStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    
+    # Arrendamento: só a tarefa com este lease_id grava a ação até claimed_at + etl_shard_lease_seconds
+    lease_id = Column(String(32), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Controle
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relacionamentos
+    run = relationship("EtlRun", back_populates="checkpoints")
+    
+    __table_args__ = (
+        # Itens pendentes de um shard (retomada) e unicidade por execução
+        Index("ix_etl_checkpoints_run_shard_status", "run_id", "shard", "status"),
+        Index("ix_etl_checkpoints_run_ticker", "run_id", "ticker", unique=True),
+        Index("ix_etl_checkpoints_lease", "lease_id"),
+    )
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.user import InvestorArchetype
+
+class ArchetypeRanking(Base):
+    """
+    Ranking materializado por arquétipo, recalculado ao final do ETL
+    """
+    __tablename__ = "archetype_rankings"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    archetype = Column(Enum(InvestorArchetype), nullable=False)
+    rank = Column(Integer, nullable=False)  # 1 = melhor nota final
+    stock_id = Column(Integer, ForeignKey("stocks.id"), nullable=False)
+    final_score = Column(Float, nullable=False)  # 0-10, ponderada pelo arquétipo
+    
+    # Controle
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relacionamentos
+    stock = relationship("Stock")
+    
+    __table_args__ = (
+        Index("ix_archetype_rankings_archetype_rank", "archetype", "rank", unique=True),
+    )
+
+class RankingState(Base):
+    """
+    Versão do universo pontuado que gerou os rankings (linha única, id = 1).
+
+    Todo recálculo, completo ou incremental, incrementa universe_version na
+    mesma transação das notas; um processo cujos índices em memória foram
+    montados em outra versão sabe que outro processo alterou as notas.
+    """
+    __tablename__ = "ranking_state"
+    
+    id = Column(Integer, primary_key=True)
+    universe_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
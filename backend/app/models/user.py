@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Boolean
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, expression
 from app.core.database import Base
 import enum
 
@@ -29,6 +29,7 @@ class User(Base):
     # Configurações
     is_active = Column(String, default="true")
     is_verified = Column(String, default="false")
+    alert_digest_enabled = Column(Boolean, default=False, server_default=expression.false())  # um resumo por coleta em vez de um alerta por ação
     
     # Relacionamentos
     strategies = relationship("UserStrategy", back_populates="user")
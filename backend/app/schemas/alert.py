@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Any, Dict
 from app.models.alert import AlertType, AlertStatus
+from app.services.alert_templates import render_alert, format_price, format_score
 
 class AlertBase(BaseModel):
     alert_type: AlertType
@@ -25,12 +26,42 @@ class AlertResponse(AlertBase):
     strategy_id: Optional[int] = None
     stock_id: Optional[int] = None
     status: AlertStatus
+    params: Optional[Dict[str, Any]] = None
     created_at: datetime
     sent_at: Optional[datetime] = None
     read_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
+    
+    @model_validator(mode="before")
+    @classmethod
+    def render_template(cls, data: Any) -> Any:
+        """
+        Renderiza título e mensagem do template e formata preço e score gravados como números
+        """
+        if not isinstance(data, dict):
+            data = {
+                name: getattr(data, name, None)
+                for name in ("id", "user_id", "strategy_id", "stock_id", "alert_type", "status",
+                             "template_id", "params", "title", "message", "stock_ticker", "stock_name",
+                             "current_price", "score", "dividend_yield", "created_at", "sent_at", "read_at")
+            }
+        else:
+            data = dict(data)
+        
+        if data.get("template_id"):
+            data["title"], data["message"] = render_alert(
+                data["template_id"], data.get("params"), data.get("stock_ticker"), data.get("stock_name"),
+                data.get("current_price"), data.get("score"), data.get("dividend_yield")
+            )
+        
+        if not isinstance(data.get("current_price"), (str, type(None))):
+            data["current_price"] = format_price(data["current_price"])
+        if not isinstance(data.get("score"), (str, type(None))):
+            data["score"] = format_score(data["score"])
+        
+        return data
 
 class AlertSummary(BaseModel):
     total_alerts: int
@@ -54,3 +54,15 @@ class StrategyRecommendationResponse(BaseModel):
     strategy_description: Optional[str] = None
     generated_at: datetime
     total_found: int
+
+class StrategyPreviewRequest(BaseModel):
+    filters: List[StrategyFilterCreate]
+
+class FilterSelectivity(StrategyFilterBase):
+    matches: int
+    selectivity: float  # fração do universo que passa no filtro isolado
+
+class StrategyPreviewResponse(BaseModel):
+    total_stocks: int
+    total_matches: int
+    filters: List[FilterSelectivity]
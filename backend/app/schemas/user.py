@@ -17,6 +17,7 @@ class UserUpdate(BaseModel):
     investment_goal: Optional[str] = None
     investment_horizon: Optional[int] = None
     monthly_contribution: Optional[int] = None
+    alert_digest_enabled: Optional[bool] = None
 
 class UserInDB(UserBase):
     id: int
@@ -27,6 +28,7 @@ class UserInDB(UserBase):
     monthly_contribution: Optional[int] = None
     is_active: bool
     is_verified: bool
+    alert_digest_enabled: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -0,0 +1,220 @@
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import threading
+import time
+import logging
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.alert import Alert, AlertStatus
+
+logger = logging.getLogger(__name__)
+
+# Status que contam como "não lido" no badge do frontend
+UNREAD_STATUSES = (AlertStatus.PENDING, AlertStatus.SENT)
+
+class InMemoryCounterBackend:
+    """
+    Contadores por usuário no próprio processo, com expiração.
+
+    Cada worker tem sua cópia; a expiração limita por quanto tempo um worker
+    enxerga contagens desatualizadas por mudanças feitas em outro.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._data: Dict[int, Tuple[float, Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Dict[str, int]]:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[user_id]
+                return None
+            return dict(entry[1])
+
+    def set(self, user_id: int, counts: Dict[str, int]):
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl_seconds, dict(counts))
+
+    def increment(self, user_id: int, deltas: Dict[str, int], reset: Iterable[str] = ()):
+        """
+        Zera os campos de reset e soma os deltas, só se o usuário já estiver em cache
+        """
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return
+            counts = entry[1]
+            for field in reset:
+                counts[field] = 0
+            for field, delta in deltas.items():
+                counts[field] = counts.get(field, 0) + delta
+
+    def delete(self, user_id: int):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+class RedisCounterBackend:
+    """
+    Contadores por usuário em um hash Redis (compartilhado entre workers)
+    """
+
+    # Atualiza o hash apenas se ele existir, para nunca criar contagens parciais
+    INCREMENT_SCRIPT = """
+    if redis.call('exists', KEYS[1]) == 0 then
+        return 0
+    end
+    local resets = tonumber(ARGV[1])
+    for i = 2, resets + 1 do
+        redis.call('hset', KEYS[1], ARGV[i], 0)
+    end
+    for i = resets + 2, #ARGV, 2 do
+        redis.call('hincrby', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    return 1
+    """
+
+    def __init__(self, redis_url: str, ttl_seconds: int):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.ttl_seconds = ttl_seconds
+        self._increment = self.client.register_script(self.INCREMENT_SCRIPT)
+
+    def _key(self, user_id: int) -> str:
+        return f"alerts:counts:{user_id}"
+
+    def get(self, user_id: int) -> Optional[Dict[str, int]]:
+        counts = self.client.hgetall(self._key(user_id))
+        if not counts:
+            return None
+        return {field: int(value) for field, value in counts.items()}
+
+    def set(self, user_id: int, counts: Dict[str, int]):
+        key = self._key(user_id)
+        pipeline = self.client.pipeline()
+        pipeline.delete(key)
+        pipeline.hset(key, mapping=counts)
+        pipeline.expire(key, self.ttl_seconds)
+        pipeline.execute()
+
+    def increment(self, user_id: int, deltas: Dict[str, int], reset: Iterable[str] = ()):
+        reset = list(reset)
+        args = [len(reset), *reset]
+        for field, delta in deltas.items():
+            args.extend([field, delta])
+        self._increment(keys=[self._key(user_id)], args=args)
+
+    def delete(self, user_id: int):
+        self.client.delete(self._key(user_id))
+
+class AlertCounters:
+    """
+    Contagem de alertas por status e por usuário, mantida em cache.
+
+    Em caso de cache vazio a contagem vem de um único GROUP BY status; depois
+    disso as gravações de alertas atualizam o cache incrementalmente, após o commit.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def load_counts(self, db: Session, user_id: int) -> Dict[str, int]:
+        """
+        Conta os alertas do usuário por status (uma consulta) e atualiza o cache
+        """
+        counts = {status.value: 0 for status in AlertStatus}
+
+        rows = db.query(Alert.status, func.count(Alert.id)).filter(
+            Alert.user_id == user_id
+        ).group_by(Alert.status)
+
+        for status, count in rows:
+            if status is not None:
+                counts[status.value] = count
+
+        self._safe(self.backend.set, user_id, counts)
+        return counts
+
+    def get_counts(self, db: Session, user_id: int) -> Dict[str, int]:
+        """
+        Contagem por status vinda do cache; consulta o banco só quando não há cache
+        """
+        counts = self._safe(self.backend.get, user_id)
+        if counts is None:
+            counts = self.load_counts(db, user_id)
+        return counts
+
+    def record_inserted(self, rows: List[Dict[str, Any]]):
+        """
+        Soma alertas recém-gravados (linhas do BulkAlertWriter)
+        """
+        deltas_by_user: Dict[int, Dict[str, int]] = {}
+
+        for row in rows:
+            status = AlertStatus(row.get("status") or AlertStatus.PENDING)
+            deltas = deltas_by_user.setdefault(row["user_id"], {})
+            deltas[status.value] = deltas.get(status.value, 0) + 1
+
+        for user_id, deltas in deltas_by_user.items():
+            self._safe(self.backend.increment, user_id, deltas)
+
+    def record_transition(self, user_id: int, old_status: AlertStatus, new_status: AlertStatus):
+        if old_status != new_status:
+            self._safe(self.backend.increment, user_id, {old_status.value: -1, new_status.value: 1})
+
+    def record_deleted(self, user_id: int, status: AlertStatus):
+        self._safe(self.backend.increment, user_id, {status.value: -1})
+
+    def record_archived(self, user_id: int, deltas: Dict[str, int]):
+        """
+        Alertas movidos para alert_archives (deltas negativos por status)
+        """
+        self._safe(self.backend.increment, user_id, deltas)
+
+    def record_all_read(self, user_id: int, count: int):
+        """
+        Todos os não lidos passaram para READ
+        """
+        self._safe(
+            self.backend.increment, user_id,
+            {AlertStatus.READ.value: count},
+            [status.value for status in UNREAD_STATUSES]
+        )
+
+    def _safe(self, operation, *args):
+        """
+        Falhas do cache nunca derrubam a requisição: a contagem volta ao banco
+        """
+        try:
+            return operation(*args)
+        except Exception as e:
+            logger.warning(f"Cache de contadores de alerta indisponível: {str(e)}")
+            try:
+                self.backend.delete(args[0])
+            except Exception:
+                pass
+            return None
+
+def summarize_counts(counts: Dict[str, int]) -> Dict[str, int]:
+    """
+    Totais exibidos no resumo a partir da contagem por status
+    """
+    return {
+        "total_alerts": sum(counts.values()),
+        "unread_alerts": sum(counts.get(status.value, 0) for status in UNREAD_STATUSES),
+        "pending_alerts": counts.get(AlertStatus.PENDING.value, 0),
+    }
+
+def create_alert_counters() -> AlertCounters:
+    if settings.alert_counter_backend == "redis":
+        backend = RedisCounterBackend(settings.redis_url, settings.alert_counter_ttl_seconds)
+    else:
+        backend = InMemoryCounterBackend(settings.alert_counter_ttl_seconds)
+    return AlertCounters(backend)
+
+# Contadores compartilhados pelo processo (backend definido em ALERT_COUNTER_BACKEND)
+alert_counters = create_alert_counters()
@@ -0,0 +1,159 @@
+from typing import List, Dict, Any, Optional, Set
+from collections import defaultdict
+import logging
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.alert import AlertType
+from app.models.portfolio import Portfolio, PortfolioPosition
+from app.models.stock import Stock
+from app.services.alert_service import AlertService, ALERT_THRESHOLDS
+from app.services.stock_universe import get_stock_universe
+from app.services.strategy_matcher import FleetStrategyMatcher, strategy_mask_cache
+
+logger = logging.getLogger(__name__)
+
+class ThresholdCrossing:
+    """
+    Evento emitido quando uma ação cruza o limiar de um alerta (em qualquer direção)
+    """
+
+    def __init__(self, stock_id: int, alert_type: AlertType, is_above: bool, value: Optional[float]):
+        self.stock_id = stock_id
+        self.alert_type = alert_type
+        self.is_above = is_above  # True: passou a atender o limiar; False: deixou de atender
+        self.value = value
+
+    def __repr__(self) -> str:
+        direction = "acima" if self.is_above else "abaixo"
+        return f"<ThresholdCrossing {self.alert_type.value} stock={self.stock_id} {direction} ({self.value})>"
+
+def threshold_state(stock: Optional[Stock]) -> Dict[AlertType, bool]:
+    """
+    Para cada alerta de limiar, se a ação (qualificada) está acima dele
+    """
+    state = {}
+
+    for alert_type, (column, threshold) in ALERT_THRESHOLDS.items():
+        value = getattr(stock, column) if stock is not None else None
+        state[alert_type] = bool(stock is not None and stock.is_qualified and value is not None and value >= threshold)
+
+    return state
+
+def detect_threshold_crossings(stock: Stock, before: Dict[AlertType, bool]) -> List[ThresholdCrossing]:
+    """
+    Compara o estado anterior com o atual da ação e retorna os cruzamentos
+    """
+    after = threshold_state(stock)
+
+    return [
+        ThresholdCrossing(stock.id, alert_type, after[alert_type], getattr(stock, ALERT_THRESHOLDS[alert_type][0]))
+        for alert_type in ALERT_THRESHOLDS
+        if after[alert_type] != before[alert_type]
+    ]
+
+class AlertDispatcher:
+    """
+    Transforma cruzamentos de limiar em alertas para os usuários interessados.
+
+    Só cruzamentos para cima geram alerta. Os interessados em uma ação vêm de um
+    índice reverso ação -> usuários montado apenas para as ações que mudaram:
+    quem tem a ação na carteira e quem tem estratégia com notificação que a aprova.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.alert_service = AlertService(db)
+
+    def build_interest_index(self, stock_ids: List[int]) -> Dict[int, Set[int]]:
+        """
+        Índice reverso stock_id -> usuários interessados, restrito às ações informadas
+        """
+        index = defaultdict(set)
+
+        if not stock_ids:
+            return index
+
+        # Usuários com a ação em carteira
+        holders = self.db.query(PortfolioPosition.stock_id, Portfolio.user_id).join(
+            Portfolio, PortfolioPosition.portfolio_id == Portfolio.id
+        ).filter(
+            PortfolioPosition.stock_id.in_(stock_ids),
+            PortfolioPosition.quantity > 0
+        )
+        for stock_id, user_id in holders:
+            index[stock_id].add(user_id)
+
+        # Usuários cujas estratégias com notificação aprovam a ação
+        universe = get_stock_universe(self.db)
+        rows = {
+            stock_id: universe.id_index[stock_id]
+            for stock_id in stock_ids
+            if stock_id in universe.id_index
+        }
+        if rows:
+            # Máscaras em cache por versão do snapshot e updated_at: só linhas e estratégias alteradas são avaliadas
+            matcher = FleetStrategyMatcher(self.db)
+            owners = {}
+            versions = {}
+            for strategy_id, user_id, updated_at in matcher.load_strategy_versions():
+                owners[strategy_id] = user_id
+                versions[strategy_id] = updated_at
+
+            masks = strategy_mask_cache.masks(
+                universe, versions, lambda strategy_ids: matcher.load_strategies(strategy_ids=strategy_ids)
+            )
+
+            stock_ids_changed = np.array(list(rows.keys()))
+            positions = np.array(list(rows.values()))
+            for strategy_id, mask in masks.items():
+                for stock_id in stock_ids_changed[mask[positions]].tolist():
+                    index[stock_id].add(owners[strategy_id])
+
+        return index
+
+    def dispatch(self, crossings: List[ThresholdCrossing]) -> List[Dict[str, Any]]:
+        """
+        Cria (em lote, com um único commit) os alertas dos cruzamentos para cima
+        """
+        alerts_created = []
+        upward = [crossing for crossing in crossings if crossing.is_above]
+
+        if not upward:
+            return alerts_created
+
+        index = self.build_interest_index(sorted({crossing.stock_id for crossing in upward}))
+        user_ids = sorted(set().union(*index.values())) if index else []
+
+        if not user_ids:
+            return alerts_created
+
+        recent_keys = self.alert_service.load_recent_alert_keys(
+            user_ids, sorted({crossing.alert_type for crossing in upward}, key=lambda t: t.value)
+        )
+        universe = get_stock_universe(self.db)
+
+        for crossing in upward:
+            row = universe.id_index.get(crossing.stock_id)
+            if row is None:
+                continue
+            stock = universe.row(row)
+
+            for user_id in sorted(index.get(crossing.stock_id, ())):
+                key = (user_id, crossing.alert_type, crossing.stock_id)
+                if key in recent_keys:
+                    continue
+
+                alert = self.alert_service.add_alert(
+                    self.alert_service.threshold_alert_row(crossing.alert_type, user_id, stock)
+                )
+                if alert is not None:
+                    alerts_created.append(alert)
+                recent_keys.add(key)
+
+        alerts_created.extend(self.alert_service.commit_alerts())
+
+        logger.info(
+            f"Alertas por evento: {len(upward)} cruzamentos, "
+            f"{len(user_ids)} usuários interessados, {len(alerts_created)} alertas criados"
+        )
+        return alerts_created
@@ -0,0 +1,126 @@
+from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from datetime import datetime, timedelta
+from enum import Enum
+import json
+import zlib
+import logging
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.alert import Alert, AlertStatus
+from app.models.alert_archive import AlertArchive
+from app.services.alert_counters import alert_counters
+from app.services.alert_service import DEDUP_WINDOWS
+
+logger = logging.getLogger(__name__)
+
+# Só alertas já tratados pelo usuário saem da tabela quente
+ARCHIVABLE_STATUSES = (AlertStatus.READ, AlertStatus.DISMISSED)
+
+# Colunas de Alert guardadas no arquivo
+ARCHIVED_COLUMNS = [
+    "id", "strategy_id", "stock_id", "alert_type", "status", "template_id", "params",
+    "title", "message", "stock_ticker", "stock_name", "current_price", "score",
+    "dividend_yield", "created_at", "sent_at", "read_at",
+]
+
+def compress_alerts(rows: List[Dict[str, Any]]) -> bytes:
+    def default(value):
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        raise TypeError(f"Tipo não serializável: {type(value)}")
+
+    return zlib.compress(json.dumps(rows, default=default, separators=(",", ":")).encode())
+
+def decompress_alerts(payload: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(payload))
+
+class AlertRetentionService:
+    """
+    Separação quente/fria da tabela alerts.
+
+    Alertas lidos ou descartados mais antigos que alert_retention_days saem de
+    alerts e vão, comprimidos, para alert_archives (um registro por usuário e
+    mês de criação em cada execução). Assim a deduplicação e a listagem só
+    percorrem a janela recente. O prazo nunca é menor que a maior janela
+    anti-spam, para não liberar alertas duplicados.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.retention_days = max(settings.alert_retention_days, max(DEDUP_WINDOWS.values()).days)
+
+    def archive_old_alerts(self, now: Optional[datetime] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Move os alertas vencidos para o arquivo em lotes (um commit por lote)
+        """
+        batch_size = batch_size or settings.alert_archive_batch_size
+        cutoff = (now or datetime.now()) - timedelta(days=self.retention_days)
+        columns = [getattr(Alert, name) for name in ARCHIVED_COLUMNS]
+        stats = {"alerts_archived": 0, "archives_created": 0}
+        last_id = 0
+
+        while True:
+            rows = self.db.query(Alert.user_id, *columns).filter(
+                Alert.status.in_(ARCHIVABLE_STATUSES),
+                Alert.created_at < cutoff,
+                Alert.id > last_id
+            ).order_by(Alert.id).limit(batch_size).all()
+
+            if not rows:
+                break
+
+            last_id = rows[-1].id
+            groups = defaultdict(list)
+            archived_by_user = defaultdict(lambda: defaultdict(int))
+
+            for row in rows:
+                data = row._asdict()
+                user_id = data.pop("user_id")
+                groups[(user_id, row.created_at.strftime("%Y-%m"))].append(data)
+                archived_by_user[user_id][row.status.value] -= 1
+
+            self.db.execute(insert(AlertArchive), [
+                {
+                    "user_id": user_id,
+                    "period": period,
+                    "alert_count": len(alerts),
+                    "payload": compress_alerts(alerts)
+                }
+                for (user_id, period), alerts in groups.items()
+            ])
+            self.db.execute(delete(Alert).where(Alert.id.in_([row.id for row in rows])))
+            self.db.commit()
+
+            # Contadores em cache deixam de contar os alertas arquivados
+            for user_id, deltas in archived_by_user.items():
+                alert_counters.record_archived(user_id, deltas)
+
+            stats["alerts_archived"] += len(rows)
+            stats["archives_created"] += len(groups)
+
+            if len(rows) < batch_size:
+                break
+
+        if stats["alerts_archived"]:
+            logger.info(
+                f"Retenção de alertas: {stats['alerts_archived']} alertas anteriores a "
+                f"{cutoff:%Y-%m-%d} arquivados em {stats['archives_created']} blocos"
+            )
+        return stats
+
+    def get_archived_alerts(self, user_id: int, period: str) -> List[Dict[str, Any]]:
+        """
+        Alertas arquivados de um usuário em um mês (AAAA-MM), do mais recente para o mais antigo
+        """
+        archives = self.db.query(AlertArchive.payload).filter(
+            AlertArchive.user_id == user_id,
+            AlertArchive.period == period
+        )
+
+        alerts = [alert for (payload,) in archives for alert in decompress_alerts(payload)]
+        alerts.sort(key=lambda alert: (alert["created_at"], alert["id"]), reverse=True)
+        return alerts
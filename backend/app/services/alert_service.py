@@ -1,178 +1,402 @@
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Tuple
+import logging
 from app.models.alert import Alert, AlertType, AlertStatus
 from app.models.strategy import UserStrategy
-from app.models.stock import Stock
 from app.models.user import User
 from app.services.scoring_engine import ScoringEngine
+from app.services.stock_universe import get_stock_universe
+from app.services.strategy_matcher import FleetStrategyMatcher
+from app.services.alert_writer import BulkAlertWriter
+from app.services.alert_counters import alert_counters
+from app.services.alert_stream import publish_alerts
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Janela anti-spam por tipo de alerta
+DEDUP_WINDOWS = {
+    AlertType.STRATEGY_MATCH: timedelta(hours=24),
+    AlertType.SCORE_ALERT: timedelta(days=7),
+    AlertType.DIVIDEND_ALERT: timedelta(days=30),
+}
+
+# Limiar (coluna, valor mínimo) que dispara cada alerta de ação qualificada
+ALERT_THRESHOLDS = {
+    AlertType.SCORE_ALERT: ("final_score", 8.0),
+    AlertType.DIVIDEND_ALERT: ("dividend_yield", 6.0),  # critério de Bazin
+}
+
+# Campos de cada ocorrência guardados no params de um resumo (DAILY_DIGEST)
+DIGEST_MATCH_FIELDS = (
+    "strategy_id", "stock_id", "stock_ticker", "stock_name", "current_price", "score", "dividend_yield"
+)
+
+def threshold_mask(universe, alert_type: AlertType) -> np.ndarray:
+    """
+    Máscara das ações qualificadas acima do limiar do alerta
+    """
+    column, threshold = ALERT_THRESHOLDS[alert_type]
+    return (universe.column(column) >= threshold) & universe.is_qualified
 
 class AlertService:
     def __init__(self, db: Session):
         self.db = db
         self.scoring_engine = ScoringEngine(db)
-    
-    def check_strategy_alerts(self, user: User) -> List[Alert]:
+        self.writer = BulkAlertWriter(db)
+        # Ocorrências dos usuários em modo resumo, acumuladas até o commit
+        self.digest_rows: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self._digest_user_ids: Optional[Set[int]] = None
+
+    def load_recent_alert_keys(self, user_ids: Optional[List[int]] = None, alert_types: Optional[List[AlertType]] = None) -> Set[Tuple]:
+        """
+        Chaves (user_id, alert_type, alvo) dos alertas ainda dentro da janela anti-spam.
+
+        O alvo é o strategy_id para alertas de estratégia e o stock_id para os demais.
+        Uma única consulta substitui um SELECT ... LIMIT 1 por ação verificada.
+        """
+        now = datetime.now()
+        alert_types = alert_types or list(DEDUP_WINDOWS)
+
+        query = self.db.query(Alert.user_id, Alert.alert_type, Alert.stock_id, Alert.strategy_id).filter(
+            or_(*[
+                and_(Alert.alert_type == alert_type, Alert.created_at >= now - DEDUP_WINDOWS[alert_type])
+                for alert_type in alert_types
+            ])
+        )
+
+        if user_ids is not None:
+            query = query.filter(Alert.user_id.in_(user_ids))
+
+        recent_keys = set()
+        for user_id, alert_type, stock_id, strategy_id in query:
+            target = strategy_id if alert_type == AlertType.STRATEGY_MATCH else stock_id
+            recent_keys.add((user_id, alert_type, target))
+
+        # Ocorrências agrupadas em resumos contam como alertas já enviados;
+        # a janela de cada tipo é avaliada no próprio SELECT
+        windows = [
+            (alert_type, (Alert.created_at >= now - DEDUP_WINDOWS[alert_type]).label(alert_type.name))
+            for alert_type in alert_types
+        ]
+        digests = self.db.query(Alert.user_id, Alert.params, *[column for _, column in windows]).filter(
+            Alert.alert_type == AlertType.DAILY_DIGEST,
+            Alert.created_at >= now - max(DEDUP_WINDOWS[alert_type] for alert_type in alert_types)
+        )
+
+        if user_ids is not None:
+            digests = digests.filter(Alert.user_id.in_(user_ids))
+
+        for digest in digests:
+            active = {alert_type.value for alert_type, _ in windows if getattr(digest, alert_type.name)}
+            for match in (digest.params or {}).get("matches", []):
+                if match.get("alert_type") in active:
+                    alert_type = AlertType(match["alert_type"])
+                    target = match.get("strategy_id") if alert_type == AlertType.STRATEGY_MATCH else match.get("stock_id")
+                    recent_keys.add((digest.user_id, alert_type, target))
+
+        return recent_keys
+
+    def digest_user_ids(self) -> Set[int]:
+        """
+        Usuários que recebem um único resumo por coleta (lido uma vez por instância)
+        """
+        if self._digest_user_ids is None:
+            self._digest_user_ids = {
+                user_id for (user_id,) in self.db.query(User.id).filter(User.alert_digest_enabled == True)
+            }
+        return self._digest_user_ids
+
+    def add_alert(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Enfileira o alerta no writer, ou guarda a ocorrência para o resumo do
+        usuário em modo resumo (nesse caso retorna None; o resumo sai no commit)
+        """
+        if row["user_id"] in self.digest_user_ids():
+            self.digest_rows[row["user_id"]].append(row)
+            return None
+        return self.writer.add(row)
+
+    def check_strategy_alerts(self, user: User, recent_keys: Optional[Set[Tuple]] = None, commit: bool = True) -> List[Dict[str, Any]]:
         """
         Verifica se alguma ação atende aos critérios das estratégias do usuário
         e cria alertas se necessário
         """
-        alerts_created = []
-        
+        matcher = FleetStrategyMatcher(self.db)
+
         # Buscar estratégias ativas do usuário com notificações habilitadas
-        strategies = self.db.query(UserStrategy).filter(
-            UserStrategy.user_id == user.id,
-            UserStrategy.is_active == True,
-            UserStrategy.is_notification_enabled == True
-        ).all()
-        
+        strategies = matcher.load_strategies(user_ids=[user.id])
+
+        if recent_keys is None and strategies:
+            recent_keys = self.load_recent_alert_keys([user.id], [AlertType.STRATEGY_MATCH])
+
+        return self._create_strategy_alerts(matcher, strategies, recent_keys, commit)
+
+    def check_all_strategy_alerts(self) -> List[Dict[str, Any]]:
+        """
+        Verifica as estratégias de todos os usuários em uma única passada (job após o ETL)
+        """
+        matcher = FleetStrategyMatcher(self.db)
+        strategies = matcher.load_strategies()
+        recent_keys = self.load_recent_alert_keys(alert_types=[AlertType.STRATEGY_MATCH]) if strategies else set()
+
+        alerts_created = self._create_strategy_alerts(matcher, strategies, recent_keys)
+
+        logger.info(
+            f"Alertas de estratégia: {len(alerts_created)} criados, "
+            f"{matcher.stats.get('strategies', 0)} estratégias, "
+            f"{matcher.stats.get('distinct_clauses', 0)} cláusulas distintas"
+        )
+        return alerts_created
+
+    def _create_strategy_alerts(self, matcher: FleetStrategyMatcher, strategies: List[UserStrategy], recent_keys: Set[Tuple], commit: bool = True) -> List[Dict[str, Any]]:
+        """
+        Cria um alerta por estratégia com pelo menos uma ação aprovada
+        """
+        alerts_created = []
+
         if not strategies:
             return alerts_created
-        
-        # Buscar todas as ações
-        stocks = self.db.query(Stock).all()
-        
+
+        # Ignorar estratégias com alerta recente (evitar spam)
+        strategies = [
+            s for s in strategies
+            if (s.user_id, AlertType.STRATEGY_MATCH, s.id) not in recent_keys
+        ]
+
+        # Snapshot colunar das ações (sem carregar objetos ORM)
+        universe = get_stock_universe(self.db)
+
+        # Cada cláusula distinta é avaliada uma única vez para todas as estratégias
+        bitmaps = matcher.match(strategies, universe)
+
         for strategy in strategies:
-            # Verificar se já existe um alerta recente para esta estratégia
-            recent_alert = self.db.query(Alert).filter(
-                Alert.user_id == user.id,
-                Alert.strategy_id == strategy.id,
-                Alert.alert_type == AlertType.STRATEGY_MATCH,
-                Alert.created_at >= datetime.now() - timedelta(hours=24)  # Evitar spam
-            ).first()
-            
-            if recent_alert:
-                continue
-            
-            # Aplicar a estratégia personalizada
-            qualified_stocks = self.scoring_engine.apply_custom_strategy(stocks, strategy)
-            
-            if qualified_stocks:
+            index = matcher.first_match(bitmaps[strategy.id], universe)
+
+            if index is not None:
                 # Criar alerta para a primeira ação que atende aos critérios
-                top_stock = qualified_stocks[0]
-                
-                alert = Alert(
-                    user_id=user.id,
+                top_stock = universe.row(index)
+
+                alert = self.add_alert(dict(
+                    user_id=strategy.user_id,
                     strategy_id=strategy.id,
                     stock_id=top_stock.id,
                     alert_type=AlertType.STRATEGY_MATCH,
-                    title=f"🎯 Nova oportunidade na estratégia '{strategy.name}'",
-                    message=f"A ação {top_stock.ticker} ({top_stock.name}) atende aos critérios da sua estratégia '{strategy.name}'. Score: {top_stock.final_score:.1f}/10",
+                    template_id="strategy_match",
+                    params={"strategy_name": strategy.name},
                     stock_ticker=top_stock.ticker,
                     stock_name=top_stock.name,
-                    current_price=f"R$ {top_stock.current_price:.2f}" if top_stock.current_price else None,
-                    score=f"{top_stock.final_score:.1f}" if top_stock.final_score else None,
+                    current_price=top_stock.current_price,
+                    score=top_stock.final_score,
+                    dividend_yield=top_stock.dividend_yield,
                     status=AlertStatus.PENDING
-                )
-                
-                self.db.add(alert)
-                alerts_created.append(alert)
-        
-        self.db.commit()
+                ))
+                if alert is not None:
+                    alerts_created.append(alert)
+                recent_keys.add((strategy.user_id, AlertType.STRATEGY_MATCH, strategy.id))
+
+        if commit:
+            alerts_created.extend(self.commit_alerts())
         return alerts_created
-    
-    def check_score_alerts(self, user: User) -> List[Alert]:
+
+    def check_score_alerts(self, user: User, recent_keys: Optional[Set[Tuple]] = None, commit: bool = True) -> List[Dict[str, Any]]:
         """
         Verifica se alguma ação atingiu um score alto e cria alertas
         """
         alerts_created = []
-        
+
         # Buscar ações com score alto (>= 8.0) que não foram alertadas recentemente
-        high_score_stocks = self.db.query(Stock).filter(
-            Stock.final_score >= 8.0,
-            Stock.is_qualified == True
-        ).all()
-        
-        for stock in high_score_stocks:
+        universe = get_stock_universe(self.db)
+        high_score_rows = np.flatnonzero(threshold_mask(universe, AlertType.SCORE_ALERT))
+
+        if len(high_score_rows) == 0:
+            return alerts_created
+
+        if recent_keys is None:
+            recent_keys = self.load_recent_alert_keys([user.id], [AlertType.SCORE_ALERT])
+
+        for index in high_score_rows:
+            stock = universe.row(index)
+
             # Verificar se já existe um alerta recente para esta ação
-            recent_alert = self.db.query(Alert).filter(
-                Alert.user_id == user.id,
-                Alert.stock_id == stock.id,
-                Alert.alert_type == AlertType.SCORE_ALERT,
-                Alert.created_at >= datetime.now() - timedelta(days=7)  # Evitar spam
-            ).first()
-            
-            if recent_alert:
+            if (user.id, AlertType.SCORE_ALERT, stock.id) in recent_keys:
                 continue
-            
-            alert = Alert(
-                user_id=user.id,
-                stock_id=stock.id,
-                alert_type=AlertType.SCORE_ALERT,
-                title=f"⭐ Ação com score excelente: {stock.ticker}",
-                message=f"A ação {stock.ticker} ({stock.name}) atingiu um score de {stock.final_score:.1f}/10! Considere analisar esta oportunidade.",
-                stock_ticker=stock.ticker,
-                stock_name=stock.name,
-                current_price=f"R$ {stock.current_price:.2f}" if stock.current_price else None,
-                score=f"{stock.final_score:.1f}",
-                status=AlertStatus.PENDING
-            )
-            
-            self.db.add(alert)
-            alerts_created.append(alert)
-        
-        self.db.commit()
+
+            alert = self.add_alert(self.score_alert_row(user.id, stock))
+            if alert is not None:
+                alerts_created.append(alert)
+            recent_keys.add((user.id, AlertType.SCORE_ALERT, stock.id))
+
+        if commit:
+            alerts_created.extend(self.commit_alerts())
         return alerts_created
-    
-    def check_dividend_alerts(self, user: User) -> List[Alert]:
+
+    def check_dividend_alerts(self, user: User, recent_keys: Optional[Set[Tuple]] = None, commit: bool = True) -> List[Dict[str, Any]]:
         """
         Verifica ações com dividend yield alto e cria alertas
         """
         alerts_created = []
-        
+
         # Buscar ações com dividend yield >= 6% (critério de Bazin)
-        high_dividend_stocks = self.db.query(Stock).filter(
-            Stock.dividend_yield >= 6.0,
-            Stock.is_qualified == True
-        ).all()
-        
-        for stock in high_dividend_stocks:
+        universe = get_stock_universe(self.db)
+        high_dividend_rows = np.flatnonzero(threshold_mask(universe, AlertType.DIVIDEND_ALERT))
+
+        if len(high_dividend_rows) == 0:
+            return alerts_created
+
+        if recent_keys is None:
+            recent_keys = self.load_recent_alert_keys([user.id], [AlertType.DIVIDEND_ALERT])
+
+        for index in high_dividend_rows:
+            stock = universe.row(index)
+
             # Verificar se já existe um alerta recente para esta ação
-            recent_alert = self.db.query(Alert).filter(
-                Alert.user_id == user.id,
-                Alert.stock_id == stock.id,
-                Alert.alert_type == AlertType.DIVIDEND_ALERT,
-                Alert.created_at >= datetime.now() - timedelta(days=30)  # Evitar spam
-            ).first()
-            
-            if recent_alert:
+            if (user.id, AlertType.DIVIDEND_ALERT, stock.id) in recent_keys:
                 continue
-            
-            alert = Alert(
-                user_id=user.id,
-                stock_id=stock.id,
-                alert_type=AlertType.DIVIDEND_ALERT,
-                title=f"💰 Alto dividend yield: {stock.ticker}",
-                message=f"A ação {stock.ticker} ({stock.name}) tem um dividend yield de {stock.dividend_yield:.1f}%! Atende ao critério de Bazin (6%).",
-                stock_ticker=stock.ticker,
-                stock_name=stock.name,
-                current_price=f"R$ {stock.current_price:.2f}" if stock.current_price else None,
-                score=f"{stock.final_score:.1f}" if stock.final_score else None,
-                status=AlertStatus.PENDING
-            )
-            
-            self.db.add(alert)
-            alerts_created.append(alert)
-        
-        self.db.commit()
+
+            alert = self.add_alert(self.dividend_alert_row(user.id, stock))
+            if alert is not None:
+                alerts_created.append(alert)
+            recent_keys.add((user.id, AlertType.DIVIDEND_ALERT, stock.id))
+
+        if commit:
+            alerts_created.extend(self.commit_alerts())
         return alerts_created
-    
-    def generate_all_alerts(self, user: User) -> List[Alert]:
+
+    def score_alert_row(self, user_id: int, stock) -> Dict[str, Any]:
+        """
+        Linha de alerta de score alto para uma ação do snapshot
+        """
+        return dict(
+            user_id=user_id,
+            stock_id=stock.id,
+            alert_type=AlertType.SCORE_ALERT,
+            template_id="score_alert",
+            stock_ticker=stock.ticker,
+            stock_name=stock.name,
+            current_price=stock.current_price,
+            score=stock.final_score,
+            dividend_yield=stock.dividend_yield,
+            status=AlertStatus.PENDING
+        )
+
+    def dividend_alert_row(self, user_id: int, stock) -> Dict[str, Any]:
+        """
+        Linha de alerta de dividend yield alto para uma ação do snapshot
+        """
+        return dict(
+            user_id=user_id,
+            stock_id=stock.id,
+            alert_type=AlertType.DIVIDEND_ALERT,
+            template_id="dividend_alert",
+            stock_ticker=stock.ticker,
+            stock_name=stock.name,
+            current_price=stock.current_price,
+            score=stock.final_score,
+            dividend_yield=stock.dividend_yield,
+            status=AlertStatus.PENDING
+        )
+
+    def threshold_alert_row(self, alert_type: AlertType, user_id: int, stock) -> Dict[str, Any]:
+        """
+        Linha de alerta do tipo de limiar informado
+        """
+        if alert_type == AlertType.SCORE_ALERT:
+            return self.score_alert_row(user_id, stock)
+        return self.dividend_alert_row(user_id, stock)
+
+    def generate_all_alerts(self, user: User) -> List[Dict[str, Any]]:
         """
         Gera todos os tipos de alertas para o usuário
         """
+        return self.generate_alerts_for_users([user])
+
+    def generate_alerts_for_users(self, users: List[User]) -> List[Dict[str, Any]]:
+        """
+        Gera todos os tipos de alertas para um lote de usuários.
+
+        Os alertas recentes do lote inteiro são lidos em uma única consulta e
+        todas as fases gravam em um único commit.
+        """
         all_alerts = []
-        
-        # Verificar alertas de estratégia
-        strategy_alerts = self.check_strategy_alerts(user)
-        all_alerts.extend(strategy_alerts)
-        
-        # Verificar alertas de score
-        score_alerts = self.check_score_alerts(user)
-        all_alerts.extend(score_alerts)
-        
-        # Verificar alertas de dividend yield
-        dividend_alerts = self.check_dividend_alerts(user)
-        all_alerts.extend(dividend_alerts)
-        
+
+        if not users:
+            return all_alerts
+
+        user_ids = [user.id for user in users]
+        recent_keys = self.load_recent_alert_keys(user_ids)
+
+        # Verificar alertas de estratégia (todas as estratégias do lote de uma vez)
+        matcher = FleetStrategyMatcher(self.db)
+        strategies = matcher.load_strategies(user_ids=user_ids)
+        all_alerts.extend(self._create_strategy_alerts(matcher, strategies, recent_keys, commit=False))
+
+        for user in users:
+            # Verificar alertas de score
+            score_alerts = self.check_score_alerts(user, recent_keys, commit=False)
+            all_alerts.extend(score_alerts)
+
+            # Verificar alertas de dividend yield
+            dividend_alerts = self.check_dividend_alerts(user, recent_keys, commit=False)
+            all_alerts.extend(dividend_alerts)
+
+        all_alerts.extend(self.commit_alerts())
         return all_alerts
+
+    def digest_row(self, user_id: int, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Alerta de resumo com todas as ocorrências de uma coleta (tickers em params)
+        """
+        matches = [
+            {
+                "alert_type": row["alert_type"].value,
+                **{field: row.get(field) for field in DIGEST_MATCH_FIELDS},
+                **(row.get("params") or {}),
+            }
+            for row in rows
+        ]
+        tickers = list(dict.fromkeys(row["stock_ticker"] for row in rows if row.get("stock_ticker")))
+
+        return dict(
+            user_id=user_id,
+            alert_type=AlertType.DAILY_DIGEST,
+            template_id="daily_digest",
+            params={"count": len(rows), "tickers": ", ".join(tickers), "matches": matches},
+            status=AlertStatus.PENDING
+        )
+
+    def flush_digests(self) -> List[Dict[str, Any]]:
+        """
+        Enfileira um resumo por usuário em modo resumo (uma única ocorrência vira alerta comum)
+        """
+        digests = []
+
+        for user_id, rows in self.digest_rows.items():
+            row = rows[0] if len(rows) == 1 else self.digest_row(user_id, rows)
+            digests.append(self.writer.add(row))
+
+        self.digest_rows.clear()
+        return digests
+
+    def commit_alerts(self) -> List[Dict[str, Any]]:
+        """
+        Grava os alertas acumulados no writer e confirma a transação.
+
+        Retorna os resumos gravados, que não aparecem no retorno dos métodos check_*.
+        """
+        digests = self.flush_digests()
+        inserted = self.writer.flush()
+        self.db.commit()
+        
+        # Contadores de não lidos e push em tempo real só depois do commit
+        rows = self.writer.pop_flushed()
+        alert_counters.record_inserted(rows)
+        publish_alerts(rows)
+
+        if inserted:
+            logger.info(f"{inserted} alertas gravados")
+
+        return digests
@@ -0,0 +1,209 @@
+from typing import List, Dict, Any, Optional, Set, Tuple
+from contextlib import asynccontextmanager
+from collections import defaultdict
+import asyncio
+import threading
+import queue
+import json
+import logging
+from app.core.config import settings
+from app.schemas.alert import AlertResponse
+
+logger = logging.getLogger(__name__)
+
+# Canal Redis compartilhado pelos workers
+REDIS_CHANNEL = "alerts:stream"
+
+# Mensagens aguardando envio ao Redis (acima disso os eventos são descartados)
+OUTBOX_SIZE = 1000
+
+def serialize_alert(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Linha de alerta (BulkAlertWriter) no mesmo formato JSON da API de alertas
+    """
+    return AlertResponse.model_validate(row).model_dump(mode="json")
+
+class InProcessAlertBroker:
+    """
+    Pub/sub de alertas dentro do processo: cada conexão do stream tem uma fila.
+
+    publish pode ser chamado de código síncrono (inclusive de outras threads);
+    a entrega na fila acontece no event loop dono da conexão.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int):
+        """
+        Registra uma conexão do usuário enquanto o bloco estiver ativo
+        """
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+
+        with self._lock:
+            self._subscribers[user_id].add(subscriber)
+
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(subscriber)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+    def subscriber_count(self, user_id: Optional[int] = None) -> int:
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def has_audience(self, user_id: int) -> bool:
+        """
+        Se vale a pena montar eventos para o usuário (há conexão neste processo)
+        """
+        return self.subscriber_count(user_id) > 0
+
+    def publish(self, events_by_user: Dict[int, List[Dict[str, Any]]]):
+        self.deliver(events_by_user)
+
+    def deliver(self, events_by_user: Dict[int, List[Dict[str, Any]]]):
+        """
+        Entrega os eventos às conexões deste processo (usuários sem conexão são ignorados)
+        """
+        with self._lock:
+            targets = [
+                (subscriber, events_by_user[user_id])
+                for user_id in events_by_user
+                for subscriber in self._subscribers.get(user_id, ())
+            ]
+
+        for (loop, queue), events in targets:
+            for event in events:
+                try:
+                    loop.call_soon_threadsafe(self._put, queue, event)
+                except RuntimeError:
+                    # Event loop da conexão já foi encerrado
+                    break
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: Dict[str, Any]):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Cliente lento: descarta o evento (o contador de não lidos continua correto)
+            pass
+
+class RedisAlertBroker(InProcessAlertBroker):
+    """
+    Pub/sub via Redis para vários workers.
+
+    publish envia os eventos ao canal; cada worker com conexões abertas escuta
+    o canal e entrega localmente apenas aos usuários conectados nele. O envio
+    é feito por uma thread própria, então quem publica (inclusive código
+    síncrono rodando no event loop) nunca espera pelo Redis.
+    """
+
+    def __init__(self, redis_url: str, queue_size: int):
+        super().__init__(queue_size)
+        import redis
+
+        self.redis_url = redis_url
+        self.client = redis.Redis.from_url(redis_url)
+        self._listeners: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+        self._outbox: "queue.Queue[str]" = queue.Queue(maxsize=OUTBOX_SIZE)
+        self._sender: Optional[threading.Thread] = None
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int):
+        self._ensure_listener()
+        async with super().subscribe(user_id) as queue:
+            yield queue
+
+    def has_audience(self, user_id: int) -> bool:
+        # As conexões podem estar em qualquer worker
+        return True
+
+    def publish(self, events_by_user: Dict[int, List[Dict[str, Any]]]):
+        """
+        Enfileira a mensagem para a thread de envio, sem bloquear quem publica
+        """
+        message = json.dumps({str(user_id): events for user_id, events in events_by_user.items()})
+        self._ensure_sender()
+        try:
+            self._outbox.put_nowait(message)
+        except queue.Full:
+            logger.warning("Fila de envio do stream de alertas cheia; eventos descartados")
+
+    def _ensure_sender(self):
+        # Criada sob demanda: também recria a thread em processos filhos (fork dos workers Celery)
+        with self._lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(target=self._send_loop, name="alert-stream-sender", daemon=True)
+                self._sender.start()
+
+    def _send_loop(self):
+        while True:
+            message = self._outbox.get()
+            try:
+                self.client.publish(REDIS_CHANNEL, message)
+            except Exception as e:
+                logger.warning(f"Falha ao publicar alertas no Redis: {str(e)}")
+            finally:
+                self._outbox.task_done()
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        task = self._listeners.get(loop)
+        if task is None or task.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.redis_url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(REDIS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        payload = json.loads(message["data"])
+                        self.deliver({int(user_id): events for user_id, events in payload.items()})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Conexão com o Redis do stream de alertas perdida: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+def create_alert_broker() -> InProcessAlertBroker:
+    if settings.alert_stream_backend == "redis":
+        return RedisAlertBroker(settings.redis_url, settings.alert_stream_queue_size)
+    return InProcessAlertBroker(settings.alert_stream_queue_size)
+
+# Broker compartilhado pelo processo (backend definido em ALERT_STREAM_BACKEND)
+alert_broker = create_alert_broker()
+
+def publish_alerts(rows: List[Dict[str, Any]]):
+    """
+    Envia alertas recém-confirmados às conexões abertas dos respectivos usuários
+    """
+    events_by_user: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+
+    for row in rows:
+        if alert_broker.has_audience(row["user_id"]):
+            events_by_user[row["user_id"]].append({"event": "alert", "data": serialize_alert(row)})
+
+    if not events_by_user:
+        return
+
+    try:
+        alert_broker.publish(dict(events_by_user))
+    except Exception as e:
+        # Falha no push nunca desfaz alertas já gravados
+        logger.warning(f"Falha ao publicar alertas no stream: {str(e)}")
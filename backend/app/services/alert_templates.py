@@ -0,0 +1,64 @@
+from typing import Dict, Any, Optional, Tuple
+
+class AlertTemplate:
+    """
+    Título e mensagem de um tipo de alerta, renderizados na leitura.
+
+    Os textos usam str.format com os parâmetros do alerta já formatados
+    (ticker, name, score, price, dividend_yield) mais os de params.
+    """
+
+    def __init__(self, title: str, message: str):
+        self.title = title
+        self.message = message
+
+    def render(self, values: Dict[str, Any]) -> Tuple[str, str]:
+        return self.title.format(**values), self.message.format(**values)
+
+# Um id novo deve ser criado ao mudar um texto, para não alterar alertas antigos
+ALERT_TEMPLATES = {
+    "strategy_match": AlertTemplate(
+        title="🎯 Nova oportunidade na estratégia '{strategy_name}'",
+        message="A ação {ticker} ({name}) atende aos critérios da sua estratégia '{strategy_name}'. Score: {score}/10"
+    ),
+    "score_alert": AlertTemplate(
+        title="⭐ Ação com score excelente: {ticker}",
+        message="A ação {ticker} ({name}) atingiu um score de {score}/10! Considere analisar esta oportunidade."
+    ),
+    "dividend_alert": AlertTemplate(
+        title="💰 Alto dividend yield: {ticker}",
+        message="A ação {ticker} ({name}) tem um dividend yield de {dividend_yield}%! Atende ao critério de Bazin (6%)."
+    ),
+    "daily_digest": AlertTemplate(
+        title="📬 Resumo de alertas: {count} oportunidades",
+        message="Novas oportunidades para as suas estratégias e critérios: {tickers}."
+    ),
+}
+
+def format_price(value: Optional[float]) -> Optional[str]:
+    return f"R$ {value:.2f}" if value else None
+
+def format_score(value: Optional[float]) -> Optional[str]:
+    return f"{value:.1f}" if value is not None else None
+
+def render_alert(
+    template_id: str,
+    params: Optional[Dict[str, Any]],
+    stock_ticker: Optional[str],
+    stock_name: Optional[str],
+    current_price: Optional[float],
+    score: Optional[float],
+    dividend_yield: Optional[float]
+) -> Tuple[str, str]:
+    """
+    Título e mensagem do alerta a partir do template e dos parâmetros gravados
+    """
+    values = {
+        "ticker": stock_ticker or "-",
+        "name": stock_name or "-",
+        "price": format_price(current_price) or "-",
+        "score": format_score(score) or "-",
+        "dividend_yield": format_score(dividend_yield) or "-",
+        **(params or {}),
+    }
+    return ALERT_TEMPLATES[template_id].render(values)
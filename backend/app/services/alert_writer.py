@@ -0,0 +1,76 @@
+from typing import List, Dict, Any, Optional
+import logging
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.alert import Alert
+
+logger = logging.getLogger(__name__)
+
+class BulkAlertWriter:
+    """
+    Acumula alertas como dicionários simples e grava em lote.
+
+    Cada lote de até chunk_size linhas vira um único INSERT executado com
+    executemany, sem criar objetos ORM nem passar pelo unit of work da sessão.
+    O id e o created_at gerados pelo banco são devolvidos (RETURNING) e gravados
+    nos próprios dicionários. A gravação participa da transação da sessão: o
+    commit fica com quem chama.
+    """
+
+    def __init__(self, db: Session, model=Alert, chunk_size: Optional[int] = None):
+        self.db = db
+        self.model = model
+        self.chunk_size = chunk_size or settings.alert_insert_chunk_size
+        self.pending: List[Dict[str, Any]] = []
+        self.inserted = 0
+        # Linhas gravadas desde o último pop_flushed (ainda não confirmadas)
+        self.flushed: List[Dict[str, Any]] = []
+        self.returning = [
+            getattr(model, name) for name in ("id", "created_at") if hasattr(model, name)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Enfileira um alerta; grava automaticamente quando o lote enche
+        """
+        self.pending.append(row)
+
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+        return row
+
+    def flush(self) -> int:
+        """
+        Grava os alertas pendentes e retorna quantos foram inseridos nesta chamada
+        """
+        inserted = 0
+
+        for start in range(0, len(self.pending), self.chunk_size):
+            chunk = self.pending[start:start + self.chunk_size]
+            result = self.db.execute(
+                insert(self.model).returning(*self.returning, sort_by_parameter_order=True), chunk
+            )
+            for row, generated in zip(chunk, result):
+                row.update(generated._mapping)
+            inserted += len(chunk)
+            self.flushed.extend(chunk)
+
+        self.pending = []
+        self.inserted += inserted
+
+        if inserted:
+            logger.debug(f"{inserted} linhas inseridas em {self.model.__tablename__}")
+
+        return inserted
+
+    def pop_flushed(self) -> List[Dict[str, Any]]:
+        """
+        Retorna e esquece as linhas gravadas desde a última chamada (usar após o commit)
+        """
+        rows, self.flushed = self.flushed, []
+        return rows
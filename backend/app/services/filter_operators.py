@@ -0,0 +1,24 @@
+from typing import List, Optional
+from app.models.strategy import FilterOperator
+
+# Comparações numéricas dos filtros: valem para valores da ação, colunas do snapshot (NumPy) e colunas SQL
+NUMERIC_COMPARISONS = {
+    FilterOperator.GREATER_THAN: lambda column, value: column > value,
+    FilterOperator.LESS_THAN: lambda column, value: column < value,
+    FilterOperator.EQUALS: lambda column, value: column == value,
+    FilterOperator.GREATER_EQUAL: lambda column, value: column >= value,
+    FilterOperator.LESS_EQUAL: lambda column, value: column <= value,
+}
+
+def filter_text_values(operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> Optional[List[str]]:
+    """
+    Textos comparados pelo filtro (lista do IN/NOT_IN ou texto do EQUALS), ou None se o filtro é numérico.
+
+    Filtros com textos passam quando o valor da ação está na lista (fora dela,
+    no NOT_IN); os demais usam NUMERIC_COMPARISONS com value_numeric.
+    """
+    if operator in (FilterOperator.IN, FilterOperator.NOT_IN):
+        return value_string.split(',') if value_string else []
+    if operator == FilterOperator.EQUALS and value_numeric is None:
+        return [value_string]
+    return None
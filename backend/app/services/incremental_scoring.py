@@ -0,0 +1,257 @@
+from typing import List, Dict, Optional, Tuple
+from bisect import bisect_left, bisect_right, insort
+import math
+import threading
+import numpy as np
+from app.models.user import InvestorArchetype
+from app.services.ranking_engine import RankingEngine
+from app.services.scoring_engine import ARCHETYPE_WEIGHTS, archetype_final_score
+
+# Indicadores ranqueados por percentil (True = menor valor recebe maior percentil)
+RANKED_INDICATORS = {
+    "pe_ratio": True,
+    "pb_ratio": True,
+    "dividend_yield": False,
+    "dividend_cagr_5y": False,
+    "roe": False,
+    "net_margin": False,
+    "debt_to_ebitda": True,
+}
+
+# Todos os campos que influenciam as notas parciais
+SCORE_INPUTS = list(RANKED_INDICATORS) + ["payout_ratio"]
+
+class SortedIndicatorIndex:
+    """
+    Índice ordenado de (valor, stock_id) de um indicador, mantido com bisect
+    """
+
+    def __init__(self, reverse: bool = False):
+        self.reverse = reverse
+        self.entries: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def build(self, pairs: List[Tuple[float, int]]):
+        self.entries = sorted(pairs)
+
+    def insert(self, value: float, stock_id: int):
+        insort(self.entries, (value, stock_id))
+
+    def remove(self, value: float, stock_id: int):
+        position = bisect_left(self.entries, (value, stock_id))
+        del self.entries[position]
+
+    def percentile(self, value: float) -> float:
+        """
+        Percentil por rank médio, idêntico a RankingEngine.percentile_ranks
+        """
+        n = len(self.entries)
+        first = bisect_left(self.entries, (value, -math.inf))
+        last = bisect_right(self.entries, (value, math.inf))
+
+        rank = (first + 1 + last) / 2.0
+        if self.reverse:
+            rank = n + 1 - rank
+
+        return rank / n
+
+    def stock_ids_between(self, low: float, high: float) -> List[int]:
+        """
+        Ações com valor no intervalo fechado [low, high] (as únicas cujo rank pode mudar)
+        """
+        first = bisect_left(self.entries, (low, -math.inf))
+        last = bisect_right(self.entries, (high, math.inf))
+        return [stock_id for _, stock_id in self.entries[first:last]]
+
+class IncrementalScorer:
+    """
+    Mantém os percentis e as notas parciais das ações qualificadas de forma incremental.
+
+    Quando os indicadores de uma única ação mudam, apenas os ranks entre o valor
+    antigo e o novo são recalculados, em vez de reordenar o universo inteiro.
+    """
+
+    def __init__(self):
+        self.ranking_engine = RankingEngine()
+        self.indexes = {name: SortedIndicatorIndex(reverse) for name, reverse in RANKED_INDICATORS.items()}
+        self.values: Dict[int, Dict[str, Optional[float]]] = {}
+        self.scores: Dict[int, Dict[str, Optional[float]]] = {}
+        # Ranking de cada arquétipo: chaves (-nota final, stock_id) ordenadas e a nota final por ação
+        self.rankings: Dict[InvestorArchetype, List[Tuple[float, int]]] = {}
+        self.final_scores: Dict[InvestorArchetype, Dict[int, float]] = {}
+        self.is_ready = False
+        # Versão do universo (RankingState) que os índices refletem; None = ainda não gravada
+        self.version: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def build(self, stocks: List[object]):
+        """
+        Monta os índices a partir das ações qualificadas já pontuadas (a versão é atribuída após o commit)
+        """
+        self.version = None
+        self.values = {
+            stock.id: {name: getattr(stock, name) for name in SCORE_INPUTS}
+            for stock in stocks
+        }
+        self.scores = {
+            stock.id: {
+                "value": stock.value_score,
+                "income": stock.income_score,
+                "quality": stock.quality_score
+            }
+            for stock in stocks
+        }
+
+        for name, index in self.indexes.items():
+            index.build([
+                (values[name], stock_id)
+                for stock_id, values in self.values.items()
+                if values[name] is not None
+            ])
+
+        self.final_scores = {}
+        self.rankings = {}
+        for archetype, weight in ARCHETYPE_WEIGHTS.items():
+            finals = {}
+            for stock_id, scores in self.scores.items():
+                final = archetype_final_score(weight, scores["value"], scores["income"], scores["quality"])
+                if final is not None:
+                    finals[stock_id] = final
+            self.final_scores[archetype] = finals
+            self.rankings[archetype] = sorted((-final, stock_id) for stock_id, final in finals.items())
+
+        self.is_ready = True
+
+    def update(self, stock: object) -> Optional[Dict[int, Dict[str, float]]]:
+        """
+        Aplica a mudança de uma ação e retorna as novas notas das ações que mudaram.
+
+        Retorna None quando a mudança altera o tamanho de alguma coluna (ação entrou
+        ou saiu da peneira grossa, ou um indicador passou a ser/deixou de ser nulo):
+        nesse caso todos os percentis mudam e é preciso um recálculo completo.
+        """
+        was_qualified = stock.id in self.values
+        if not was_qualified and not stock.is_qualified:
+            return {}
+        if was_qualified != bool(stock.is_qualified):
+            return None
+
+        old_values = self.values[stock.id]
+        new_values = {name: getattr(stock, name) for name in SCORE_INPUTS}
+
+        for name in RANKED_INDICATORS:
+            if (old_values[name] is None) != (new_values[name] is None):
+                return None
+
+        affected = {stock.id}
+        for name, index in self.indexes.items():
+            old_value = old_values[name]
+            new_value = new_values[name]
+            if old_value is None or old_value == new_value:
+                continue
+
+            index.remove(old_value, stock.id)
+            index.insert(new_value, stock.id)
+            affected.update(index.stock_ids_between(min(old_value, new_value), max(old_value, new_value)))
+
+        self.values[stock.id] = new_values
+
+        changed = {}
+        for stock_id, scores in self._calculate_scores(sorted(affected)).items():
+            if scores != self.scores[stock_id]:
+                self.scores[stock_id] = scores
+                changed[stock_id] = scores
+
+        return changed
+
+    def _calculate_scores(self, stock_ids: List[int]) -> Dict[int, Dict[str, Optional[float]]]:
+        """
+        Recalcula as notas parciais de algumas ações a partir dos índices ordenados
+        """
+        percentiles = {}
+        for name, index in self.indexes.items():
+            percentiles[name] = np.array([
+                np.nan if self.values[stock_id][name] is None else index.percentile(self.values[stock_id][name])
+                for stock_id in stock_ids
+            ], dtype=np.float64)
+
+        payout_ratios = np.array([
+            np.nan if self.values[stock_id]["payout_ratio"] is None else self.values[stock_id]["payout_ratio"]
+            for stock_id in stock_ids
+        ], dtype=np.float64)
+
+        value = self.ranking_engine.value_scores(percentiles["pe_ratio"], percentiles["pb_ratio"])
+        income = self.ranking_engine.income_scores(
+            percentiles["dividend_yield"],
+            percentiles["dividend_cagr_5y"],
+            payout_ratios
+        )
+        quality = self.ranking_engine.quality_scores(
+            percentiles["roe"],
+            percentiles["net_margin"],
+            percentiles["debt_to_ebitda"]
+        )
+
+        scores = {}
+        for i, stock_id in enumerate(stock_ids):
+            scores[stock_id] = {
+                "value": None if np.isnan(value[i]) else float(value[i]),
+                "income": None if np.isnan(income[i]) else float(income[i]),
+                "quality": None if np.isnan(quality[i]) else float(quality[i])
+            }
+
+        return scores
+
+    def rerank(self, changed: Dict[int, Dict[str, Optional[float]]]) -> Dict[InvestorArchetype, Tuple[int, int, List[Tuple[int, float]]]]:
+        """
+        Aplica as notas alteradas aos rankings por arquétipo e retorna só o trecho afetado.
+
+        Para cada arquétipo com alguma ação alterada: (primeira posição, última posição,
+        [(stock_id, nota final)] a partir da primeira posição). O trecho vai da menor à
+        maior posição antiga ou nova das ações alteradas; fora dele cada posição mantém a
+        mesma ação. Se o ranking encolheu, as posições do trecho além da lista sobram.
+        """
+        windows = {}
+        for archetype, weight in ARCHETYPE_WEIGHTS.items():
+            keys = self.rankings[archetype]
+            finals = self.final_scores[archetype]
+            old_length = len(keys)
+
+            old_keys = [(-finals.pop(stock_id), stock_id) for stock_id in changed if stock_id in finals]
+            positions = [bisect_left(keys, key) for key in old_keys]
+            for key in old_keys:
+                del keys[bisect_left(keys, key)]
+
+            new_keys = []
+            for stock_id, scores in changed.items():
+                final = archetype_final_score(weight, scores["value"], scores["income"], scores["quality"])
+                if final is not None:
+                    finals[stock_id] = final
+                    new_keys.append((-final, stock_id))
+                    insort(keys, new_keys[-1])
+            positions.extend(bisect_left(keys, key) for key in new_keys)
+
+            if not positions:
+                continue
+
+            first = min(positions)
+            last = max(positions)
+            if len(keys) != old_length:
+                # Entrada ou saída de ação desloca todas as posições até o fim do ranking
+                last = max(last, max(len(keys), old_length) - 1)
+
+            windows[archetype] = (
+                first + 1,
+                last + 1,
+                [(stock_id, -negative_final) for negative_final, stock_id in keys[first:last + 1]]
+            )
+
+        return windows
+
+# Estado incremental do processo (reconstruído a cada recálculo completo ou quando a versão no banco muda)
+_scorer = IncrementalScorer()
+
+def get_incremental_scorer() -> IncrementalScorer:
+    return _scorer
@@ -0,0 +1,143 @@
+from typing import List, Dict, Any
+import numpy as np
+
+# Indicadores numéricos usados pelo sistema de pontuação
+SCORING_INDICATORS = [
+    "pe_ratio",
+    "pb_ratio",
+    "dividend_yield",
+    "dividend_cagr_5y",
+    "payout_ratio",
+    "roe",
+    "net_margin",
+    "debt_to_ebitda",
+]
+
+class RankingEngine:
+    """
+    Motor de ranking colunar - calcula percentis e notas parciais com NumPy
+    """
+
+    def build_columns(self, stocks: List[Any], indicators: List[str] = SCORING_INDICATORS) -> Dict[str, np.ndarray]:
+        """
+        Converte uma lista de ações em colunas float64 (None vira NaN)
+        """
+        columns = {}
+
+        for indicator in indicators:
+            values = [getattr(stock, indicator, None) for stock in stocks]
+            columns[indicator] = np.array(
+                [np.nan if value is None else value for value in values],
+                dtype=np.float64
+            )
+
+        return columns
+
+    def percentile_ranks(self, values: np.ndarray, reverse: bool = False) -> np.ndarray:
+        """
+        Calcula percentis por rank médio (empates recebem a média das posições).
+
+        Valores NaN são ignorados no ranking e recebem percentil NaN.
+        Com reverse=True, o menor valor recebe o maior percentil.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        percentiles = np.full(values.shape, np.nan)
+
+        valid = ~np.isnan(values)
+        n = int(valid.sum())
+        if n == 0:
+            return percentiles
+
+        ranks = self._average_ranks(values[valid])
+        if reverse:
+            ranks = n + 1 - ranks
+
+        percentiles[valid] = ranks / n
+        return percentiles
+
+    def _average_ranks(self, values: np.ndarray) -> np.ndarray:
+        """
+        Rank médio (1..n) em uma única ordenação por argsort
+        """
+        n = len(values)
+        order = np.argsort(values, kind="mergesort")
+        sorted_values = values[order]
+
+        # Início de cada grupo de valores iguais
+        is_group_start = np.empty(n, dtype=bool)
+        is_group_start[0] = True
+        np.not_equal(sorted_values[1:], sorted_values[:-1], out=is_group_start[1:])
+
+        group_ids = np.cumsum(is_group_start)
+        boundaries = np.append(np.flatnonzero(is_group_start), n)
+
+        # Rank médio do grupo = média entre a primeira e a última posição (1-based)
+        group_ranks = (boundaries[group_ids - 1] + 1 + boundaries[group_ids]) / 2.0
+
+        ranks = np.empty(n, dtype=np.float64)
+        ranks[order] = group_ranks
+        return ranks
+
+    def value_scores(self, pe_percentiles: np.ndarray, pb_percentiles: np.ndarray) -> np.ndarray:
+        """
+        Nota de Valor (0-10) a partir dos percentis de P/L e P/VPA
+        """
+        pe_score = pe_percentiles * 5  # 0-5
+        pb_score = pb_percentiles * 5  # 0-5
+        return (pe_score + pb_score) / 2
+
+    def income_scores(self, dy_percentiles: np.ndarray, cagr_percentiles: np.ndarray, payout_ratios: np.ndarray) -> np.ndarray:
+        """
+        Nota de Renda (0-10) a partir dos percentis de DY e CAGR e do payout
+        """
+        dy_score = dy_percentiles * 4  # 0-4
+        cagr_bonus = np.where(np.isnan(cagr_percentiles), 0.0, cagr_percentiles * 2)  # 0-2
+
+        # Bônus por consistência (payout < 80% vale 2, payout < 100% vale 1)
+        has_payout = ~np.isnan(payout_ratios) & (payout_ratios != 0)
+        consistency_bonus = np.select(
+            [has_payout & (payout_ratios < 80), has_payout & (payout_ratios < 100)],
+            [2.0, 1.0],
+            default=0.0
+        )
+
+        return np.minimum(10, dy_score + cagr_bonus + consistency_bonus)
+
+    def quality_scores(self, roe_percentiles: np.ndarray, margin_percentiles: np.ndarray, debt_percentiles: np.ndarray) -> np.ndarray:
+        """
+        Nota de Qualidade (0-10) a partir dos percentis de ROE, margem e dívida
+        """
+        roe_score = roe_percentiles * 4  # 0-4
+        margin_score = margin_percentiles * 3  # 0-3
+        debt_score = debt_percentiles * 3  # 0-3
+        return np.minimum(10, roe_score + margin_score + debt_score)
+
+    def calculate_sub_scores(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Calcula as notas de valor, renda e qualidade para todas as linhas.
+
+        Linhas sem os indicadores necessários recebem NaN.
+        """
+        percentiles = {
+            "pe_ratio": self.percentile_ranks(columns["pe_ratio"], reverse=True),
+            "pb_ratio": self.percentile_ranks(columns["pb_ratio"], reverse=True),
+            "dividend_yield": self.percentile_ranks(columns["dividend_yield"]),
+            "dividend_cagr_5y": self.percentile_ranks(columns["dividend_cagr_5y"]),
+            "roe": self.percentile_ranks(columns["roe"]),
+            "net_margin": self.percentile_ranks(columns["net_margin"]),
+            "debt_to_ebitda": self.percentile_ranks(columns["debt_to_ebitda"], reverse=True),
+        }
+
+        return {
+            "value": self.value_scores(percentiles["pe_ratio"], percentiles["pb_ratio"]),
+            "income": self.income_scores(
+                percentiles["dividend_yield"],
+                percentiles["dividend_cagr_5y"],
+                columns["payout_ratio"]
+            ),
+            "quality": self.quality_scores(
+                percentiles["roe"],
+                percentiles["net_margin"],
+                percentiles["debt_to_ebitda"]
+            ),
+        }
@@ -1,9 +1,28 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
 import numpy as np
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, Query
 from app.models.stock import Stock
 from app.models.user import InvestorArchetype
 from app.models.strategy import UserStrategy, FilterOperator
+from app.services.ranking_engine import RankingEngine, SCORING_INDICATORS
+from app.services.stock_universe import StockUniverse
+from app.services.strategy_compiler import strategy_compiler
+from app.services.filter_operators import NUMERIC_COMPARISONS, filter_text_values
+
+# Pesos por arquétipo (R3.3)
+ARCHETYPE_WEIGHTS = {
+    InvestorArchetype.CONSTRUTOR_RENDA: {"value": 0.2, "income": 0.6, "quality": 0.2},
+    InvestorArchetype.CACADOR_VALOR: {"value": 0.6, "income": 0.2, "quality": 0.2},
+    InvestorArchetype.SOCIO_PACIENTE: {"value": 0.4, "income": 0.3, "quality": 0.3}
+}
+
+def archetype_final_score(weight: Dict[str, float], value: Optional[float], income: Optional[float], quality: Optional[float]) -> Optional[float]:
+    """
+    Nota final de uma ação para um arquétipo (mesma conta de calculate_archetype_rankings); None se faltar nota parcial
+    """
+    if value is None or income is None or quality is None:
+        return None
+    return round(value * weight["value"] + income * weight["income"] + quality * weight["quality"], 2)
 
 class ScoringEngine:
     """
@@ -12,6 +31,7 @@ class ScoringEngine:
     
     def __init__(self, db: Session):
         self.db = db
+        self.ranking_engine = RankingEngine()
     
     def apply_gross_filter(self, stocks: List[Stock]) -> List[Stock]:
         """
@@ -61,132 +81,87 @@ class ScoringEngine:
         if not qualified_stocks:
             return qualified_stocks
         
+        # Extrair os indicadores em colunas uma única vez
+        columns = self.ranking_engine.build_columns(qualified_stocks)
+        
         # Calcular notas de valor (Graham)
-        self._calculate_value_scores(qualified_stocks)
+        self._calculate_value_scores(qualified_stocks, columns)
         
         # Calcular notas de renda (Bazin/Barsi)
-        self._calculate_income_scores(qualified_stocks)
+        self._calculate_income_scores(qualified_stocks, columns)
         
         # Calcular notas de qualidade
-        self._calculate_quality_scores(qualified_stocks)
+        self._calculate_quality_scores(qualified_stocks, columns)
         
         return qualified_stocks
     
-    def _calculate_value_scores(self, stocks: List[Stock]):
+    def _calculate_value_scores(self, stocks: List[Stock], columns: Dict[str, np.ndarray]):
         """
         Nota de Valor baseada em P/L e P/VPA (quanto mais baixos, maior a nota)
         """
-        pe_ratios = [s.pe_ratio for s in stocks if s.pe_ratio is not None]
-        pb_ratios = [s.pb_ratio for s in stocks if s.pb_ratio is not None]
+        # Normalizar P/L e P/VPA (inverter: menor múltiplo = maior nota)
+        pe_percentiles = self.ranking_engine.percentile_ranks(columns["pe_ratio"], reverse=True)
+        pb_percentiles = self.ranking_engine.percentile_ranks(columns["pb_ratio"], reverse=True)
         
-        if not pe_ratios or not pb_ratios:
-            return
-        
-        # Normalizar P/L (inverter: menor P/L = maior nota)
-        pe_percentiles = self._calculate_percentiles(pe_ratios, reverse=True)
-        
-        # Normalizar P/VPA (inverter: menor P/VPA = maior nota)
-        pb_percentiles = self._calculate_percentiles(pb_ratios, reverse=True)
-        
-        for i, stock in enumerate(stocks):
-            if stock.pe_ratio is not None and stock.pb_ratio is not None:
-                pe_score = pe_percentiles[i] * 5  # 0-5
-                pb_score = pb_percentiles[i] * 5  # 0-5
-                stock.value_score = (pe_score + pb_score) / 2
+        scores = self.ranking_engine.value_scores(pe_percentiles, pb_percentiles)
+        self._assign_scores(stocks, "value_score", scores)
     
-    def _calculate_income_scores(self, stocks: List[Stock]):
+    def _calculate_income_scores(self, stocks: List[Stock], columns: Dict[str, np.ndarray]):
         """
         Nota de Renda baseada em Dividend Yield, CAGR e consistência
         """
-        dividend_yields = [s.dividend_yield for s in stocks if s.dividend_yield is not None]
-        cagrs = [s.dividend_cagr_5y for s in stocks if s.dividend_cagr_5y is not None]
-        
-        if not dividend_yields:
-            return
-        
-        # Normalizar Dividend Yield
-        dy_percentiles = self._calculate_percentiles(dividend_yields)
+        dy_percentiles = self.ranking_engine.percentile_ranks(columns["dividend_yield"])
+        cagr_percentiles = self.ranking_engine.percentile_ranks(columns["dividend_cagr_5y"])
         
-        # Normalizar CAGR (se disponível)
-        cagr_percentiles = []
-        if cagrs:
-            cagr_percentiles = self._calculate_percentiles(cagrs)
-        
-        for i, stock in enumerate(stocks):
-            if stock.dividend_yield is not None:
-                dy_score = dy_percentiles[i] * 4  # 0-4
-                
-                # Adicionar bônus por CAGR se disponível
-                cagr_bonus = 0
-                if cagrs and i < len(cagr_percentiles):
-                    cagr_bonus = cagr_percentiles[i] * 2  # 0-2
-                
-                # Bônus por consistência (payout < 80%)
-                consistency_bonus = 0
-                if stock.payout_ratio and stock.payout_ratio < 80:
-                    consistency_bonus = 2
-                elif stock.payout_ratio and stock.payout_ratio < 100:
-                    consistency_bonus = 1
-                
-                stock.income_score = min(10, dy_score + cagr_bonus + consistency_bonus)
+        scores = self.ranking_engine.income_scores(dy_percentiles, cagr_percentiles, columns["payout_ratio"])
+        self._assign_scores(stocks, "income_score", scores)
     
-    def _calculate_quality_scores(self, stocks: List[Stock]):
+    def _calculate_quality_scores(self, stocks: List[Stock], columns: Dict[str, np.ndarray]):
         """
         Nota de Qualidade baseada em ROE, Margem Líquida e baixo endividamento
         """
-        roes = [s.roe for s in stocks if s.roe is not None]
-        margins = [s.net_margin for s in stocks if s.net_margin is not None]
-        debts = [s.debt_to_ebitda for s in stocks if s.debt_to_ebitda is not None]
-        
-        if not roes or not margins or not debts:
-            return
-        
-        # Normalizar ROE
-        roe_percentiles = self._calculate_percentiles(roes)
-        
-        # Normalizar Margem Líquida
-        margin_percentiles = self._calculate_percentiles(margins)
+        roe_percentiles = self.ranking_engine.percentile_ranks(columns["roe"])
+        margin_percentiles = self.ranking_engine.percentile_ranks(columns["net_margin"])
         
         # Normalizar Dívida (inverter: menor dívida = maior nota)
-        debt_percentiles = self._calculate_percentiles(debts, reverse=True)
+        debt_percentiles = self.ranking_engine.percentile_ranks(columns["debt_to_ebitda"], reverse=True)
         
-        for i, stock in enumerate(stocks):
-            if all([stock.roe is not None, stock.net_margin is not None, stock.debt_to_ebitda is not None]):
-                roe_score = roe_percentiles[i] * 4  # 0-4
-                margin_score = margin_percentiles[i] * 3  # 0-3
-                debt_score = debt_percentiles[i] * 3  # 0-3
-                
-                stock.quality_score = min(10, roe_score + margin_score + debt_score)
+        scores = self.ranking_engine.quality_scores(roe_percentiles, margin_percentiles, debt_percentiles)
+        self._assign_scores(stocks, "quality_score", scores)
     
-    def _calculate_percentiles(self, values: List[float], reverse: bool = False) -> List[float]:
+    def _assign_scores(self, stocks: List[Stock], attribute: str, scores: np.ndarray):
         """
-        Calcula percentis para normalização
+        Grava as notas calculadas nas ações (NaN = dados insuficientes, mantém o valor atual)
+        """
+        for stock, score in zip(stocks, scores.tolist()):
+            if not np.isnan(score):
+                setattr(stock, attribute, score)
+    
+    def calculate_universe_scores(self, universe: StockUniverse, mask: np.ndarray = None) -> Dict[str, np.ndarray]:
         """
-        if not values:
-            return []
+        Calcula as notas parciais direto sobre o snapshot colunar.
+
+        Por padrão considera as ações qualificadas; linhas fora da máscara recebem NaN.
+        """
+        if mask is None:
+            mask = universe.is_qualified
         
-        sorted_values = sorted(values, reverse=reverse)
-        percentiles = []
+        columns = {name: universe.column(name)[mask] for name in SCORING_INDICATORS}
+        sub_scores = self.ranking_engine.calculate_sub_scores(columns)
         
-        for value in values:
-            rank = sorted_values.index(value) + 1
-            percentile = rank / len(sorted_values)
-            percentiles.append(percentile)
+        scores = {}
+        for name, values in sub_scores.items():
+            full = np.full(len(universe), np.nan)
+            full[mask] = values
+            scores[name] = full
         
-        return percentiles
+        return scores
     
     def calculate_final_scores(self, stocks: List[Stock], archetype: InvestorArchetype) -> List[Stock]:
         """
         R3.3 - Ponderação Dinâmica baseada no arquétipo do usuário
         """
-        # Pesos por arquétipo
-        weights = {
-            InvestorArchetype.CONSTRUTOR_RENDA: {"value": 0.2, "income": 0.6, "quality": 0.2},
-            InvestorArchetype.CACADOR_VALOR: {"value": 0.6, "income": 0.2, "quality": 0.2},
-            InvestorArchetype.SOCIO_PACIENTE: {"value": 0.4, "income": 0.3, "quality": 0.3}
-        }
-        
-        weight = weights.get(archetype, weights[InvestorArchetype.SOCIO_PACIENTE])
+        weight = ARCHETYPE_WEIGHTS.get(archetype, ARCHETYPE_WEIGHTS[InvestorArchetype.SOCIO_PACIENTE])
         
         for stock in stocks:
             if all([stock.value_score is not None, stock.income_score is not None, stock.quality_score is not None]):
@@ -199,6 +174,34 @@ class ScoringEngine:
         
         return stocks
     
+    def calculate_archetype_rankings(self, stock_ids: List[int], sub_scores: Dict[str, np.ndarray]) -> Dict[InvestorArchetype, List[Tuple[int, float]]]:
+        """
+        Calcula nota final e ordem de ranking para todos os arquétipos de uma vez.
+
+        Retorna, por arquétipo, a lista (stock_id, nota final) do melhor para o pior.
+        """
+        value = np.asarray(sub_scores["value"], dtype=np.float64)
+        income = np.asarray(sub_scores["income"], dtype=np.float64)
+        quality = np.asarray(sub_scores["quality"], dtype=np.float64)
+        valid = ~(np.isnan(value) | np.isnan(income) | np.isnan(quality))
+        ids = np.asarray(stock_ids)[valid]
+        
+        rankings = {}
+        for archetype, weight in ARCHETYPE_WEIGHTS.items():
+            final = (
+                value[valid] * weight["value"] +
+                income[valid] * weight["income"] +
+                quality[valid] * weight["quality"]
+            )
+            # Mesmo arredondamento de calculate_final_scores
+            final = np.array([round(score, 2) for score in final.tolist()], dtype=np.float64)
+            
+            # Maior nota primeiro; empates pelo id da ação (mesma ordem mantida por IncrementalScorer)
+            order = np.lexsort((ids, -final))
+            rankings[archetype] = list(zip(ids[order].tolist(), final[order].tolist()))
+        
+        return rankings
+    
     def apply_diversification_bonus(self, stocks: List[Stock], user_portfolio: Dict[str, float]) -> List[Stock]:
         """
         R3.4 - Bônus de Diversificação
@@ -258,30 +261,41 @@ class ScoringEngine:
         
         return qualified_stocks
     
+    def match_custom_strategy(self, universe: StockUniverse, strategy: UserStrategy) -> np.ndarray:
+        """
+        Aplica os filtros de uma estratégia sobre o snapshot colunar.
+
+        Usa a versão compilada (e cacheada) da estratégia; retorna uma máscara
+        booleana alinhada com as linhas do snapshot.
+        """
+        return strategy_compiler.get(strategy).evaluate(universe)
+    
+    def query_custom_strategy(self, strategy: UserStrategy) -> Optional[Query]:
+        """
+        Consulta SQL que retorna apenas as ações aprovadas pela estratégia.
+
+        Retorna None quando algum filtro não tem tradução para SQL; nesse caso
+        use match_custom_strategy sobre o snapshot em memória.
+        """
+        conditions = strategy_compiler.get(strategy).sql_conditions()
+        if conditions is None:
+            return None
+        
+        return self.db.query(Stock).filter(*conditions).order_by(Stock.id)
+    
     def _apply_filter(self, stock_value: Any, filter_obj) -> bool:
         """
         Aplica um filtro individual a um valor da ação
         """
-        if filter_obj.operator == FilterOperator.GREATER_THAN:
-            return stock_value > filter_obj.value_numeric
-        elif filter_obj.operator == FilterOperator.LESS_THAN:
-            return stock_value < filter_obj.value_numeric
-        elif filter_obj.operator == FilterOperator.EQUALS:
-            if filter_obj.value_numeric is not None:
-                return stock_value == filter_obj.value_numeric
-            else:
-                return stock_value == filter_obj.value_string
-        elif filter_obj.operator == FilterOperator.GREATER_EQUAL:
-            return stock_value >= filter_obj.value_numeric
-        elif filter_obj.operator == FilterOperator.LESS_EQUAL:
-            return stock_value <= filter_obj.value_numeric
-        elif filter_obj.operator == FilterOperator.IN:
-            # Para filtros de setor/subsector
-            allowed_values = filter_obj.value_string.split(',') if filter_obj.value_string else []
-            return stock_value in allowed_values
-        elif filter_obj.operator == FilterOperator.NOT_IN:
-            # Para filtros de exclusão
-            excluded_values = filter_obj.value_string.split(',') if filter_obj.value_string else []
-            return stock_value not in excluded_values
+        values = filter_text_values(filter_obj.operator, filter_obj.value_numeric, filter_obj.value_string)
+        if values is not None:
+            # Setor/subsetor: IN e EQUALS exigem o valor na lista, NOT_IN exclui
+            if filter_obj.operator == FilterOperator.NOT_IN:
+                return stock_value not in values
+            return stock_value in values
+        
+        comparison = NUMERIC_COMPARISONS.get(filter_obj.operator)
+        if comparison is None:
+            return False
         
-        return False
+        return comparison(stock_value, filter_obj.value_numeric)
@@ -0,0 +1,190 @@
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import threading
+import numpy as np
+from app.models.strategy import FilterOperator
+from app.services.stock_universe import StockUniverse
+from app.services.filter_operators import NUMERIC_COMPARISONS, filter_text_values
+
+# Bitmaps de filtros guardados por índice (prévias repetem os mesmos filtros a cada edição)
+MAX_CACHED_CLAUSES = 4096
+
+class ScreenerIndex:
+    """
+    Índice de bitmaps sobre o snapshot do universo para o screener.
+
+    Indicadores numéricos guardam os valores ordenados (contagens por busca
+    binária); setor e subsetor guardam um bitmap compactado por categoria.
+    O significado de cada operador vem de filter_operators, o mesmo das
+    estratégias salvas. Conjunções de filtros são respondidas com AND bit a bit.
+    """
+
+    def __init__(self, universe: StockUniverse, max_size: int = MAX_CACHED_CLAUSES):
+        self.universe = universe
+        self.size = len(universe)
+        self.version = universe.version
+        self.max_size = max_size
+
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        self.sorted_rows: Dict[str, np.ndarray] = {}
+        for name, column in universe.columns.items():
+            rows = np.flatnonzero(~np.isnan(column))
+            order = np.argsort(column[rows], kind="mergesort")
+            self.sorted_rows[name] = rows[order]
+            self.sorted_values[name] = column[rows][order]
+
+        self.category_bitmaps: Dict[str, List[np.ndarray]] = {}
+        self.category_counts: Dict[str, np.ndarray] = {}
+        self.valid_bitmaps: Dict[str, np.ndarray] = {}
+        for name, codes in universe.categories.items():
+            total = len(universe.category_values[name])
+            self.category_bitmaps[name] = [np.packbits(codes == code) for code in range(total)]
+            self.category_counts[name] = np.bincount(codes[codes >= 0], minlength=total)
+            self.valid_bitmaps[name] = np.packbits(codes >= 0)
+
+        self.all_rows = np.packbits(np.ones(self.size, dtype=bool))
+        self.no_rows = np.packbits(np.zeros(self.size, dtype=bool))
+        self._bitmaps: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _numeric_ranges(self, indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> List[Tuple[int, int]]:
+        """
+        Trechos [início, fim) dos valores ordenados que passam no filtro.
+
+        Os valores ordenados formam três blocos (menores, iguais e maiores que o
+        valor do filtro) e cada comparação de NUMERIC_COMPARISONS dá o mesmo
+        resultado dentro de um bloco: basta avaliá-la no primeiro valor de cada um.
+        """
+        values = self.sorted_values[indicator]
+
+        if filter_text_values(operator, value_numeric, value_string) is not None:
+            # Número nunca é igual a um texto: só o NOT_IN passa (quando há valor)
+            return [(0, len(values))] if operator == FilterOperator.NOT_IN else []
+
+        comparison = NUMERIC_COMPARISONS.get(operator)
+        if comparison is None or value_numeric is None:
+            return []
+
+        first = int(np.searchsorted(values, value_numeric, side="left"))
+        last = int(np.searchsorted(values, value_numeric, side="right"))
+        return [
+            (start, end)
+            for start, end in ((0, first), (first, last), (last, len(values)))
+            if end > start and comparison(values[start], value_numeric)
+        ]
+
+    def _category_codes(self, indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> Optional[np.ndarray]:
+        """
+        Códigos de categoria citados pelo filtro, ou None se o filtro é numérico (nunca passa em texto)
+        """
+        values = filter_text_values(operator, value_numeric, value_string)
+        if values is None:
+            return None
+
+        return np.unique(self.universe.category_codes(indicator, values))
+
+    def count(self, indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> int:
+        """
+        Número de ações que passam em um único filtro, sem montar o bitmap
+        """
+        if self.universe.is_categorical(indicator):
+            codes = self._category_codes(indicator, operator, value_numeric, value_string)
+            if codes is None:
+                return 0
+
+            matches = int(self.category_counts[indicator][codes].sum())
+            if operator == FilterOperator.NOT_IN:
+                return int(self.category_counts[indicator].sum()) - matches
+            return matches
+
+        return sum(end - start for start, end in self._numeric_ranges(indicator, operator, value_numeric, value_string))
+
+    def bitmap(self, indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> np.ndarray:
+        """
+        Bitmap compactado (np.packbits) das ações que passam em um filtro, montado uma vez por snapshot
+        """
+        key = (indicator, operator.value, value_numeric, value_string)
+        with self._lock:
+            cached = self._bitmaps.get(key)
+            if cached is not None:
+                self._bitmaps.move_to_end(key)
+                return cached
+
+        bitmap = self._build_bitmap(indicator, operator, value_numeric, value_string)
+
+        with self._lock:
+            self._bitmaps[key] = bitmap
+            while len(self._bitmaps) > self.max_size:
+                self._bitmaps.popitem(last=False)
+
+        return bitmap
+
+    def _build_bitmap(self, indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> np.ndarray:
+        if self.universe.is_categorical(indicator):
+            codes = self._category_codes(indicator, operator, value_numeric, value_string)
+            if codes is None:
+                return self.no_rows
+
+            bitmap = self.no_rows
+            for code in codes.tolist():
+                bitmap = np.bitwise_or(bitmap, self.category_bitmaps[indicator][code])
+
+            if operator == FilterOperator.NOT_IN:
+                return np.bitwise_and(self.valid_bitmaps[indicator], np.bitwise_not(bitmap))
+            return bitmap
+
+        ranges = self._numeric_ranges(indicator, operator, value_numeric, value_string)
+        if not ranges:
+            return self.no_rows
+
+        mask = np.zeros(self.size, dtype=bool)
+        for start, end in ranges:
+            mask[self.sorted_rows[indicator][start:end]] = True
+        return np.packbits(mask)
+
+    def preview(self, filters: List[Any]) -> Dict[str, Any]:
+        """
+        Contagem total da conjunção e seletividade de cada filtro isolado
+        """
+        combined = self.all_rows
+        selectivity = []
+
+        for filter_obj in filters:
+            indicator = filter_obj.indicator.value
+            matches = self.count(indicator, filter_obj.operator, filter_obj.value_numeric, filter_obj.value_string)
+
+            selectivity.append({
+                "indicator": filter_obj.indicator,
+                "operator": filter_obj.operator,
+                "value_numeric": filter_obj.value_numeric,
+                "value_string": filter_obj.value_string,
+                "matches": matches,
+                "selectivity": matches / self.size if self.size else 0.0
+            })
+
+            combined = np.bitwise_and(
+                combined,
+                self.bitmap(indicator, filter_obj.operator, filter_obj.value_numeric, filter_obj.value_string)
+            )
+
+        return {
+            "total_stocks": self.size,
+            "total_matches": int(np.unpackbits(combined, count=self.size).sum()),
+            "filters": selectivity
+        }
+
+# Índice do snapshot atual (reconstruído quando o snapshot muda de versão)
+_index: Optional[ScreenerIndex] = None
+_lock = threading.Lock()
+
+def get_screener_index(universe: StockUniverse) -> ScreenerIndex:
+    global _index
+
+    index = _index
+    if index is not None and index.universe is universe:
+        return index
+
+    with _lock:
+        if _index is None or _index.universe is not universe:
+            _index = ScreenerIndex(universe)
+        return _index
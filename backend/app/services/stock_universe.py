@@ -0,0 +1,246 @@
+from typing import List, Dict, Optional
+from datetime import datetime
+from types import SimpleNamespace
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.stock import Stock
+from app.services.ranking_engine import SCORING_INDICATORS
+
+# Colunas numéricas mantidas no snapshot (indicadores + notas)
+NUMERIC_COLUMNS = SCORING_INDICATORS + [
+    "current_price",
+    "market_cap",
+    "value_score",
+    "income_score",
+    "quality_score",
+    "final_score",
+]
+
+# Colunas textuais codificadas como categorias (código -1 = sem valor)
+CATEGORICAL_COLUMNS = ["sector", "subsector"]
+
+class StockUniverse:
+    """
+    Snapshot colunar e imutável do universo de ações.
+
+    Cada indicador é um array NumPy float64 (None vira NaN) alinhado por posição
+    com os arrays de ids e tickers; setor e subsetor são códigos inteiros com
+    tabela de lookup.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        tickers: List[str],
+        names: List[str],
+        columns: Dict[str, np.ndarray],
+        categories: Dict[str, np.ndarray],
+        category_values: Dict[str, List[str]],
+        is_qualified: np.ndarray,
+        version: int = 0,
+        fingerprint: Optional[tuple] = None
+    ):
+        self.ids = ids
+        self.tickers = tickers
+        self.names = names
+        self.columns = columns
+        self.categories = categories
+        self.category_values = category_values
+        self.is_qualified = is_qualified
+        self.version = version
+        self.fingerprint = fingerprint
+        self.built_at = datetime.now()
+
+        self.ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+        self.id_index = {stock_id: i for i, stock_id in enumerate(ids.tolist())}
+        self.category_index = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in category_values.items()
+        }
+
+        # Snapshot é somente leitura: evita alterações acidentais compartilhadas entre requisições
+        for array in [ids, is_qualified, *columns.values(), *categories.values()]:
+            array.setflags(write=False)
+
+    @classmethod
+    def from_db(cls, db: Session, version: int = 0) -> "StockUniverse":
+        """
+        Monta o snapshot lendo apenas as colunas necessárias (sem hidratar objetos ORM)
+        """
+        fingerprint = _fetch_fingerprint(db)
+
+        fields = [Stock.id, Stock.ticker, Stock.name, Stock.is_qualified]
+        fields += [getattr(Stock, name) for name in NUMERIC_COLUMNS + CATEGORICAL_COLUMNS]
+        rows = db.query(*fields).order_by(Stock.id).all()
+
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        tickers = [row[1] for row in rows]
+        names = [row[2] for row in rows]
+        is_qualified = np.array([bool(row[3]) for row in rows], dtype=bool)
+
+        columns = {}
+        offset = 4
+        for i, name in enumerate(NUMERIC_COLUMNS):
+            columns[name] = np.array(
+                [np.nan if row[offset + i] is None else row[offset + i] for row in rows],
+                dtype=np.float64
+            )
+
+        categories = {}
+        category_values = {}
+        offset += len(NUMERIC_COLUMNS)
+        for i, name in enumerate(CATEGORICAL_COLUMNS):
+            values = [row[offset + i] for row in rows]
+            lookup = sorted({value for value in values if value is not None})
+            codes = {value: code for code, value in enumerate(lookup)}
+            categories[name] = np.array([codes.get(value, -1) for value in values], dtype=np.int32)
+            category_values[name] = lookup
+
+        return cls(
+            ids=ids,
+            tickers=tickers,
+            names=names,
+            columns=columns,
+            categories=categories,
+            category_values=category_values,
+            is_qualified=is_qualified,
+            version=version,
+            fingerprint=fingerprint
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Retorna o array de um indicador numérico
+        """
+        return self.columns[name]
+
+    def is_categorical(self, name: str) -> bool:
+        return name in self.categories
+
+    def category_codes(self, name: str, values: List[str]) -> np.ndarray:
+        """
+        Converte valores textuais (ex.: setores) nos códigos do snapshot, ignorando os inexistentes
+        """
+        lookup = self.category_index[name]
+        return np.array([lookup[value] for value in values if value in lookup], dtype=np.int32)
+
+    def category_value(self, name: str, index: int) -> Optional[str]:
+        code = int(self.categories[name][index])
+        return self.category_values[name][code] if code >= 0 else None
+
+    def index_of(self, ticker: str) -> Optional[int]:
+        return self.ticker_index.get(ticker)
+
+    def changed_rows(self, previous: "StockUniverse") -> Optional[np.ndarray]:
+        """
+        Posições cujos indicadores, setor ou subsetor mudaram desde o snapshot anterior.
+
+        Retorna None quando as ações não são as mesmas (inclusões ou remoções).
+        """
+        if not np.array_equal(previous.ids, self.ids):
+            return None
+
+        changed = np.zeros(len(self), dtype=bool)
+        for name, column in self.columns.items():
+            before = previous.columns[name]
+            changed |= ~((before == column) | (np.isnan(before) & np.isnan(column)))
+
+        for name, codes in self.categories.items():
+            # Códigos são refeitos a cada snapshot: compara os textos (código -1 vira None)
+            before = np.array(previous.category_values[name] + [None], dtype=object)
+            after = np.array(self.category_values[name] + [None], dtype=object)
+            changed |= before[previous.categories[name]] != after[codes]
+
+        return np.flatnonzero(changed)
+
+    def row(self, index: int) -> SimpleNamespace:
+        """
+        Dados de uma ação do snapshot com acesso por atributo, como no modelo Stock (NaN vira None)
+        """
+        data = {
+            "id": int(self.ids[index]),
+            "ticker": self.tickers[index],
+            "name": self.names[index],
+            "is_qualified": bool(self.is_qualified[index]),
+        }
+
+        for name, column in self.columns.items():
+            value = float(column[index])
+            data[name] = None if np.isnan(value) else value
+
+        for name in self.categories:
+            data[name] = self.category_value(name, index)
+
+        return SimpleNamespace(**data)
+
+def _fetch_fingerprint(db: Session) -> tuple:
+    """
+    Assinatura barata da tabela de ações para detectar mudanças feitas por outros processos
+    """
+    return tuple(db.query(
+        func.count(Stock.id),
+        func.max(Stock.last_updated),
+        func.sum(func.coalesce(Stock.final_score, 0) + func.coalesce(Stock.value_score, 0)
+                 + func.coalesce(Stock.income_score, 0) + func.coalesce(Stock.quality_score, 0))
+    ).one())
+
+# Snapshot compartilhado pelo processo (trocado atomicamente por atribuição de referência)
+_universe: Optional[StockUniverse] = None
+_is_stale = True
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def get_stock_universe(db: Session) -> StockUniverse:
+    """
+    Retorna o snapshot atual, reconstruindo-o se foi invalidado ou se a tabela mudou
+    """
+    global _checked_at
+
+    universe = _universe
+    if universe is None or _is_stale:
+        return refresh_stock_universe(db)
+
+    # Outros workers podem ter atualizado a tabela: conferir a assinatura periodicamente
+    now = time.monotonic()
+    if now - _checked_at >= settings.stock_universe_check_seconds:
+        _checked_at = now
+        if _fetch_fingerprint(db) != universe.fingerprint:
+            return refresh_stock_universe(db)
+
+    return universe
+
+def refresh_stock_universe(db: Session) -> StockUniverse:
+    """
+    Reconstrói o snapshot a partir do banco e publica a nova versão
+    """
+    global _universe, _is_stale, _checked_at
+
+    with _lock:
+        # Limpar o flag antes de ler o banco: uma invalidação concorrente não se perde
+        _is_stale = False
+        version = _universe.version + 1 if _universe is not None else 1
+
+        try:
+            universe = StockUniverse.from_db(db, version=version)
+        except Exception:
+            _is_stale = True
+            raise
+
+        _universe = universe
+        _checked_at = time.monotonic()
+
+    return universe
+
+def invalidate_stock_universe():
+    """
+    Marca o snapshot como desatualizado (reconstruído na próxima leitura)
+    """
+    global _is_stale
+    _is_stale = True
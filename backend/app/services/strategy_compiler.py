@@ -0,0 +1,175 @@
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+import threading
+import numpy as np
+from sqlalchemy.sql.elements import ColumnElement
+from app.models.strategy import UserStrategy, FilterOperator
+from app.services.stock_universe import StockUniverse
+from app.services.filter_operators import NUMERIC_COMPARISONS, filter_text_values
+from app.services.strategy_sql import clauses_to_sql
+
+# Limite de estratégias compiladas mantidas em memória por processo
+MAX_COMPILED_STRATEGIES = 10000
+
+class CompiledClause:
+    """
+    Um StrategyFilter convertido em predicado vetorizado sobre o snapshot colunar.
+
+    Segue a mesma semântica de ScoringEngine._apply_filter: ação sem valor no
+    indicador nunca passa, e comparações entre texto e número são falsas.
+    """
+
+    def __init__(self, indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]):
+        self.indicator = indicator
+        self.operator = operator
+        self.value_numeric = value_numeric
+        self.value_string = value_string
+
+        # Textos do filtro separados uma única vez, na compilação
+        values = filter_text_values(operator, value_numeric, value_string)
+        self.values = frozenset(values) if values is not None else None
+
+        # Tabela de lookup por código de categoria: (versão do snapshot, tabela)
+        self._lookup = None
+
+    @property
+    def key(self) -> Tuple:
+        """
+        Identidade do filtro: cláusulas com a mesma chave produzem a mesma máscara
+        """
+        return (self.indicator, self.operator.value, self.value_numeric, self.value_string)
+
+    def evaluate(self, universe: StockUniverse, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Máscara das ações aprovadas; com rows, apenas dessas posições do snapshot (na ordem dada)
+        """
+        if universe.is_categorical(self.indicator):
+            return self._evaluate_categorical(universe, rows)
+        return self._evaluate_numeric(universe, rows)
+
+    def _evaluate_categorical(self, universe: StockUniverse, rows: Optional[np.ndarray]) -> np.ndarray:
+        codes = universe.categories[self.indicator]
+        if rows is not None:
+            codes = codes[rows]
+
+        if self.values is None:
+            # Comparações numéricas não se aplicam a texto
+            return np.zeros(len(codes), dtype=bool)
+
+        cached = self._lookup
+        if cached is not None and cached[0] == universe.version:
+            lookup = cached[1]
+        else:
+            # Posição 0 representa "sem valor" (código -1) e nunca passa
+            lookup = np.zeros(len(universe.category_values[self.indicator]) + 1, dtype=bool)
+            lookup[universe.category_codes(self.indicator, list(self.values)) + 1] = True
+            if self.operator == FilterOperator.NOT_IN:
+                lookup[1:] = ~lookup[1:]
+            self._lookup = (universe.version, lookup)
+
+        return lookup[codes + 1]
+
+    def _evaluate_numeric(self, universe: StockUniverse, rows: Optional[np.ndarray]) -> np.ndarray:
+        column = universe.column(self.indicator)
+        if rows is not None:
+            column = column[rows]
+
+        if self.values is not None:
+            # Número nunca é igual a um texto: só o NOT_IN passa (quando há valor)
+            if self.operator == FilterOperator.NOT_IN:
+                return ~np.isnan(column)
+            return np.zeros(len(column), dtype=bool)
+
+        comparison = NUMERIC_COMPARISONS.get(self.operator)
+        if comparison is None or self.value_numeric is None:
+            return np.zeros(len(column), dtype=bool)
+
+        # NaN (sem valor) é falso em qualquer comparação
+        return comparison(column, self.value_numeric)
+
+class CompiledStrategy:
+    """
+    Conjunção das cláusulas de uma estratégia, avaliada como uma única máscara booleana
+    """
+
+    def __init__(self, strategy_id: int, version: Optional[str], clauses: List[CompiledClause]):
+        self.strategy_id = strategy_id
+        self.version = version
+        self.clauses = clauses
+        self._sql_conditions = None
+        self._is_sql_translated = False
+
+    def evaluate(self, universe: StockUniverse, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        mask = np.ones(len(universe) if rows is None else len(rows), dtype=bool)
+
+        for clause in self.clauses:
+            np.logical_and(mask, clause.evaluate(universe, rows), out=mask)
+            if not mask.any():
+                break
+
+        return mask
+
+    def sql_conditions(self) -> Optional[List[ColumnElement]]:
+        """
+        Condições WHERE equivalentes às cláusulas, ou None se alguma exigir avaliação em Python
+        """
+        if not self._is_sql_translated:
+            self._sql_conditions = clauses_to_sql([
+                (clause.indicator, clause.operator, clause.value_numeric, clause.value_string)
+                for clause in self.clauses
+            ])
+            self._is_sql_translated = True
+
+        return self._sql_conditions
+
+class StrategyCompiler:
+    """
+    Compila estratégias em predicados vetorizados, com cache por id e updated_at
+    """
+
+    def __init__(self, max_size: int = MAX_COMPILED_STRATEGIES):
+        self.max_size = max_size
+        self._cache: "OrderedDict[int, CompiledStrategy]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, strategy: UserStrategy) -> CompiledStrategy:
+        clauses = [
+            CompiledClause(
+                indicator=filter_obj.indicator.value,
+                operator=filter_obj.operator,
+                value_numeric=filter_obj.value_numeric,
+                value_string=filter_obj.value_string
+            )
+            for filter_obj in strategy.filters
+        ]
+        return CompiledStrategy(strategy.id, strategy.updated_at, clauses)
+
+    def get(self, strategy: UserStrategy) -> CompiledStrategy:
+        """
+        Retorna a estratégia compilada, recompilando se ela foi alterada (updated_at diferente)
+        """
+        if strategy.id is None:
+            return self.compile(strategy)
+
+        with self._lock:
+            compiled = self._cache.get(strategy.id)
+            if compiled is not None and compiled.version == strategy.updated_at:
+                self._cache.move_to_end(strategy.id)
+                return compiled
+
+        compiled = self.compile(strategy)
+
+        with self._lock:
+            self._cache[strategy.id] = compiled
+            self._cache.move_to_end(strategy.id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+        return compiled
+
+    def invalidate(self, strategy_id: int):
+        with self._lock:
+            self._cache.pop(strategy_id, None)
+
+# Cache de estratégias compiladas compartilhado pelo processo
+strategy_compiler = StrategyCompiler()
@@ -0,0 +1,165 @@
+from typing import List, Dict, Optional, Tuple, Callable
+from datetime import datetime
+import threading
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+from app.models.strategy import UserStrategy
+from app.services.stock_universe import StockUniverse
+from app.services.strategy_compiler import CompiledStrategy, strategy_compiler
+
+class FleetStrategyMatcher:
+    """
+    Avalia as estratégias de todos os usuários em uma única passada.
+
+    Cláusulas idênticas (mesmo indicador, operador e valor) são avaliadas uma
+    única vez contra o universo, como bitmaps compartilhados; cada estratégia é
+    apenas o AND dos bitmaps das suas cláusulas.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.stats = {}
+
+    def load_strategies(self, user_ids: Optional[List[int]] = None, strategy_ids: Optional[List[int]] = None) -> List[UserStrategy]:
+        """
+        Estratégias ativas com notificação habilitada (com filtros carregados em lote)
+        """
+        query = self.db.query(UserStrategy).options(
+            selectinload(UserStrategy.filters)
+        ).filter(
+            UserStrategy.is_active == True,
+            UserStrategy.is_notification_enabled == True
+        )
+
+        if user_ids is not None:
+            query = query.filter(UserStrategy.user_id.in_(user_ids))
+        if strategy_ids is not None:
+            query = query.filter(UserStrategy.id.in_(strategy_ids))
+
+        return query.all()
+
+    def load_strategy_versions(self) -> List[Tuple[int, int, Optional[datetime]]]:
+        """
+        (id, user_id, updated_at) das estratégias com notificação, sem carregar os filtros
+        """
+        return self.db.query(UserStrategy.id, UserStrategy.user_id, UserStrategy.updated_at).filter(
+            UserStrategy.is_active == True,
+            UserStrategy.is_notification_enabled == True
+        ).all()
+
+    def match(self, strategies: List[UserStrategy], universe: StockUniverse) -> Dict[int, np.ndarray]:
+        """
+        Retorna, por strategy_id, o bitmap compactado (np.packbits) das ações aprovadas
+        """
+        self.stats = {"strategies": len(strategies), "clauses": 0}
+        clause_bitmaps: Dict[Tuple, np.ndarray] = {}
+        strategy_bitmaps: Dict[frozenset, np.ndarray] = {}
+        all_stocks = np.packbits(np.ones(len(universe), dtype=bool))
+        results = {}
+
+        for strategy in strategies:
+            compiled = strategy_compiler.get(strategy)
+            signature = frozenset(clause.key for clause in compiled.clauses)
+            self.stats["clauses"] += len(compiled.clauses)
+
+            # Estratégias com exatamente os mesmos filtros compartilham o resultado
+            bitmap = strategy_bitmaps.get(signature)
+            if bitmap is None:
+                bitmap = all_stocks
+                for clause in compiled.clauses:
+                    clause_bitmap = clause_bitmaps.get(clause.key)
+                    if clause_bitmap is None:
+                        clause_bitmap = np.packbits(clause.evaluate(universe))
+                        clause_bitmaps[clause.key] = clause_bitmap
+                    bitmap = np.bitwise_and(bitmap, clause_bitmap)
+                strategy_bitmaps[signature] = bitmap
+
+            results[strategy.id] = bitmap
+
+        self.stats["distinct_strategies"] = len(strategy_bitmaps)
+        self.stats["distinct_clauses"] = len(clause_bitmaps)
+        return results
+
+    def first_match(self, bitmap: np.ndarray, universe: StockUniverse) -> Optional[int]:
+        """
+        Índice (no snapshot) da primeira ação aprovada, ou None
+        """
+        matches = np.flatnonzero(np.unpackbits(bitmap, count=len(universe)))
+        return int(matches[0]) if len(matches) > 0 else None
+
+class StrategyMaskCache:
+    """
+    Máscaras das estratégias com notificação, mantidas entre despachos de alertas.
+
+    Valem para uma versão do snapshot e para o updated_at de cada estratégia.
+    Quando o snapshot muda com as mesmas ações, só as linhas que mudaram são
+    reavaliadas; estratégias novas ou alteradas são compiladas e avaliadas
+    uma vez (apenas elas têm os filtros carregados do banco).
+    """
+
+    def __init__(self):
+        self.universe: Optional[StockUniverse] = None
+        self._entries: Dict[int, Tuple[CompiledStrategy, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def masks(
+        self,
+        universe: StockUniverse,
+        versions: Dict[int, Optional[datetime]],
+        load: Callable[[List[int]], List[UserStrategy]]
+    ) -> Dict[int, np.ndarray]:
+        """
+        Máscara booleana (alinhada com o snapshot) por strategy_id de versions.
+
+        versions traz o updated_at atual de todas as estratégias com
+        notificação; load carrega (com filtros) as que precisam ser avaliadas.
+        """
+        with self._lock:
+            self._advance(universe)
+
+            for strategy_id in [strategy_id for strategy_id in self._entries if strategy_id not in versions]:
+                del self._entries[strategy_id]
+
+            stale = [
+                strategy_id for strategy_id, updated_at in versions.items()
+                if strategy_id not in self._entries or self._entries[strategy_id][0].version != updated_at
+            ]
+            if stale:
+                for strategy in load(stale):
+                    compiled = strategy_compiler.get(strategy)
+                    self._entries[strategy.id] = (compiled, compiled.evaluate(universe))
+
+            return {
+                strategy_id: entry[1]
+                for strategy_id, entry in self._entries.items()
+                if strategy_id in versions
+            }
+
+    def _advance(self, universe: StockUniverse):
+        """
+        Leva as máscaras para a versão do snapshot informada
+        """
+        previous = self.universe
+        if previous is not None and previous.version == universe.version:
+            return
+        self.universe = universe
+
+        rows = universe.changed_rows(previous) if previous is not None else None
+        if rows is None:
+            self._entries.clear()
+            return
+        if not len(rows):
+            return
+
+        for strategy_id, (compiled, mask) in self._entries.items():
+            updated = mask.copy()
+            updated[rows] = compiled.evaluate(universe, rows)
+            self._entries[strategy_id] = (compiled, updated)
+
+    def clear(self):
+        with self._lock:
+            self.universe = None
+            self._entries.clear()
+
+# Máscaras usadas no despacho de alertas por evento, compartilhadas pelo processo
+strategy_mask_cache = StrategyMaskCache()
@@ -0,0 +1,48 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import String, and_
+from sqlalchemy.sql.elements import ColumnElement
+from app.models.stock import Stock
+from app.models.strategy import FilterOperator
+from app.services.filter_operators import NUMERIC_COMPARISONS, filter_text_values
+
+def filter_to_sql(indicator: str, operator: FilterOperator, value_numeric: Optional[float], value_string: Optional[str]) -> Optional[ColumnElement]:
+    """
+    Traduz um filtro de estratégia para uma expressão SQLAlchemy sobre a tabela stocks.
+
+    Retorna None para combinações sem tradução equivalente (ex.: IN em coluna
+    numérica, comparação numérica em coluna de texto); nesses casos o filtro
+    deve ser avaliado em Python. Valores NULL nunca passam, como em _apply_filter.
+    """
+    column = getattr(Stock, indicator, None)
+    if column is None:
+        return None
+
+    if isinstance(column.type, String):
+        values = filter_text_values(operator, value_numeric, value_string)
+        if values is None or None in values:
+            return None
+        if operator == FilterOperator.NOT_IN:
+            return and_(column.isnot(None), column.notin_(values))
+        return column.in_(values)
+
+    comparison = NUMERIC_COMPARISONS.get(operator)
+    if comparison is None or value_numeric is None:
+        return None
+
+    return comparison(column, value_numeric)
+
+def clauses_to_sql(clauses: List[Tuple]) -> Optional[List[ColumnElement]]:
+    """
+    Traduz todas as cláusulas (indicator, operator, value_numeric, value_string) de uma estratégia.
+
+    Retorna None se alguma não puder ser traduzida.
+    """
+    conditions = []
+
+    for indicator, operator, value_numeric, value_string in clauses:
+        condition = filter_to_sql(indicator, operator, value_numeric, value_string)
+        if condition is None:
+            return None
+        conditions.append(condition)
+
+    return conditions
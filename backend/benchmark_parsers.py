@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos parsers de páginas do ETL: BeautifulSoup (html.parser) x lxml em passada única
+
+Uso:
+    python benchmark_parsers.py                       # páginas sintéticas
+    python benchmark_parsers.py --cache-dir .cache/etl  # páginas salvas pelo cache do ETL
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import glob
+import json
+import random
+import time
+from bs4 import BeautifulSoup
+from app.etl.parsers import parse_status_invest, parse_fundamentus, parse_float
+from app.etl.response_cache import ResponseCache
+
+STATUS_INVEST_LABELS = ["P/L", "P/VPA", "Div. Yield", "ROE", "Marg. Líquida", "Dív. Líq. / EBIT", "Payout"]
+FUNDAMENTUS_LABELS = ["P/L", "P/VP", "Div. Yield", "ROE", "Marg. Líquida", "Dív. Líq. / EBIT", "Payout"]
+
+def legacy_status_invest(content: bytes) -> dict:
+    """
+    Parser anterior do StatusInvest (uma busca na árvore inteira por indicador)
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    data = {}
+    price_element = soup.find('h3', class_='value')
+    if price_element:
+        data['current_price'] = parse_float(price_element.get_text())
+    fields = dict(zip(STATUS_INVEST_LABELS, ["pe_ratio", "pb_ratio", "dividend_yield", "roe", "net_margin", "debt_to_ebitda", "payout_ratio"]))
+    for label, field in fields.items():
+        element = soup.find('div', string=label)
+        if element and element.parent:
+            value = element.parent.find('strong')
+            if value:
+                data[field] = parse_float(value.get_text())
+    data['source'] = 'status_invest'
+    return data
+
+def legacy_fundamentus(content: bytes) -> dict:
+    """
+    Parser anterior do Fundamentus (todas as linhas de todas as tabelas + cadeia de substrings)
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    data = {}
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all(['td', 'th'])
+            if len(cells) >= 2:
+                label = cells[0].get_text().strip()
+                value = cells[1].get_text().strip()
+                if 'P/L' in label:
+                    data['pe_ratio'] = parse_float(value)
+                elif 'P/VP' in label:
+                    data['pb_ratio'] = parse_float(value)
+                elif 'Div. Yield' in label:
+                    data['dividend_yield'] = parse_float(value)
+                elif 'ROE' in label:
+                    data['roe'] = parse_float(value)
+                elif 'Marg. Líquida' in label:
+                    data['net_margin'] = parse_float(value)
+                elif 'Dív. Líq. / EBIT' in label:
+                    data['debt_to_ebitda'] = parse_float(value)
+                elif 'Payout' in label:
+                    data['payout_ratio'] = parse_float(value)
+    data['source'] = 'fundamentus'
+    return data
+
+def number() -> str:
+    return f"{random.uniform(-5, 40):.2f}".replace('.', ',')
+
+def synthetic_status_invest() -> bytes:
+    """
+    Página com a estrutura do StatusInvest (blocos título/valor) e ~300 indicadores de ruído
+    """
+    blocks = [
+        f'<div class="info"><div><h3 class="title">Indicador {i}</h3></div>'
+        f'<div class="d-flex"><div>Outro {i}</div><strong class="value">{number()}</strong></div></div>'
+        for i in range(300)
+    ]
+    for label in STATUS_INVEST_LABELS:
+        blocks.insert(random.randrange(len(blocks)), f'<div class="item"><div>{label}</div><strong class="value">{number()}</strong></div>')
+    body = "".join(blocks)
+    return (
+        f'<html><head><meta charset="utf-8"><title>Ação</title></head><body>'
+        f'<nav>{"<a href=#>menu</a>" * 200}</nav><div class="top"><h3 class="value">R$ {number()}</h3></div>'
+        f'<main>{body}</main><script>var x = 1;</script></body></html>'
+    ).encode("utf-8")
+
+def synthetic_fundamentus() -> bytes:
+    """
+    Página com a estrutura do detalhes.php (tabelas rótulo/valor) em cp1252
+    """
+    rows = [f'<tr><td class="label"><span class="txt">Campo {i}</span></td><td class="data"><span class="txt">{number()}</span></td></tr>' for i in range(150)]
+    for label in FUNDAMENTUS_LABELS:
+        rows.insert(random.randrange(len(rows)), f'<tr><td class="label"><span class="help tips">?</span><span class="txt">{label}</span></td><td class="data"><span class="txt">{number()}%</span></td></tr>')
+    tables = "".join(f'<table class="w728">{"".join(rows[i:i + 20])}</table>' for i in range(0, len(rows), 20))
+    return f'<html><head><title>Detalhes</title></head><body>{tables}</body></html>'.encode("cp1252")
+
+def cached_pages(directory: str):
+    """
+    Páginas salvas pelo ResponseCache do ETL, separadas por fonte
+    """
+    cache = ResponseCache(directory)
+    pages = {"status_invest": [], "fundamentus": []}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        with open(path, encoding="utf-8") as file:
+            url = json.load(file)["url"]
+        body = cache.get_body(url)
+        if body:
+            pages["fundamentus" if "fundamentus" in url else "status_invest"].append(body)
+    return pages
+
+def bench(function, pages, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            function(page)
+    return (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cache-dir", help="diretório do cache do ETL (ETL_CACHE_DIR) com páginas reais")
+    parser.add_argument("--pages", type=int, default=20, help="páginas sintéticas por fonte")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(42)
+    if args.cache_dir:
+        pages = cached_pages(args.cache_dir)
+    else:
+        pages = {
+            "status_invest": [synthetic_status_invest() for _ in range(args.pages)],
+            "fundamentus": [synthetic_fundamentus() for _ in range(args.pages)],
+        }
+
+    cases = [
+        ("status_invest", legacy_status_invest, parse_status_invest),
+        ("fundamentus", legacy_fundamentus, parse_fundamentus),
+    ]
+
+    for source, legacy, current in cases:
+        if not pages[source]:
+            print(f"{source}: nenhuma página")
+            continue
+
+        mismatches = sum(1 for page in pages[source] if legacy(page) != current(page))
+        legacy_ms = bench(legacy, pages[source], args.repeat)
+        current_ms = bench(current, pages[source], args.repeat)
+        print(
+            f"{source}: {len(pages[source])} páginas | BeautifulSoup {legacy_ms:.2f} ms/página | "
+            f"lxml {current_ms:.2f} ms/página | {legacy_ms / current_ms:.1f}x | divergências: {mismatches}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth, users, portfolio, recommendations, etl, strategies, alerts, macroeconomic, brokerage_import, cost_analysis, corporate_actions, cvm_data, advanced_tax, currency, ai_chat, ai_insights
 from app.core.config import settings
 from app.core.database import engine
+from app.etl.http_client import close_http_client
+from app.etl.parse_executor import shutdown_parse_executor
 from app.models import Base
 
 # Criar tabelas no banco de dados
@@ -21,8 +23,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.on_event("shutdown")
+async def shutdown():
+    await close_http_client()
+    shutdown_parse_executor()
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
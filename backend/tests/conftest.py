@@ -0,0 +1,76 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import Column, Integer, ForeignKey, create_engine, event
+from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+import app.models  # noqa: F401 - registra as tabelas no metadata
+import app.models.portfolio  # noqa: F401
+
+try:
+    import app.models.ai_models  # noqa: F401
+except ImportError:
+    # Modelos de IA citados pelos relacionamentos de Stock e User: versões mínimas
+    # para o mapeamento do ORM quando app/models/ai_models.py não está presente
+    class HistoricalDividend(Base):
+        __tablename__ = "historical_dividends"
+
+        id = Column(Integer, primary_key=True)
+        stock_id = Column(Integer, ForeignKey("stocks.id"))
+        stock = relationship("Stock", back_populates="dividend_history")
+
+    class HistoricalIndicator(Base):
+        __tablename__ = "historical_indicators"
+
+        id = Column(Integer, primary_key=True)
+        stock_id = Column(Integer, ForeignKey("stocks.id"))
+        stock = relationship("Stock", back_populates="indicator_history")
+
+    class UserAlert(Base):
+        __tablename__ = "user_alerts"
+
+        id = Column(Integer, primary_key=True)
+        user_id = Column(Integer, ForeignKey("users.id"))
+        stock_id = Column(Integer, ForeignKey("stocks.id"))
+        user = relationship("User", back_populates="ai_alerts")
+        stock = relationship("Stock", back_populates="alerts")
+
+    class ChatSession(Base):
+        __tablename__ = "chat_sessions"
+
+        id = Column(Integer, primary_key=True)
+        user_id = Column(Integer, ForeignKey("users.id"))
+        user = relationship("User", back_populates="chat_sessions")
+
+@pytest.fixture
+def db():
+    """
+    Sessão em SQLite em memória com o schema completo (Base.metadata.create_all)
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@contextmanager
+def query_plans(session):
+    """
+    Coleta o EXPLAIN QUERY PLAN de cada SELECT executado na sessão (SQL e parâmetros reais)
+    """
+    plans = []
+    engine = session.get_bind()
+
+    def explain(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plans.append(" | ".join(row[-1] for row in cursor.fetchall()))
+
+    event.listen(engine, "before_cursor_execute", explain)
+    try:
+        yield plans
+    finally:
+        event.remove(engine, "before_cursor_execute", explain)
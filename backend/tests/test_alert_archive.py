@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.alerts import router
+from app.api.auth import get_current_user
+from app.core.database import get_db
+from app.models.alert import Alert, AlertType, AlertStatus
+from app.models.user import User
+from app.schemas.alert import AlertResponse
+from app.services.alert_counters import alert_counters
+from app.services.alert_retention import AlertRetentionService, ARCHIVABLE_STATUSES
+
+NOW = datetime(2026, 10, 17)
+
+def client_for(db, user) -> TestClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    return TestClient(app)
+
+def test_archive_endpoint_returns_archived_alerts_of_the_month(db):
+    user = User(email="arquivo@teste.com", hashed_password="x", full_name="Arquivo")
+    other = User(email="outro@teste.com", hashed_password="x", full_name="Outro")
+    db.add_all([user, other])
+    db.commit()
+
+    statuses = [AlertStatus.READ, AlertStatus.DISMISSED, AlertStatus.PENDING]
+    for i in range(60):
+        db.add(Alert(
+            user_id=user.id if i % 5 else other.id,
+            alert_type=AlertType.SCORE_ALERT,
+            status=statuses[i % 3],
+            template_id="score_alert",
+            stock_ticker=f"T{i:03d}",
+            stock_name="Empresa",
+            current_price=10.0 + i,
+            score=8.5,
+            created_at=datetime(2026, 5, 1) + timedelta(days=i % 28, hours=i)
+        ))
+    db.commit()
+
+    expected = [
+        AlertResponse.model_validate(alert).model_dump(mode="json")
+        for alert in db.query(Alert).filter(
+            Alert.user_id == user.id,
+            Alert.status.in_([AlertStatus.READ, AlertStatus.DISMISSED])
+        ).order_by(Alert.created_at.desc(), Alert.id.desc())
+    ]
+
+    alert_counters.load_counts(db, user.id)
+    stats = AlertRetentionService(db).archive_old_alerts(now=NOW, batch_size=7)
+
+    assert stats["alerts_archived"] == 40
+    assert db.query(Alert).filter(Alert.status.in_(ARCHIVABLE_STATUSES)).count() == 0
+    assert db.query(Alert).count() == 20
+    # Contadores em cache acompanham a saída dos alertas arquivados
+    assert alert_counters.get_counts(db, user.id) == alert_counters.load_counts(db, user.id)
+
+    response = client_for(db, user).get("/alerts/archive", params={"period": "2026-05"})
+
+    assert response.status_code == 200
+    assert response.json() == expected
+    assert client_for(db, user).get("/alerts/archive", params={"period": "2026-04"}).json() == []
+
+def test_archive_endpoint_rejects_malformed_period(db):
+    user = User(email="periodo@teste.com", hashed_password="x", full_name="Período")
+    db.add(user)
+    db.commit()
+
+    for period in ("2026-13", "2026-5", "maio"):
+        assert client_for(db, user).get("/alerts/archive", params={"period": period}).status_code == 422
@@ -0,0 +1,26 @@
+from datetime import datetime
+from app.api.alerts import alert_list_query
+from app.models.alert import AlertStatus
+from app.services.alert_service import AlertService
+from tests.conftest import query_plans
+
+def test_cursor_page_uses_user_created_index(db):
+    with query_plans(db) as plans:
+        alert_list_query(db, user_id=1, after=(datetime(2024, 1, 1), 500)).limit(20).all()
+
+    assert "ix_alerts_user_created" in plans[0]
+    assert "TEMP B-TREE" not in plans[0]
+
+def test_status_filter_uses_user_status_created_index(db):
+    with query_plans(db) as plans:
+        alert_list_query(db, user_id=1, status=AlertStatus.PENDING).limit(20).all()
+
+    assert "ix_alerts_user_status_created" in plans[0]
+    assert "TEMP B-TREE" not in plans[0]
+
+def test_dedup_lookup_uses_user_type_created_index(db):
+    with query_plans(db) as plans:
+        AlertService(db).load_recent_alert_keys(user_ids=[1, 2])
+
+    assert plans
+    assert all("ix_alerts_user_type_created" in plan for plan in plans)
@@ -0,0 +1,112 @@
+import asyncio
+import random
+import pytest
+from sqlalchemy import event
+from app.etl.data_processor import DataProcessor
+from app.models.ranking import ArchetypeRanking, RankingState
+from app.models.stock import Stock
+from app.services.incremental_scoring import get_incremental_scorer
+
+def seed_stocks(db, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        db.add(Stock(
+            ticker=f"T{i:03d}3",
+            name=f"Empresa {i}",
+            is_qualified=True,
+            pe_ratio=rng.choice([rng.uniform(1, 40), 8.0, 12.0]),
+            pb_ratio=rng.uniform(0.2, 4),
+            dividend_yield=rng.choice([rng.uniform(0, 15), 6.0]),
+            dividend_cagr_5y=rng.uniform(0, 2),
+            payout_ratio=rng.uniform(0, 99),
+            roe=rng.uniform(1, 40),
+            net_margin=rng.uniform(1, 50),
+            debt_to_ebitda=rng.uniform(0, 3.9)
+        ))
+    db.commit()
+
+def test_empty_universe_clears_rankings_and_bumps_version(db):
+    seed_stocks(db, 12)
+    processor = DataProcessor(db)
+    asyncio.run(processor.recalculate_all_scores())
+    version = db.query(RankingState.universe_version).scalar()
+    assert db.query(ArchetypeRanking).count() == 36
+
+    db.query(Stock).update({Stock.is_qualified: False})
+    db.commit()
+    asyncio.run(processor.recalculate_all_scores())
+
+    assert db.query(ArchetypeRanking).count() == 0
+    assert db.query(RankingState.universe_version).scalar() == version + 1
+    scorer = get_incremental_scorer()
+    assert scorer.version == version + 1
+    assert scorer.values == {}
+
+def snapshot(db):
+    scores = {
+        stock_id: (value, income, quality)
+        for stock_id, value, income, quality in db.query(Stock.id, Stock.value_score, Stock.income_score, Stock.quality_score)
+    }
+    rankings = sorted(
+        (archetype.name, rank, stock_id, final_score)
+        for archetype, rank, stock_id, final_score in db.query(
+            ArchetypeRanking.archetype,
+            ArchetypeRanking.rank,
+            ArchetypeRanking.stock_id,
+            ArchetypeRanking.final_score
+        )
+    )
+    return scores, rankings
+
+def test_incremental_updates_match_full_recalculation(db):
+    seed_stocks(db, 60, seed=7)
+    processor = DataProcessor(db)
+    asyncio.run(processor.recalculate_all_scores())
+    rng = random.Random(11)
+    stocks = db.query(Stock).all()
+
+    for _ in range(6):
+        for _ in range(10):
+            stock = rng.choice(stocks)
+            stock.pe_ratio = rng.choice([rng.uniform(1, 40), 8.0, 12.0])
+            if rng.random() < 0.5:
+                stock.dividend_yield = rng.choice([rng.uniform(0, 15), 6.0])
+            if rng.random() < 0.5:
+                stock.roe = rng.uniform(1, 40)
+            if rng.random() < 0.2:
+                # Renda nula tira a ação dos rankings; a volta a recoloca
+                stock.payout_ratio = None if stock.payout_ratio is not None else rng.uniform(0, 99)
+            db.commit()
+
+            version = db.query(RankingState.universe_version).scalar()
+            asyncio.run(processor.update_scores_incrementally(stock))
+            assert get_incremental_scorer().version == version + 1
+
+        incremental_scores, incremental_rankings = snapshot(db)
+        asyncio.run(processor.recalculate_all_scores())
+        full_scores, full_rankings = snapshot(db)
+
+        assert incremental_rankings == full_rankings
+        for stock_id, scores in full_scores.items():
+            assert incremental_scores[stock_id] == pytest.approx(scores)
+
+def test_incremental_update_reads_only_the_affected_positions(db):
+    seed_stocks(db, 40, seed=3)
+    processor = DataProcessor(db)
+    asyncio.run(processor.recalculate_all_scores())
+    stock = db.query(Stock).order_by(Stock.id).first()
+    stock.roe = 45.0
+    db.commit()
+
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        asyncio.run(processor.update_scores_incrementally(stock))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    ranking_reads = [s for s in statements if s.lstrip().startswith("SELECT") and "FROM archetype_rankings" in s]
+    assert ranking_reads
+    assert all("archetype_rankings.rank <=" in s for s in ranking_reads)
+    assert not any(s.lstrip().startswith("DELETE") for s in statements)
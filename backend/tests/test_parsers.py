@@ -0,0 +1,91 @@
+import os
+import random
+import pytest
+from app.etl.parsers import parse_status_invest, parse_fundamentus
+from benchmark_parsers import (
+    legacy_status_invest,
+    legacy_fundamentus,
+    synthetic_status_invest,
+    synthetic_fundamentus,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+def fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as file:
+        return file.read()
+
+def html(body: str, encoding: str = "utf-8") -> bytes:
+    return f'<html><head><meta charset="{encoding}"></head><body>{body}</body></html>'.encode(encoding)
+
+def test_status_invest_page_matches_legacy():
+    page = fixture("status_invest_petr4.html")
+
+    assert parse_status_invest(page) == legacy_status_invest(page)
+    assert parse_status_invest(page) == {
+        "current_price": 37.84,
+        "pe_ratio": 4.27,
+        "pb_ratio": 1.18,
+        "roe": 27.63,
+        "net_margin": 19.32,
+        "debt_to_ebitda": 1.41,
+        "payout_ratio": None,
+        "source": "status_invest",
+    }
+
+def test_fundamentus_page_matches_legacy():
+    page = fixture("fundamentus_petr4.html")
+
+    assert parse_fundamentus(page) == legacy_fundamentus(page)
+    assert parse_fundamentus(page) == {
+        "pe_ratio": 12.5,
+        "pb_ratio": 1.18,
+        "dividend_yield": 18.4,
+        "roe": 27.6,
+        "net_margin": 19.3,
+        "debt_to_ebitda": 1.41,
+        "source": "fundamentus",
+    }
+
+@pytest.mark.parametrize("body", [
+    # Rótulo com filho além do texto não é o rótulo; vale o <div> seguinte
+    '<div><div>P/L<i>ajuda</i></div><strong>9,0</strong></div><div><div>P/L</div><strong>4,5</strong></div>',
+    # Filhos únicos aninhados contam como o texto do <div>
+    '<div><div><span><b>ROE</b></span></div><strong>27,6%</strong></div>',
+    # Espaços em volta do rótulo: não é o texto exato
+    '<div><div> ROE </div><strong>1,0</strong></div><div><div>ROE</div><strong>2,0</strong></div>',
+    # Só o primeiro <div> do rótulo conta, mesmo sem <strong> no bloco
+    '<div><div>Payout</div><span>-</span></div><div><div>Payout</div><strong>50%</strong></div>',
+    # Comentário como único filho
+    '<div><div><!--P/L--></div><strong>3,0</strong></div>',
+    '<div><div></div><strong>3,0</strong></div><h3 class="title value">R$ 10,50</h3><h3 class="value">11</h3>',
+])
+def test_status_invest_edge_cases_match_legacy(body):
+    page = html(body)
+
+    assert parse_status_invest(page) == legacy_status_invest(page)
+
+@pytest.mark.parametrize("body", [
+    # Linha com quatro células: apenas o primeiro par, como antes
+    '<table><tr><td>Dia</td><td>-0,5%</td><td>P/L</td><td>4,27</td></tr></table>',
+    '<table><tr><td>P/L</td><td>4,27</td><td>Payout</td><td>78,5%</td></tr></table>',
+    # Células de qualquer nível contam, não só as filhas diretas do <tr>
+    '<table><tr><td><table><tr><td>ROE</td><td>1,0</td></tr></table></td><td>2,0</td></tr></table>',
+    '<table><tr><th>Marg. Líquida</th><td><span>19,3%</span></td></tr></table>',
+    # Última linha do mesmo campo prevalece
+    '<table><tr><td>P/L</td><td>1,0</td></tr><tr><td>P/VP</td><td>2,0</td></tr><tr><td>?P/L</td><td>3,0</td></tr></table>',
+    '<table><tr><td>P/L</td></tr><tr><td>P/VP e P/L</td><td>5,0</td></tr></table>',
+])
+def test_fundamentus_edge_cases_match_legacy(body):
+    page = html(body, "iso-8859-1")
+
+    assert parse_fundamentus(page) == legacy_fundamentus(page)
+
+def test_synthetic_pages_match_legacy():
+    random.seed(7)
+    for _ in range(5):
+        status_page = synthetic_status_invest()
+        fundamentus_page = synthetic_fundamentus()
+
+        assert parse_status_invest(status_page) == legacy_status_invest(status_page)
+        assert parse_fundamentus(fundamentus_page) == legacy_fundamentus(fundamentus_page)
@@ -0,0 +1,116 @@
+import random
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.services.ranking_engine import RankingEngine, SCORING_INDICATORS
+from app.services.scoring_engine import ScoringEngine
+
+def legacy_percentiles(values, reverse=False):
+    """
+    Implementação anterior de ScoringEngine._calculate_percentiles (sorted().index)
+    """
+    sorted_values = sorted(values, reverse=reverse)
+    return [(sorted_values.index(value) + 1) / len(sorted_values) for value in values]
+
+def legacy_sub_scores(stocks):
+    """
+    Notas parciais calculadas como no ScoringEngine anterior (ações com todos os indicadores)
+    """
+    pe = legacy_percentiles([s.pe_ratio for s in stocks], reverse=True)
+    pb = legacy_percentiles([s.pb_ratio for s in stocks], reverse=True)
+    dy = legacy_percentiles([s.dividend_yield for s in stocks])
+    cagr = legacy_percentiles([s.dividend_cagr_5y for s in stocks])
+    roe = legacy_percentiles([s.roe for s in stocks])
+    margin = legacy_percentiles([s.net_margin for s in stocks])
+    debt = legacy_percentiles([s.debt_to_ebitda for s in stocks], reverse=True)
+
+    scores = []
+    for i, stock in enumerate(stocks):
+        consistency_bonus = 0
+        if stock.payout_ratio and stock.payout_ratio < 80:
+            consistency_bonus = 2
+        elif stock.payout_ratio and stock.payout_ratio < 100:
+            consistency_bonus = 1
+
+        scores.append({
+            "value": (pe[i] * 5 + pb[i] * 5) / 2,
+            "income": min(10, dy[i] * 4 + cagr[i] * 2 + consistency_bonus),
+            "quality": min(10, roe[i] * 4 + margin[i] * 3 + debt[i] * 3),
+        })
+    return scores
+
+def random_stocks(n, seed):
+    rng = random.Random(seed)
+    stocks = []
+    for _ in range(n):
+        stocks.append(SimpleNamespace(
+            pe_ratio=rng.uniform(1, 40),
+            pb_ratio=rng.uniform(0.1, 5),
+            dividend_yield=rng.uniform(0, 15),
+            dividend_cagr_5y=rng.uniform(0, 2),
+            payout_ratio=rng.choice([0.0, rng.uniform(0, 120)]),
+            roe=rng.uniform(-5, 40),
+            net_margin=rng.uniform(0, 50),
+            debt_to_ebitda=rng.uniform(0, 5),
+            value_score=None,
+            income_score=None,
+            quality_score=None,
+        ))
+    return stocks
+
+@pytest.mark.parametrize("n, seed", [(1, 0), (2, 1), (50, 2), (500, 3)])
+def test_sub_scores_match_legacy_on_distinct_values(n, seed):
+    stocks = random_stocks(n, seed)
+    engine = RankingEngine()
+
+    scores = engine.calculate_sub_scores(engine.build_columns(stocks))
+    expected = legacy_sub_scores(stocks)
+
+    for name in ("value", "income", "quality"):
+        assert scores[name].tolist() == pytest.approx([row[name] for row in expected], abs=1e-12)
+
+def test_scoring_engine_assigns_legacy_scores():
+    stocks = random_stocks(200, 4)
+    expected = legacy_sub_scores(stocks)
+
+    ScoringEngine(db=None).calculate_scores(stocks)
+
+    assert [s.value_score for s in stocks] == pytest.approx([row["value"] for row in expected], abs=1e-12)
+    assert [s.income_score for s in stocks] == pytest.approx([row["income"] for row in expected], abs=1e-12)
+    assert [s.quality_score for s in stocks] == pytest.approx([row["quality"] for row in expected], abs=1e-12)
+
+def test_percentile_ranks_match_legacy_on_distinct_values():
+    values = np.random.default_rng(5).permutation(1000).astype(np.float64)
+    engine = RankingEngine()
+
+    for reverse in (False, True):
+        assert engine.percentile_ranks(values, reverse=reverse).tolist() == pytest.approx(
+            legacy_percentiles(values.tolist(), reverse=reverse), abs=1e-12
+        )
+
+def test_ties_share_average_rank():
+    engine = RankingEngine()
+    values = np.array([10.0, 20.0, 20.0, 30.0])
+
+    # Ranks 1, 2.5, 2.5, 4 (o sorted().index anterior dava 2 aos dois empatados)
+    assert engine.percentile_ranks(values).tolist() == [0.25, 0.625, 0.625, 1.0]
+    assert engine.percentile_ranks(values, reverse=True).tolist() == [1.0, 0.625, 0.625, 0.25]
+
+def test_all_tied_values_share_the_middle_rank():
+    assert RankingEngine().percentile_ranks(np.array([7.0, 7.0, 7.0])).tolist() == [2 / 3] * 3
+
+def test_missing_values_are_excluded_from_ranking():
+    values = np.array([3.0, np.nan, 1.0, 2.0])
+    percentiles = RankingEngine().percentile_ranks(values)
+
+    assert np.isnan(percentiles[1])
+    assert percentiles[[0, 2, 3]].tolist() == [1.0, 1 / 3, 2 / 3]
+
+def test_build_columns_keeps_positions_aligned():
+    stocks = [SimpleNamespace(**{name: None for name in SCORING_INDICATORS}) for _ in range(3)]
+    stocks[1].dividend_cagr_5y = 1.5
+
+    columns = RankingEngine().build_columns(stocks)
+
+    assert np.isnan(columns["dividend_cagr_5y"][[0, 2]]).all()
+    assert columns["dividend_cagr_5y"][1] == 1.5
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.core.config import settings
+from app.etl import resilience
+from app.etl.resilience import CircuitBreaker, CircuitOpenError, call_with_resilience
+
+REQUEST = httpx.Request("GET", "https://statusinvest.com.br/acoes/petr4")
+
+def status_error(status_code: int, headers: dict = None) -> httpx.HTTPStatusError:
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return httpx.HTTPStatusError(f"HTTP {status_code}", request=REQUEST, response=response)
+
+class FakeSource:
+    """
+    Requisição que levanta (ou devolve) os resultados programados, em ordem
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    async def __call__(self) -> httpx.Response:
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker("status_invest", failure_threshold=2, reset_timeout=60.0)
+    monkeypatch.setitem(resilience.circuit_breakers, "status_invest", breaker)
+    monkeypatch.setattr(settings, "etl_retry_attempts", 1)
+    monkeypatch.setattr(settings, "etl_request_deadline_seconds", 5.0)
+    monkeypatch.setattr(settings, "etl_fetch_deadline_seconds", 5.0)
+    monkeypatch.setattr(settings, "etl_retry_backoff_seconds", 0.0)
+    monkeypatch.setattr(settings, "etl_retry_backoff_max_seconds", 0.0)
+    return breaker
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", fake_sleep)
+    return delays
+
+def call(source) -> httpx.Response:
+    return asyncio.run(call_with_resilience("status_invest", source))
+
+def expire(breaker: CircuitBreaker):
+    breaker.opened_at -= breaker.reset_timeout
+
+def test_breaker_opens_half_opens_and_closes(breaker):
+    failing = FakeSource(httpx.ConnectError("fora do ar"))
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            call(failing)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        call(failing)
+    assert failing.calls == 2
+
+    expire(breaker)
+    assert breaker.state == "half_open"
+
+    ok = httpx.Response(200, request=REQUEST)
+    assert call(FakeSource(ok)) is ok
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+def test_failed_probe_reopens_the_circuit(breaker):
+    failing = FakeSource(httpx.ConnectError("fora do ar"))
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            call(failing)
+    expire(breaker)
+
+    with pytest.raises(httpx.ConnectError):
+        call(failing)
+    assert breaker.state == "open"
+    assert failing.calls == 3
+
+def test_only_4xx_counts_as_success(breaker):
+    with pytest.raises(httpx.ConnectError):
+        call(FakeSource(httpx.ConnectError("fora do ar")))
+    with pytest.raises(ValueError):
+        call(FakeSource(ValueError("erro de parsing")))
+    assert breaker.failures == 1
+
+    with pytest.raises(httpx.ConnectError):
+        call(FakeSource(httpx.ConnectError("fora do ar")))
+    expire(breaker)
+
+    # Erro alheio à fonte no teste do meio aberto: libera a vaga sem fechar nem reabrir
+    with pytest.raises(ValueError):
+        call(FakeSource(ValueError("erro de parsing")))
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    breaker.release_probe()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(FakeSource(status_error(404)))
+    assert breaker.state == "closed"
+
+def test_retry_after_extends_the_backoff(breaker, sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "etl_retry_attempts", 3)
+    breaker.failure_threshold = 3
+    ok = httpx.Response(200, request=REQUEST)
+    source = FakeSource(status_error(429, {"Retry-After": "2"}), status_error(503, {"Retry-After": "soon"}), ok)
+
+    assert call(source) is ok
+    assert source.calls == 3
+    assert sleeps == [2.0, 0.0]
+
+def test_retry_after_past_the_deadline_gives_up(breaker, sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "etl_retry_attempts", 3)
+    source = FakeSource(status_error(429, {"Retry-After": "60"}))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        call(source)
+    assert source.calls == 1
+    assert sleeps == []
+
+def test_overall_deadline_bounds_all_attempts(breaker, monkeypatch):
+    monkeypatch.setattr(settings, "etl_retry_attempts", 100)
+    monkeypatch.setattr(settings, "etl_fetch_deadline_seconds", 0.3)
+    breaker.failure_threshold = 1000
+
+    async def hanging() -> httpx.Response:
+        await asyncio.sleep(10)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        call(hanging)
+    assert time.monotonic() - started < 1.0
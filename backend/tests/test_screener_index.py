@@ -0,0 +1,47 @@
+import random
+import numpy as np
+import pytest
+from app.models.stock import Stock
+from app.models.strategy import FilterOperator
+from app.services.screener_index import ScreenerIndex
+from app.services.stock_universe import StockUniverse
+from app.services.strategy_compiler import CompiledClause
+
+SECTORS = ["Bancos", "Energia", "Saneamento", None]
+
+@pytest.fixture
+def universe(db):
+    rng = random.Random(4)
+    for i in range(120):
+        db.add(Stock(
+            ticker=f"S{i:03d}3",
+            name=f"Empresa {i}",
+            sector=rng.choice(SECTORS),
+            subsector=rng.choice(["A", "B", None]),
+            # Valores repetidos e nulos exercitam os blocos de iguais e as linhas sem valor
+            pe_ratio=rng.choice([None, 5.0, 8.0, 8.0, rng.uniform(1, 20)]),
+            dividend_yield=rng.uniform(0, 12)
+        ))
+    db.commit()
+    return StockUniverse.from_db(db)
+
+def filters():
+    for operator in FilterOperator:
+        for value in [None, 0.5, 5.0, 8.0, 10.0, 30.0, float("nan")]:
+            yield "pe_ratio", operator, value, None
+        for text in [None, "", "8.0", "1,2"]:
+            yield "pe_ratio", operator, None, text
+        for text in [None, "", "Bancos", "Bancos,Energia", "Inexistente"]:
+            yield "sector", operator, None, text
+        yield "sector", operator, 5.0, "Bancos"
+        yield "subsector", operator, None, "A,B"
+
+def test_index_matches_compiled_clause(universe):
+    index = ScreenerIndex(universe)
+
+    for indicator, operator, value_numeric, value_string in filters():
+        expected = CompiledClause(indicator, operator, value_numeric, value_string).evaluate(universe)
+
+        bitmap = index.bitmap(indicator, operator, value_numeric, value_string)
+        assert np.array_equal(np.unpackbits(bitmap, count=len(universe)).astype(bool), expected), (indicator, operator, value_numeric, value_string)
+        assert index.count(indicator, operator, value_numeric, value_string) == int(expected.sum())
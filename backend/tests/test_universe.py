@@ -0,0 +1,15 @@
+import pytest
+from app.etl.universe import normalize_tickers, load_tickers_csv
+
+def test_roots_with_digits_survive_normalization():
+    assert normalize_tickers(["b3sa3", " PETR4 ", "TAEE11", "K2ST3", "B3SA3"]) == ["B3SA3", "PETR4", "TAEE11", "K2ST3"]
+
+@pytest.mark.parametrize("ticker", ["ABCD1", "XYZ", "PETR4F", "PETR", "3SA33", "ABCDE3", "BOVA11X", ""])
+def test_invalid_tickers_are_rejected(ticker):
+    assert normalize_tickers([ticker]) == []
+
+def test_csv_keeps_tickers_with_digits(tmp_path):
+    path = tmp_path / "tickers.csv"
+    path.write_text("nome,ticker\nB3,B3SA3\nPetrobras,petr4\nFracionário,PETR4F\n", encoding="utf-8")
+
+    assert load_tickers_csv(str(path)) == ["B3SA3", "PETR4"]
@@ -10,6 +10,7 @@ export interface User {
   monthly_contribution?: number
   is_active: boolean
   is_verified: boolean
+  alert_digest_enabled: boolean
   created_at: string
   updated_at?: string
 }
@@ -273,7 +274,8 @@ export enum AlertType {
   STRATEGY_MATCH = 'strategy_match',
   PRICE_ALERT = 'price_alert',
   DIVIDEND_ALERT = 'dividend_alert',
-  SCORE_ALERT = 'score_alert'
+  SCORE_ALERT = 'score_alert',
+  DAILY_DIGEST = 'daily_digest'
 }
 
 export enum AlertStatus {
@@ -292,6 +294,7 @@ export interface Alert {
   title: string
   message: string
   status: AlertStatus
+  params?: Record<string, any>
   stock_ticker?: string
   stock_name?: string
   current_price?: string